@@ -0,0 +1,219 @@
+"""
+Antwort-Cache für wiederkehrende Chat-Fragen.
+
+Verschiedene Analysten stellen zum selben Pitch Deck oft fast identische Fragen
+("Wer ist im Team?", "Wie hoch ist die Burn Rate?"). Dieses Modul speichert Antworten
+pro Deck und erkennt ähnliche Fragen lokal über Zeichen-N-Gramm TF-IDF und Kosinus-Ähnlichkeit.
+Ein Treffer braucht zusätzlich dieselben Zahlen und weitgehend dieselben Inhaltswörter, da sich z.B.
+"Risiken" und "Chancen" oder "2023" und "2024" in den N-Grammen kaum unterscheiden.
+"""
+
+#import von packages
+import re
+import threading
+import unicodedata
+import numpy as np
+
+from ai_config.config import ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_MIN_WORD_OVERLAP
+
+# Füllwörter, die beim Vergleich der Inhaltswörter ignoriert werden (normalisierte Schreibweise)
+QUESTION_STOPWORDS = set("""
+    aus bei bzw das dass dem den der des die diese dieser dieses ein eine einer eines es gibt hat haben hoch
+    im in ist mit sich sind und von war waren was welche welchen welcher welches wer wie wird wo zu zum zur
+    a an and are as at be do does for how is it of on or the to what which who
+""".split())
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalisiert eine Frage für den Cache-Vergleich.
+
+    Args:
+        question (str): Frage des Nutzers
+
+    Returns:
+        str: Kleingeschriebene Frage ohne Satzzeichen und doppelte Leerzeichen
+    """
+    question = unicodedata.normalize("NFKC", question or "").lower()
+    question = re.sub(r"[^\w\s]", " ", question)
+    return re.sub(r"\s+", " ", question).strip()
+
+
+def char_ngrams(text: str, n: int = 3) -> list:
+    """
+    Zerlegt einen normalisierten Text in Zeichen-N-Gramme (mit Wortgrenzen).
+
+    Args:
+        text (str): Normalisierter Text
+        n (int): Länge der N-Gramme
+
+    Returns:
+        list: Liste der N-Gramme
+    """
+    padded = f" {text} "
+    return [padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))]
+
+
+def content_words(normalized: str) -> set:
+    """
+    Inhaltswörter einer normalisierten Frage (ohne Füllwörter aus QUESTION_STOPWORDS).
+
+    Args:
+        normalized (str): Normalisierte Frage
+
+    Returns:
+        set: Inhaltswörter inkl. Zahlen
+    """
+    return {word for word in normalized.split() if word not in QUESTION_STOPWORDS}
+
+
+def same_content(first: str, second: str, min_overlap: float = ANSWER_CACHE_MIN_WORD_OVERLAP) -> bool:
+    """
+    Prüft, ob zwei normalisierte Fragen dieselben Zahlen und ausreichend dieselben Inhaltswörter enthalten.
+
+    Args:
+        first (str): Normalisierte Frage
+        second (str): Normalisierte Frage
+        min_overlap (float): Mindest-Jaccard-Ähnlichkeit der Inhaltswörter
+
+    Returns:
+        bool: True, falls die Fragen inhaltlich übereinstimmen
+    """
+    first_words, second_words = content_words(first), content_words(second)
+    # Zahlen (Jahre, Quartale, Beträge) müssen exakt übereinstimmen
+    if {word for word in first_words ^ second_words if any(char.isdigit() for char in word)}:
+        return False
+    if not first_words and not second_words:
+        return True
+    return len(first_words & second_words) / len(first_words | second_words) >= min_overlap
+
+
+def tfidf_similarities(query: str, candidates: list, n: int = 3) -> np.ndarray:
+    """
+    Berechnet die Kosinus-Ähnlichkeit einer Frage zu allen Kandidaten (Zeichen-N-Gramm TF-IDF).
+
+    Args:
+        query (str): Normalisierte Frage
+        candidates (list): Normalisierte, bereits gecachte Fragen
+        n (int): Länge der N-Gramme
+
+    Returns:
+        np.ndarray: Ähnlichkeit pro Kandidat (0 bis 1)
+    """
+    documents = [char_ngrams(text, n) for text in candidates + [query]]
+
+    vocabulary = {}
+    for grams in documents:
+        for gram in grams:
+            vocabulary.setdefault(gram, len(vocabulary))
+
+    matrix = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+    for row, grams in enumerate(documents):
+        for gram in grams:
+            matrix[row, vocabulary[gram]] += 1
+
+    # Glatte IDF wie bei scikit-learn, danach L2-Normierung
+    document_frequency = (matrix > 0).sum(axis=0)
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+    matrix *= idf
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    return matrix[:-1] @ matrix[-1]
+
+
+class AnswerCache:
+    """
+    Thread-sicherer Antwort-Cache pro Pitch Deck (Schlüssel: Deck-Hash).
+
+    Die Instanz wird prozessweit geteilt, damit alle Analysten vom Cache profitieren. Jede Invalidierung
+    erhöht die Generation des Decks; Antworten einer älteren Generation (z.B. aus einer noch laufenden
+    Vorberechnung der vorherigen Analyse) werden beim Speichern verworfen.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, min_word_overlap: float = ANSWER_CACHE_MIN_WORD_OVERLAP):
+        self.threshold = threshold
+        self.min_word_overlap = min_word_overlap
+        self._entries = {}  # deck_hash -> Liste von {"question", "normalized", "answer"}
+        self._generations = {}  # deck_hash -> Anzahl Invalidierungen
+        self._lock = threading.Lock()
+
+    def generation(self, deck_hash: str) -> int:
+        """
+        Aktuelle Generation eines Decks (vor dem Start einer Vorberechnung merken und an store übergeben).
+
+        Args:
+            deck_hash (str): Hash des Pitch Decks
+
+        Returns:
+            int: Generation (0, solange das Deck nie invalidiert wurde)
+        """
+        with self._lock:
+            return self._generations.get(deck_hash, 0)
+
+    def lookup(self, deck_hash: str, question: str):
+        """
+        Sucht eine gecachte Antwort zu einer (ähnlichen) Frage.
+
+        Args:
+            deck_hash (str): Hash des Pitch Decks
+            question (str): Frage des Nutzers
+
+        Returns:
+            tuple oder None: (Antwort, Ähnlichkeit) bei einem Treffer, sonst None
+        """
+        normalized = normalize_question(question)
+        with self._lock:
+            entries = list(self._entries.get(deck_hash, []))
+
+        if not entries or not normalized:
+            return None
+
+        # Schneller Pfad: identische normalisierte Frage
+        for entry in entries:
+            if entry["normalized"] == normalized:
+                return entry["answer"], 1.0
+
+        # Ähnlichste Frage zuerst; nur Treffer mit denselben Zahlen und Inhaltswörtern zählen
+        similarities = tfidf_similarities(normalized, [entry["normalized"] for entry in entries])
+        for index in np.argsort(-similarities):
+            if similarities[index] < self.threshold:
+                break
+            if same_content(normalized, entries[index]["normalized"], self.min_word_overlap):
+                return entries[index]["answer"], float(similarities[index])
+        return None
+
+    def store(self, deck_hash: str, question: str, answer: str, generation: int = None) -> bool:
+        """
+        Speichert eine Antwort im Cache (ersetzt eine vorhandene Antwort zur gleichen Frage).
+
+        Args:
+            deck_hash (str): Hash des Pitch Decks
+            question (str): Frage des Nutzers
+            answer (str): Antwort des Assistenten
+            generation (int): Generation, zu der die Antwort berechnet wurde (None = aktuelle Generation)
+
+        Returns:
+            bool: False, falls die Antwort leer ist oder zu einer inzwischen invalidierten Generation gehört
+        """
+        normalized = normalize_question(question)
+        if not normalized:
+            return False
+        with self._lock:
+            if generation is not None and generation != self._generations.get(deck_hash, 0):
+                return False
+            entries = [e for e in self._entries.get(deck_hash, []) if e["normalized"] != normalized]
+            entries.append({"question": question, "normalized": normalized, "answer": answer})
+            self._entries[deck_hash] = entries
+        return True
+
+    def invalidate(self, deck_hash: str):
+        """
+        Verwirft alle gecachten Antworten eines Decks (z.B. wenn die Analyse neu gestartet wird)
+        und startet eine neue Generation, damit noch laufende Vorberechnungen nichts mehr speichern.
+
+        Args:
+            deck_hash (str): Hash des Pitch Decks
+        """
+        with self._lock:
+            self._entries.pop(deck_hash, None)
+            self._generations[deck_hash] = self._generations.get(deck_hash, 0) + 1
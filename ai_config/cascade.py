@@ -0,0 +1,99 @@
+"""
+Modell-Kaskade für die Pitch Deck Analyse.
+
+Ein schnelles Modell (CASCADE_SCREENING_MODEL) bewertet jedes Deck zuerst: Pitch Deck Analyse und
+Web-Recherche. Nur unklare Decks werden danach mit einem stärkeren Modell (CASCADE_ESCALATION_MODEL)
+erneut bewertet:
+- gemischte Prognosen (gelbe Ampel nach dem Screening)
+- niedrige mittlere Konfidenz der Kategorie-Scores
+- quantitative Red Flags, deren Kennzahl knapp an der Schwelle liegt
+
+Gründe und Laufzeit pro Stufe werden mit jedem Lauf gespeichert, dadurch lassen sich Eskalationsrate
+und Latenz auswerten und die Schwellwerte anpassen (siehe AnalysisStore.cascade_statistics).
+"""
+
+#import von packages
+from ai_config.config import CASCADE_MIN_CONFIDENCE, CASCADE_RED_FLAG_MARGIN
+from ai_config.rules import parse_rule, kpi_value, kpi_label, format_kpi_value
+
+# Gründe für eine Eskalation (Schlüssel werden gespeichert, Labels in der Oberfläche angezeigt)
+ESCALATION_REASONS = {
+    'yellow': "Gemischte Prognosen (gelb)",
+    'low_confidence': "Niedrige Konfidenz",
+    'borderline_red_flag': "Red Flag knapp an der Schwelle"
+}
+
+
+def mean_confidence(category_scores: dict):
+    """
+    Mittlere Konfidenz über alle bewerteten Kategorien.
+
+    Returns:
+        float oder None: Mittelwert (0-1), None falls keine Kategorie bewertet wurde
+    """
+    confidences = [entry['confidence'] for entry in (category_scores or {}).values()]
+    if not confidences:
+        return None
+    return sum(confidences) / len(confidences)
+
+
+def borderline_red_flags(red_flags_list: list, kpis: dict, margin: float = CASCADE_RED_FLAG_MARGIN) -> list:
+    """
+    Findet quantitative Red Flags, deren Kennzahl relativ höchstens margin von der Schwelle entfernt ist
+    (unabhängig davon, ob die Regel zutrifft). Es zählen nur eindeutig erkannte Regeln (siehe parse_rule),
+    mehrdeutige Red Flags wie "Burn Multiple über 3" lösen keine Eskalation aus.
+
+    Args:
+        red_flags_list (list): Liste der Red Flags
+        kpis (dict): KPI-Datensatz des Decks
+        margin (float): Relativer Abstand zur Schwelle (z.B. 0.15 für 15%)
+
+    Returns:
+        list: Beschreibungen der knappen Red Flags
+    """
+    borderline = []
+    for flag in red_flags_list:
+        rule = parse_rule(flag)
+        value = kpi_value(kpis, rule['kpi']) if rule else None
+        if value is None:
+            continue
+        distance = abs(value - rule['threshold']) / max(abs(rule['threshold']), 1e-9)
+        if distance <= margin:
+            borderline.append(
+                f"{flag} ({kpi_label(rule['kpi'])} {format_kpi_value(rule['kpi'], value)}, "
+                f"Schwelle {format_kpi_value(rule['kpi'], rule['threshold'])})"
+            )
+    return borderline
+
+
+def escalation_reasons(screening_traffic_light: str, category_scores: dict, red_flags_list: list, kpis: dict,
+                       min_confidence: float = CASCADE_MIN_CONFIDENCE, red_flag_margin: float = CASCADE_RED_FLAG_MARGIN) -> dict:
+    """
+    Prüft, ob das Screening-Ergebnis unklar ist und das Deck mit dem stärkeren Modell bewertet werden soll.
+
+    Args:
+        screening_traffic_light (str): Ampel nach dem Screening (inkl. lokal getroffener Red Flags)
+        category_scores (dict): Kategorie-Scores aus dem Screening
+        red_flags_list (list): Liste der Red Flags
+        kpis (dict): KPI-Datensatz aus dem Screening
+        min_confidence (float): Mindest-Konfidenz (Mittelwert über die Kategorien)
+        red_flag_margin (float): Relativer Abstand zur Schwelle einer Red-Flag-Regel
+
+    Returns:
+        dict: Grund (Schlüssel aus ESCALATION_REASONS) -> Detail; leer, falls nicht eskaliert wird
+    """
+    reasons = {}
+    if screening_traffic_light == 'yellow':
+        reasons['yellow'] = "Pitch Deck und Web-Recherche widersprechen sich"
+
+    confidence = mean_confidence(category_scores)
+    if confidence is None or confidence < min_confidence:
+        reasons['low_confidence'] = (
+            "Keine Kategorie-Scores" if confidence is None
+            else f"Mittlere Konfidenz {confidence:.2f} < {min_confidence:.2f}"
+        )
+
+    borderline = borderline_red_flags(red_flags_list, kpis, red_flag_margin)
+    if borderline:
+        reasons['borderline_red_flag'] = "; ".join(borderline)
+    return reasons
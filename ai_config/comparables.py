@@ -0,0 +1,269 @@
+"""
+Suche nach vergleichbaren, bereits analysierten Pitch Decks.
+
+Jedes gespeicherte Deck wird als gehashter Wort-N-Gramm-Vektor (Uni- und Bigramme, Hashing-Trick mit
+COMPARABLE_HASH_DIMENSIONS Dimensionen) über Seitentexte und Begründungen dargestellt. Die Vektoren
+aller Decks liegen als TF-IDF-gewichtete, L2-normierte Matrix im Speicher; die Kosinus-Ähnlichkeit zu
+allen Decks ist damit eine einzige Matrix-Vektor-Multiplikation. Neue Läufe werden inkrementell
+ergänzt: ihr Vektor wird mit der aktuellen IDF-Gewichtung angehängt, die komplette Matrix wird erst neu
+aufgebaut, wenn der Index seit dem letzten Aufbau um IDF_REBUILD_GROWTH gewachsen ist.
+"""
+
+#import von packages
+import re
+import threading
+import zlib
+import numpy as np
+
+from ai_config.config import COMPARABLE_HASH_DIMENSIONS
+from ai_config.retrieval import tokenize
+
+# Abschnitte der Wettbewerber-Analyse (siehe functions.do_competitor_analysis)
+COMPETITOR_SECTIONS = {
+    'direct': "**Direkte Wettbewerber:**",
+    'indirect': "**Indirekte Wettbewerber:**"
+}
+
+# Relatives Wachstum des Index, ab dem die IDF-Gewichtung und die Matrix komplett neu berechnet werden
+IDF_REBUILD_GROWTH = 0.1
+
+# Markdown-Zeichen, die vor dem Hashing entfernt werden
+MARKDOWN_PATTERN = re.compile(r"[*_#`>|]+")
+
+
+def extract_competitors(analysis_text: str) -> dict:
+    """
+    Liest die Listen der direkten und indirekten Wettbewerber aus der formatierten Wettbewerber-Analyse.
+
+    Args:
+        analysis_text (str): Wettbewerber-Analyse (Markdown)
+
+    Returns:
+        dict: {"direct": [...], "indirect": [...]}
+    """
+    competitors = {key: [] for key in COMPETITOR_SECTIONS}
+    current = None
+    for line in (analysis_text or "").splitlines():
+        line = line.strip()
+        section = next((key for key, heading in COMPETITOR_SECTIONS.items() if line == heading), None)
+        if section:
+            current = section
+        elif current and line.startswith("- "):
+            competitors[current].append(line[2:].strip())
+        elif line:
+            current = None
+    return competitors
+
+
+def build_comparable_text(results: dict, page_texts: list = None) -> str:
+    """
+    Setzt den Text zusammen, über den Decks verglichen werden (Seitentexte und Begründungen).
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+        page_texts (list): Optional, Text pro PDF-Seite
+
+    Returns:
+        str: Vergleichstext
+    """
+    parts = list(page_texts or [])
+    parts.append((results.get('pitch_deck') or {}).get('reasoning', ''))
+    parts.append((results.get('web_research') or {}).get('reasoning', ''))
+    parts.append((results.get('competitor_analysis') or {}).get('analysis', ''))
+    parts.append(results.get('summary', ''))
+    return MARKDOWN_PATTERN.sub(" ", "\n".join(part or "" for part in parts))
+
+
+def hashed_term_counts(text: str, dimensions: int = COMPARABLE_HASH_DIMENSIONS) -> tuple:
+    """
+    Zählt die Wort-Uni- und Bigramme eines Textes als gehashte Dimensionen (dünn besetzt).
+
+    Args:
+        text (str): Beliebiger Text
+        dimensions (int): Anzahl Hash-Dimensionen
+
+    Returns:
+        tuple: (Dimensionen als np.int32, Häufigkeiten als np.float32), aufsteigend nach Dimension
+    """
+    tokens = tokenize(text or "")
+    grams = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    if not grams:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    hashes = np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint32, count=len(grams))
+    indices, counts = np.unique(hashes % dimensions, return_counts=True)
+    return indices.astype(np.int32), counts.astype(np.float32)
+
+
+class ComparableIndex:
+    """
+    Vektor-Index aller Decks (neuester Lauf pro Deck) für die Suche nach vergleichbaren Decks.
+
+    Wird von allen Streamlit-Sessions geteilt; Lesen und Ergänzen sind über ein gemeinsames Lock geschützt.
+    """
+
+    def __init__(self, rows: list = None, dimensions: int = COMPARABLE_HASH_DIMENSIONS):
+        """
+        Args:
+            rows (list): Dicts mit den Spalten der Tabelle analysis_vectors (siehe AnalysisStore.load_vector_rows)
+            dimensions (int): Anzahl Hash-Dimensionen (muss zu den gespeicherten Vektoren passen)
+        """
+        self._lock = threading.Lock()
+        self.dimensions = dimensions
+        self.entries = []  # Metadaten pro Deck
+        self.terms = []  # (Dimensionen, Häufigkeiten) pro Deck
+        self.positions = {}  # Deck-Hash -> Zeile
+        self.document_frequency = np.zeros(dimensions, dtype=np.int64)
+        self._matrix = None  # TF-IDF-Matrix, wird bei Bedarf bei der nächsten Suche aufgebaut
+        self._idf = None
+        self._built_count = 0  # Anzahl Decks beim letzten kompletten Aufbau
+        for row in rows or []:
+            self._upsert(row)
+
+    @classmethod
+    def from_store(cls, store):
+        """
+        Lädt den Index aus dem Analyse-Speicher (nur die gespeicherten Term-Vektoren).
+
+        Args:
+            store (AnalysisStore): Analyse-Speicher
+
+        Returns:
+            ComparableIndex: Geladener Index
+        """
+        return cls(store.load_vector_rows())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _upsert(self, row: dict):
+        """Ergänzt ein Deck oder ersetzt den älteren Lauf desselben Decks (ohne Lock)."""
+        indices = np.frombuffer(row['term_indices'], dtype=np.int32)
+        counts = np.frombuffer(row['term_counts'], dtype=np.float32)
+        entry = {
+            'analysis_id': row['analysis_id'],
+            'deck_hash': row['deck_hash'],
+            'filename': row['filename'],
+            'created_at': row['created_at'],
+            'final_prediction': row['final_prediction'],
+            'competitors': row['competitors']
+        }
+
+        position = self.positions.get(row['deck_hash'])
+        if position is None:
+            position = len(self.entries)
+            self.positions[row['deck_hash']] = position
+            self.entries.append(entry)
+            self.terms.append((indices, counts))
+        else:
+            self.document_frequency[self.terms[position][0]] -= 1
+            self.entries[position] = entry
+            self.terms[position] = (indices, counts)
+        self.document_frequency[indices] += 1
+
+        # Inkrementell: Zeile mit der bisherigen IDF-Gewichtung einsetzen, solange der Index nicht stark gewachsen ist
+        if self._matrix is not None and len(self.entries) <= self._built_count * (1 + IDF_REBUILD_GROWTH):
+            row_vector = self._vector(indices, counts)
+            if position < len(self._matrix):
+                self._matrix[position] = row_vector
+            else:
+                self._matrix = np.vstack([self._matrix, row_vector[None, :]])
+        else:
+            self._matrix = None
+
+    def upsert(self, row: dict):
+        """
+        Ergänzt den Vektor eines neu gespeicherten Laufs; ein älterer Lauf desselben Decks wird ersetzt.
+
+        Args:
+            row (dict): Zeile wie aus AnalysisStore.load_vector_rows
+        """
+        with self._lock:
+            self._upsert(row)
+
+    def set_final_prediction(self, analysis_id: int, final_prediction: str):
+        """
+        Aktualisiert die angezeigte Ampel eines Laufs (z.B. nach einer neuen Gewichtung).
+
+        Args:
+            analysis_id (int): ID des Laufs
+            final_prediction (str): Neue Ampel
+        """
+        with self._lock:
+            for entry in self.entries:
+                if entry['analysis_id'] == analysis_id:
+                    entry['final_prediction'] = final_prediction
+
+    def _vector(self, indices: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """TF-IDF-Vektor (L2-normiert) zu einem Term-Vektor mit der aktuellen IDF-Gewichtung."""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        vector[indices] = 1 + np.log(counts)
+        vector *= self._idf
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        return vector
+
+    def _weighted_matrix(self) -> np.ndarray:
+        """Baut die TF-IDF-Matrix (Decks x Dimensionen, L2-normiert) bei Bedarf neu auf."""
+        if self._matrix is None:
+            count = len(self.entries)
+            # Glatte IDF wie in answer_cache.tfidf_similarities, logarithmierte Termhäufigkeit
+            self._idf = (np.log((1 + count) / (1 + self.document_frequency)) + 1).astype(np.float32)
+            matrix = np.zeros((count, self.dimensions), dtype=np.float32)
+            if count:
+                lengths = [len(indices) for indices, _ in self.terms]
+                rows = np.repeat(np.arange(count), lengths)
+                columns = np.concatenate([indices for indices, _ in self.terms])
+                matrix[rows, columns] = 1 + np.log(np.concatenate([counts for _, counts in self.terms]))
+                matrix *= self._idf
+                matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            self._matrix = matrix
+            self._built_count = count
+        return self._matrix
+
+    def query(self, indices: np.ndarray, counts: np.ndarray, exclude_deck_hash: str = None, limit: int = 5) -> list:
+        """
+        Sucht die ähnlichsten Decks zu einem Term-Vektor (Kosinus-Ähnlichkeit über TF-IDF).
+
+        Args:
+            indices (np.ndarray): Dimensionen (siehe hashed_term_counts)
+            counts (np.ndarray): Häufigkeiten
+            exclude_deck_hash (str): Optional, Deck, das nicht zurückgegeben wird (z.B. das aktuelle)
+            limit (int): Maximale Anzahl Treffer
+
+        Returns:
+            list: Metadaten-Dicts inkl. "similarity" (0-1), ähnlichstes Deck zuerst
+        """
+        with self._lock:
+            matrix = self._weighted_matrix()
+            if not len(matrix) or not len(indices):
+                return []
+
+            similarities = matrix @ self._vector(indices, counts)
+            if exclude_deck_hash in self.positions:
+                similarities[self.positions[exclude_deck_hash]] = -1.0
+
+            # Nur die besten Kandidaten sortieren
+            top = np.argpartition(-similarities, min(limit, len(similarities)) - 1)[:limit]
+            top = top[np.argsort(-similarities[top], kind="stable")]
+            return [
+                {**self.entries[position], 'similarity': float(similarities[position])}
+                for position in top if similarities[position] > 0
+            ]
+
+    def similar_to_deck(self, deck_hash: str, limit: int = 5):
+        """
+        Sucht die ähnlichsten Decks zu einem bereits indizierten Deck.
+
+        Args:
+            deck_hash (str): Hash des Pitch Decks
+            limit (int): Maximale Anzahl Treffer
+
+        Returns:
+            list oder None: Treffer wie bei query, None falls das Deck nicht im Index ist
+        """
+        with self._lock:
+            position = self.positions.get(deck_hash)
+            if position is None:
+                return None
+            indices, counts = self.terms[position]
+        return self.query(indices, counts, exclude_deck_hash=deck_hash, limit=limit)
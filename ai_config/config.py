@@ -30,10 +30,92 @@ client = AnthropicFoundry(
 # Verzeichnispfade für Pitch Decks
 pitch_deck_dir = "./pitch_decks/"
 
+# SQLite-Datenbank für die Analyse-Historie
+HISTORY_DB_PATH = "./data/analyses.db"
+
 # Claude Modell für die Bewertung
 # claude-haiku-4-5 hat sich als bestes Modell im Testprozess herausgestellt (siehe Report)
 model = "claude-haiku-4-5"
 
+# Tiefe der Web-Recherche: maximale Anzahl Web-Suchen (max_uses des web_search Tools) pro Stufe
+# "quick" liefert schneller ein Ergebnis, "deep" recherchiert gründlicher bei höherer Laufzeit
+SEARCH_DEPTH_PROFILES = {
+    "quick": {"label": "Schnell", "competitor_analysis": 2, "web_research": 3},
+    "standard": {"label": "Standard", "competitor_analysis": 5, "web_research": 6},
+    "deep": {"label": "Gründlich", "competitor_analysis": 10, "web_research": 15}
+}
+SEARCH_DEPTH = "standard"
+
+# Modell pro Analyse-Stufe (Standard: überall das Bewertungsmodell)
+# z.B. ein schnelleres Modell für Red Flags und Zusammenfassung, ein stärkeres für die Pitch Deck Analyse
+STAGE_MODELS = {
+    "pitch_deck": model,
+    "custom_criteria": model,
+    "competitor_analysis": model,
+    "web_research": model,
+    "red_flags": model,
+    "summary": model
+}
+
+# Modell-Kaskade (in der Konfiguration umschaltbar): Pitch Deck Analyse und Web-Recherche laufen zuerst mit dem
+# schnellen Modell; nur unklare Decks werden mit dem stärkeren Modell erneut bewertet (siehe ai_config/cascade.py)
+CASCADE_MODE = False
+CASCADE_SCREENING_MODEL = "claude-haiku-4-5"
+CASCADE_ESCALATION_MODEL = "claude-sonnet-4-5"
+# Eskalation, falls die mittlere Konfidenz der Kategorie-Scores darunter liegt
+CASCADE_MIN_CONFIDENCE = 0.6
+# Eskalation, falls eine Kennzahl relativ höchstens so weit von der Schwelle einer Red-Flag-Regel entfernt ist
+CASCADE_RED_FLAG_MARGIN = 0.15
+
+# Pitch Deck Analyse parallel mit einer fokussierten Anfrage pro Kategorie statt einer langen Anfrage
+# (in der Konfiguration umschaltbar; Vergleich mit benchmarks/bench_category_evaluation.py)
+CATEGORY_EVALUATION_MODE = False
+
+# Ensemble der Pitch Deck Analyse (in der Konfiguration umschaltbar): mehrere parallele Bewertungen mit Mehrheitsentscheid,
+# die Übereinstimmung wird als Konfidenz neben der Ampel angezeigt (ungerade Anzahl vermeidet Gleichstand)
+ENSEMBLE_MODE = False
+ENSEMBLE_MODELS = [model, model, model]
+
+# Chat-Konfiguration
+# Anzahl der relevantesten Abschnitte aus dem lokalen Retrieval-Index, die pro Frage mitgeschickt werden
+CHAT_TOP_K = 6
+# Anzahl der letzten Chat-Nachrichten, die als Verlauf mitgeschickt werden
+CHAT_HISTORY_MESSAGES = 6
+# Mindest-Ähnlichkeit (Zeichen-N-Gramm TF-IDF Kosinus), ab der eine gecachte Antwort wiederverwendet wird
+ANSWER_CACHE_THRESHOLD = 0.7
+# Zusätzlich nötige Übereinstimmung der Inhaltswörter (Jaccard ohne Füllwörter); Zahlen müssen identisch sein.
+# Abgestimmt an Paraphrasen der Standard-Fragen (ab 0,67) und ähnlich klingenden anderen Fragen
+# wie "Chancen" statt "Risiken" (höchstens 0,57), siehe tests/test_answer_cache.py
+ANSWER_CACHE_MIN_WORD_OVERLAP = 0.65
+# Portfolio-Chat: maximale Anzahl Tool-Runden pro Frage und maximale Anzahl Decks pro Tool-Ergebnis
+PORTFOLIO_CHAT_MAX_TOOL_ROUNDS = 5
+PORTFOLIO_TOOL_RESULT_LIMIT = 20
+
+# Mindest-Ähnlichkeit (geschätzte Jaccard-Ähnlichkeit der Seitentexte), ab der ein hochgeladenes Deck
+# als überarbeitete Version eines bereits analysierten Decks erkannt wird
+SIMILAR_DECK_THRESHOLD = 0.6
+
+# Vergleichbare Decks: Dimension der gehashten Wort-N-Gramm-Vektoren und Anzahl angezeigter Decks
+COMPARABLE_HASH_DIMENSIONS = 2048
+COMPARABLE_DECKS_LIMIT = 5
+
+# Anzahl Red Flags pro Anfrage beim Red Flag Check; längere Listen werden in parallelen Batches geprüft
+RED_FLAG_BATCH_SIZE = 5
+
+# Red Flag Check und Zusammenfassung in einer kombinierten Anfrage ausführen
+# (spart einen Request pro Deck; in der Konfiguration umschaltbar, um beide Modi zu vergleichen)
+FUSED_REVIEW_STAGE = False
+
+# Standard-Fragen der Partner, die direkt nach der Analyse im Hintergrund beantwortet werden
+# (können in der Konfiguration angepasst werden)
+STANDARD_QUESTIONS = [
+    "Wer ist im Gründerteam und welchen Hintergrund haben die Gründer?",
+    "Wie sieht der Cap Table bzw. die Beteiligungsstruktur aus?",
+    "Wie hoch ist die Burn Rate und wie lange reicht der Runway?",
+    "Wie groß sind TAM, SAM und SOM?",
+    "Was sind die wichtigsten Risiken dieses Investments?"
+]
+
 # Bewertungskriterien als strukturierte Daten
 # Diese Kategorien können später vom Nutzer gewichtet werden
 EVALUATION_CRITERIA = {
@@ -75,29 +157,43 @@ dynamics and collaboration; leadership experience of the founding team; depth of
 strength and relevance of the professional network; founder stability and retention risk over the long term."""
 }
 
-#Definition einer Funktion um Gewichtungen zu vergeben
-def build_instruction_with_weights(criteria_weights: dict = None, additional_criteria: list = None):
-    """
-    Erstellt die Bewertungsanweisung mit gewichteten Kriterien.
+# Kennzahlen (KPIs), die bei der Pitch Deck Analyse strukturiert extrahiert werden
+# Geldbeträge in EUR, Wachstum in Prozent; nicht im Deck genannte Werte bleiben leer (None)
+KPI_FIELDS = {
+    "revenue": {"label": "Umsatz (ARR)", "unit": "€", "description": "Current annual revenue or ARR in EUR"},
+    "revenue_growth": {"label": "Umsatzwachstum", "unit": "%", "description": "Year-over-year revenue growth in percent (e.g. 120 for +120%)"},
+    "monthly_burn": {"label": "Burn Rate", "unit": "€/Monat", "description": "Net cash burn per month in EUR"},
+    "runway_months": {"label": "Runway", "unit": "Monate", "description": "Remaining runway in months"},
+    "paying_customers": {"label": "Zahlende Kunden", "unit": "", "description": "Number of paying customers"},
+    "cac": {"label": "CAC", "unit": "€", "description": "Customer acquisition cost per customer in EUR"},
+    "ltv": {"label": "LTV", "unit": "€", "description": "Customer lifetime value per customer in EUR"},
+    "round_size": {"label": "Rundengröße", "unit": "€", "description": "Size of the current funding round in EUR"},
+    "valuation": {"label": "Bewertung (Pre-Money)", "unit": "€", "description": "Pre-money valuation of the current round in EUR"}
+}
 
-    Args:
-        criteria_weights (dict): Dictionary mit Kategorie -> Gewichtung ("niedrig", "mittel", "hoch")
-        additional_criteria (list): Liste von Dicts mit {"weight": str, "description": str}
+# Numerische Werte der Gewichtungsstufen für die lokale Gesamtbewertung (siehe ai_config/scoring.py)
+WEIGHT_VALUES = {
+    "niedrig": 0.5,
+    "mittel": 1.0,
+    "hoch": 2.0
+}
 
-    Returns:
-        str: Vollständige Bewertungsanweisung mit Gewichtungen
+# Ab diesem gewichteten Gesamtscore (Skala 0-10) gilt die Pitch-Deck-Prognose als positiv
+PREDICTION_SCORE_THRESHOLD = 6.0
+
+#Definition einer Funktion für die Bewertungsanweisung
+def build_evaluation_instruction():
     """
-    # Standard-Gewichtung falls keine angegeben (immer Mittel)
-    if criteria_weights is None:
-        criteria_weights = {key: "mittel" for key in EVALUATION_CRITERIA.keys()}
+    Erstellt die Bewertungsanweisung für das Pitch Deck.
 
-    # Gewichtungs-Mapping
-    weight_instructions = {
-        "niedrig": "Gewichte diese Kategorie GERINGER in deiner Gesamtbewertung",
-        "mittel": "Gewichte diese Kategorie STANDARD in deiner Gesamtbewertung",
-        "hoch": "Gewichte diese Kategorie HÖHER in deiner Gesamtbewertung - dies ist KRITISCH für die Investitionsentscheidung"
-    }
+    Die Standard-Kategorien werden ohne Gewichtung einzeln bewertet (Score 0-10 und Konfidenz 0-1).
+    Die Gewichtung erfolgt danach lokal, dadurch ändert eine neue Gewichtung die Anweisung nicht
+    und erfordert keinen neuen API-Aufruf. Benutzerdefinierte Kriterien werden ebenfalls nicht
+    in diese Anweisung aufgenommen, sondern einzeln bewertet (siehe evaluate_criterion).
 
+    Returns:
+        str: Vollständige Bewertungsanweisung
+    """
     instruction_parts = ["""Du bist ein erfahrener Venture Capital Analyst. Bewerte ein Startup Pitch Deck objektiv basierend auf den folgenden
 Kategorien und Kriterien. Analysiere die Informationen sorgfältig, identifiziere Stärken und Risiken und nutze dein Urteilsvermögen,
 um zu entscheiden, ob das Startup voraussichtlich überleben und erfolgreich sein wird.
@@ -105,21 +201,9 @@ um zu entscheiden, ob das Startup voraussichtlich überleben und erfolgreich sei
 BEWERTUNGSRAHMEN:
 """]
 
-    # Füge jede Kategorie mit Gewichtung hinzu
+    # Füge jede Kategorie hinzu (ohne Gewichtung, diese wird lokal angewendet)
     for category, description in EVALUATION_CRITERIA.items():
-        weight = criteria_weights.get(category, "mittel")
-        weight_instruction = weight_instructions.get(weight, weight_instructions["mittel"])
-
-        instruction_parts.append(f"{category} [{weight_instruction}]: {description}\n")
-
-    # Füge zusätzliche Kriterien hinzu. Nutzer kann diese selbst bestimmen. 
-    if additional_criteria:
-        instruction_parts.append("\nZUSÄTZLICHE BENUTZERDEFINIERTE KRITERIEN:\n")
-        for criterion in additional_criteria:
-            if criterion.get("description", "").strip():
-                weight = criterion.get("weight", "mittel")
-                weight_instruction = weight_instructions.get(weight, weight_instructions["mittel"])
-                instruction_parts.append(f"[{weight_instruction}]: {criterion['description']}\n")
+        instruction_parts.append(f"{category}: {description}\n")
 
     instruction_parts.append("""
 Denke alle Dimensionen ganzheitlich durch und berücksichtige sowohl qualitative Narrative als auch quantitative Beweise.
@@ -131,11 +215,13 @@ WICHTIG: Antworte in deutscher Sprache!
 Ausgabeformat:
 PREDICTION: [true/false]
 REASONING: [Gib eine kurze Begründung in 2-3 Sätzen auf Deutsch, die die Schlüsselfaktoren erklärt, die zu deiner Entscheidung geführt haben]
+CATEGORY_SCORES: [Bewerte JEDE Kategorie des Bewertungsrahmens einzeln mit einem Score von 0 (sehr schwach) bis 10 (herausragend)
+und einer Konfidenz von 0 bis 1, wie gut das Deck diese Bewertung belegt (niedrige Konfidenz, wenn Informationen fehlen)]
 MISSING: [Falls Informationen für eine Dimension (z.B. TEAM, PRODUCT) fehlen, erstelle optimale Prompts für einen WebSearch-KI-Assistenten, um die fehlenden Informationen zu recherchieren.
 Füge so viele relevante Kontextinformationen wie Namen hinzu. Füge zusätzlich immer die Namen des Teams und eine kurze Marktbeschreibung hinzu, um sie an den WebSearch-Assistenten weiterzugeben]
 """)
 
     return "".join(instruction_parts)
 
-# Standard-Instruktion mit mittlerer Gewichtung für alle Kriterien
-instruction = build_instruction_with_weights()
\ No newline at end of file
+# Bewertungsanweisung (unabhängig von Gewichtungen und benutzerdefinierten Kriterien)
+instruction = build_evaluation_instruction()
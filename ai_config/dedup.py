@@ -0,0 +1,177 @@
+"""
+Erkennung überarbeiteter Pitch Decks (Near-Duplicates).
+
+Gründer schicken häufig eine leicht überarbeitete Version ihres Decks erneut. Dieses Modul
+berechnet pro Deck eine MinHash-Signatur über Wort-Shingles der Seitentexte. Über einen
+LSH-Index (Bänder der Signatur als Hash-Buckets in SQLite) werden ähnliche, bereits analysierte
+Decks gefunden, ohne alle gespeicherten Signaturen vergleichen zu müssen.
+"""
+
+#import von packages
+import difflib
+import hashlib
+import io
+import re
+import zlib
+import numpy as np
+
+from ai_config.config import SIMILAR_DECK_THRESHOLD
+from ai_config.retrieval import extract_page_texts_from_stream
+
+# Wörter inkl. Umlaute und Zahlen (ohne Stoppwort-Filter, die Wortfolge ist hier wichtig)
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Anzahl aufeinanderfolgender Wörter pro Shingle
+SHINGLE_SIZE = 5
+
+# MinHash-Signatur mit 128 Hash-Funktionen, aufgeteilt in 32 LSH-Bänder à 4 Zeilen
+# (Decks mit 60 % Ähnlichkeit werden so mit ca. 99 % Wahrscheinlichkeit als Kandidat gefunden)
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# Universelles Hashing h(x) = (a * x + b) mod p mit festem Seed, damit Signaturen über Neustarts vergleichbar bleiben
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(20251)
+PERMUTATION_A = _rng.randint(1, 2**32 - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+PERMUTATION_B = _rng.randint(0, 2**32 - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(page_texts: list, size: int = SHINGLE_SIZE) -> set:
+    """
+    Zerlegt die Seitentexte eines Decks in Wort-Shingles (als 32-Bit Hashes).
+
+    Args:
+        page_texts (list): Text pro PDF-Seite
+        size (int): Anzahl Wörter pro Shingle
+
+    Returns:
+        set: Menge der Shingle-Hashes (leer, falls das Deck keinen Text enthält)
+    """
+    words = WORD_PATTERN.findall(" ".join(page_texts).lower())
+    if not words:
+        return set()
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(page_texts: list):
+    """
+    Berechnet die MinHash-Signatur eines Decks.
+
+    Args:
+        page_texts (list): Text pro PDF-Seite
+
+    Returns:
+        np.ndarray oder None: Signatur (NUM_PERMUTATIONS x uint64) oder None, falls das Deck keinen Text enthält
+    """
+    hashes = shingles(page_texts)
+    if not hashes:
+        return None
+
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    # Alle Hash-Funktionen auf einmal: (Shingles x Permutationen), danach Minimum pro Spalte
+    return ((np.outer(values, PERMUTATION_A) + PERMUTATION_B) % MERSENNE_PRIME).min(axis=0)
+
+
+def lsh_band_keys(signature: np.ndarray) -> list:
+    """
+    Berechnet die LSH-Bucket-Schlüssel einer Signatur (ein Schlüssel pro Band).
+
+    Args:
+        signature (np.ndarray): MinHash-Signatur
+
+    Returns:
+        list: Liste von (Band, Bucket) Tupeln; Bucket als vorzeichenbehafteter 64-Bit Integer für SQLite
+    """
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, "big", signed=True)))
+    return keys
+
+
+def estimate_similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """
+    Schätzt die Jaccard-Ähnlichkeit zweier Decks über den Anteil gleicher MinHash-Werte.
+
+    Returns:
+        float: Geschätzte Ähnlichkeit (0 bis 1)
+    """
+    return float(np.mean(signature_a == signature_b))
+
+
+def fingerprint_upload(pdf_bytes: bytes) -> dict:
+    """
+    Berechnet Deck-Hash, Seitentexte und MinHash-Signatur eines hochgeladenen PDFs (vor dem Speichern).
+
+    Args:
+        pdf_bytes (bytes): Inhalt des hochgeladenen PDFs
+
+    Returns:
+        dict: {"deck_hash", "page_texts", "signature"} (signature ist None bei Decks ohne Text)
+    """
+    page_texts = extract_page_texts_from_stream(io.BytesIO(pdf_bytes))
+    return {
+        'deck_hash': hashlib.sha256(pdf_bytes).hexdigest(),
+        'page_texts': page_texts,
+        'signature': minhash_signature(page_texts)
+    }
+
+
+def find_similar_decks(store, signature: np.ndarray, threshold: float = SIMILAR_DECK_THRESHOLD) -> list:
+    """
+    Sucht bereits analysierte Decks, die einer Signatur ähnlich sind.
+
+    Args:
+        store (AnalysisStore): Speicher mit dem LSH-Index
+        signature (np.ndarray): MinHash-Signatur des neuen Decks
+        threshold (float): Mindest-Ähnlichkeit
+
+    Returns:
+        list: Liste von Dicts {"deck_hash", "filename", "similarity"}, ähnlichste zuerst
+    """
+    if signature is None:
+        return []
+
+    matches = []
+    for candidate in store.find_deck_candidates(lsh_band_keys(signature)):
+        candidate_signature = np.frombuffer(candidate['signature'], dtype=np.uint64)
+        similarity = estimate_similarity(signature, candidate_signature)
+        if similarity >= threshold:
+            matches.append({
+                'deck_hash': candidate['deck_hash'],
+                'filename': candidate['filename'],
+                'similarity': similarity
+            })
+
+    return sorted(matches, key=lambda match: match['similarity'], reverse=True)
+
+
+def diff_decks(old_pages: list, new_pages: list) -> str:
+    """
+    Erstellt einen zeilenweisen Diff zwischen zwei Deck-Versionen.
+
+    Args:
+        old_pages (list): Seitentexte der früheren Version
+        new_pages (list): Seitentexte der neuen Version
+
+    Returns:
+        str: Unified Diff mit Seitenangaben (leer, falls keine Unterschiede bestehen)
+    """
+    def as_lines(pages):
+        lines = []
+        for page_number, text in enumerate(pages, 1):
+            lines.append(f"=== Seite {page_number} ===")
+            lines.extend(line.strip() for line in text.splitlines() if line.strip())
+        return lines
+
+    return "\n".join(difflib.unified_diff(
+        as_lines(old_pages),
+        as_lines(new_pages),
+        fromfile="Frühere Version",
+        tofile="Neue Version",
+        lineterm=""
+    ))
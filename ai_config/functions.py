@@ -6,22 +6,94 @@ Dieses Modul enthält alle wichtigen Funktionen für:
 - Web-Recherche für fehlende Informationen
 - Zusammenfassung der Ergebnisse
 - E-Mail-Generierung für Gründer
+- Chat zum einzelnen Deck und Portfolio-Chat mit lokalen Tools
 """
 
 #import von packages
 import anthropic
 import base64
+from datetime import datetime
 from typing import Tuple
 
-from ai_config.config import client, model
+from ai_config.config import client, model, EVALUATION_CRITERIA, KPI_FIELDS
+from ai_config.scoring import normalize_category_scores, compute_traffic_light
+from ai_config.rules import normalize_kpis
 
-def get_prediction(client: anthropic.Anthropic = client, model: str = model, instruction: str = "", pdf_filename: str = "") -> Tuple[bool, str]:
+def normalize_domain(source: str) -> str:
+    """
+    Wandelt eine eingegebene Quelle (z.B. "https://www.crunchbase.com/") in das Domain-Format des
+    web_search Tools um (ohne Schema, ohne abschließenden Schrägstrich, Host in Kleinbuchstaben).
+    """
+    domain = source.strip().split("://", 1)[-1].rstrip("/")
+    host, _, path = domain.partition("/")
+    return host.lower() + (f"/{path}" if path else "")
+
+
+def build_web_search_tool(max_uses: int = None, allowed_domains: list = None, blocked_domains: list = None) -> dict:
+    """
+    Erstellt das serverseitige web_search Tool mit nativer Domain-Filterung und Suchbudget.
+
+    Args:
+        max_uses (int): Maximale Anzahl Suchen pro Anfrage (None = unbegrenzt)
+        allowed_domains (list): Nur in diesen Domains suchen
+        blocked_domains (list): Diese Domains ausschließen (nicht zusammen mit allowed_domains)
+
+    Returns:
+        dict: Tool-Definition für die Claude API
+    """
+    allowed = [normalize_domain(source) for source in allowed_domains or [] if source.strip()]
+    blocked = [normalize_domain(source) for source in blocked_domains or [] if source.strip()]
+    if allowed and blocked:
+        raise ValueError("allowed_domains and blocked_domains cannot be used together")
+
+    tool = {
+        "type": "web_search_20250305",
+        "name": "web_search"
+    }
+    if max_uses:
+        tool["max_uses"] = int(max_uses)
+    if allowed:
+        tool["allowed_domains"] = allowed
+    if blocked:
+        tool["blocked_domains"] = blocked
+    return tool
+
+
+def search_budget_note(max_uses: int = None) -> str:
+    """Hinweis für den Prompt, damit das Modell seine Suchen bei begrenztem Budget plant."""
+    if not max_uses:
+        return ""
+    return f"\nDir stehen höchstens {max_uses} Web-Suchen zur Verfügung. Plane sie so, dass die wichtigsten Fragen zuerst beantwortet werden.\n"
+
+
+# Schema für die Kennzahlen aus KPI_FIELDS (Pitch Deck Analyse und Deck-Überblick)
+KPI_SCHEMA = {
+    "type": "object",
+    "description": "Key figures stated in the pitch deck. Use null for every figure that is not stated, never estimate",
+    "properties": {
+        "sector": {
+            "type": "string",
+            "description": "Sector / business model in 1-3 words (e.g. 'SaaS', 'FinTech', 'Marketplace', 'HealthTech')"
+        },
+        **{
+            key: {"type": ["number", "null"], "description": field["description"]}
+            for key, field in KPI_FIELDS.items()
+        }
+    },
+    "required": ["sector", *KPI_FIELDS]
+}
+
+def get_prediction(client: anthropic.Anthropic = client, model: str = model, instruction: str = "", pdf_filename: str = "") -> Tuple[bool, bool, str, str, dict, dict]:
     """
     Analysiert ein Pitch Deck PDF und erstellt eine Erfolgs-Prognose mit Claude AI.
 
     Die Funktion lädt ein PDF, kodiert es als Base64 und sendet es an Claude zur Analyse.
     Claude bewertet das Pitch Deck anhand definierter Kriterien und gibt eine strukturierte
-    Bewertung zurück mit Prognose, Begründung und fehlenden Informationen.
+    Bewertung zurück mit Prognose, Begründung, fehlenden Informationen und einem Score
+    (0-10) mit Konfidenz (0-1) pro Kategorie aus EVALUATION_CRITERIA. Die gewichtete
+    Gesamtbewertung aus den Kategorie-Scores erfolgt lokal (siehe ai_config/scoring.py).
+    Zusätzlich werden die Kennzahlen aus KPI_FIELDS und die Branche als typisierter
+    Datensatz extrahiert (Grundlage für die lokalen Red-Flag-Regeln in ai_config/rules.py).
 
     Args:
         client (anthropic.Anthropic): Anthropic API Client
@@ -30,11 +102,13 @@ def get_prediction(client: anthropic.Anthropic = client, model: str = model, ins
         pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
 
     Returns:
-        Tuple[bool, bool, str, str]: (Erfolg, Prognose, Begründung, fehlende_Informationen)
+        Tuple[bool, bool, str, str, dict, dict]: (Erfolg, Prognose, Begründung, fehlende_Informationen, Kategorie_Scores, KPIs)
             - Erfolg: True wenn Analyse erfolgreich, False bei Fehler
-            - Prognose: True wenn Startup voraussichtlich erfolgreich, False sonst
+            - Prognose: True wenn Startup voraussichtlich erfolgreich, False sonst (Einschätzung von Claude)
             - Begründung: Textuelle Erklärung der Entscheidung
             - fehlende_Informationen: Informationen für Web-Recherche
+            - Kategorie_Scores: Kategorie -> {"score", "confidence"} (leer, falls nicht geliefert)
+            - KPIs: Feld aus KPI_FIELDS -> float oder None, plus "sector"
     """
     try:
         # Lade und kodiere das PDF als Base64
@@ -61,12 +135,35 @@ def get_prediction(client: anthropic.Anthropic = client, model: str = model, ins
                         "type": "string",
                         "description": "Brief justification in 2-3 sentences explaining the key factors that led to the decision"
                     },
+                    "category_scores": {
+                        "type": "object",
+                        "description": "Independent score for every evaluation category, without any weighting",
+                        "properties": {
+                            category: {
+                                "type": "object",
+                                "properties": {
+                                    "score": {
+                                        "type": "number",
+                                        "description": f"Score for {category} from 0 (very weak) to 10 (outstanding)"
+                                    },
+                                    "confidence": {
+                                        "type": "number",
+                                        "description": "Confidence from 0 to 1 how well the pitch deck supports this score (low if information is missing)"
+                                    }
+                                },
+                                "required": ["score", "confidence"]
+                            }
+                            for category in EVALUATION_CRITERIA
+                        },
+                        "required": list(EVALUATION_CRITERIA)
+                    },
+                    "kpis": KPI_SCHEMA,
                     "missing": {
                         "type": "string",
                         "description": "Information that is missing from the pitch deck that would be helpful for a more accurate evaluation"
                     }
                 },
-                "required": ["pitch", "prediction", "reasoning", "missing"]
+                "required": ["pitch", "prediction", "reasoning", "category_scores", "kpis", "missing"]
             }
         }
 
@@ -107,21 +204,301 @@ def get_prediction(client: anthropic.Anthropic = client, model: str = model, ins
                 pitch = result.get("pitch", "")
                 missing = pitch + result.get("missing", "")
                 missing += " Recherchiere Informationen über den Markt und die Gründer"
+                category_scores = normalize_category_scores(result.get("category_scores", {}))
+                kpis = normalize_kpis(result.get("kpis", {}))
 
                 print(f"Prediction: {prediction}")
                 print(f"Reasoning: {reasoning}")
+                print(f"Category Scores: {category_scores}")
+                print(f"KPIs: {kpis}")
                 print(f"Missing: {missing}")
 
-                return True, prediction, reasoning, missing
+                return True, prediction, reasoning, missing, category_scores, kpis
 
         # Fallback falls keine strukturierte Ausgabe gefunden wurde
-        return False, False, "No structured output received", ""
+        return False, False, "No structured output received", "", {}, normalize_kpis({})
 
     except Exception as e:
         print(f"Error in prediction for {pdf_filename}: {e}")
-        return False, False, f"Error: {str(e)}", ""
+        return False, False, f"Error: {str(e)}", "", {}, normalize_kpis({})
+
+def evaluate_criterion(client: anthropic.Anthropic = client, model: str = model, pdf_filename: str = "", criterion: str = "") -> Tuple[bool, float, float, str]:
+    """
+    Bewertet ein einzelnes benutzerdefiniertes Kriterium mit einer kleinen, eigenständigen Anfrage.
+
+    System-Anweisung, Tool und Pitch Deck sind für alle Kriterien identisch und stehen vor dem
+    Kriterium. Das Deck ist mit cache_control markiert, dadurch wird es nur bei der ersten Anfrage
+    vollständig verarbeitet und bei weiteren Kriterien aus dem Prompt-Cache gelesen.
+
+    Args:
+        client (anthropic.Anthropic): Anthropic API Client
+        model (str): Name des zu verwendenden Modells
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
+        criterion (str): Beschreibung des Kriteriums
+
+    Returns:
+        Tuple[bool, float, float, str]: (Erfolg, Score 0-10, Konfidenz 0-1, Begründung bzw. Fehlermeldung)
+    """
+    try:
+        with open("tmp/" + pdf_filename, 'rb') as f:
+            pdf_data = base64.standard_b64encode(f.read()).decode("utf-8")
+
+        criterion_tool = {
+            "name": "criterion_evaluation",
+            "description": "Scores how well a startup pitch deck fulfills one specific evaluation criterion",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "score": {
+                        "type": "number",
+                        "description": "Score from 0 (criterion not fulfilled at all) to 10 (fully fulfilled)"
+                    },
+                    "confidence": {
+                        "type": "number",
+                        "description": "Confidence from 0 to 1 how well the pitch deck supports this score (low if information is missing)"
+                    },
+                    "reasoning": {
+                        "type": "string",
+                        "description": "Brief justification in 1-2 sentences in German"
+                    }
+                },
+                "required": ["score", "confidence", "reasoning"]
+            }
+        }
+
+        message = client.messages.create(
+            model=model,
+            max_tokens=1024,
+            system="""Du bist ein erfahrener Venture Capital Analyst. Bewerte ausschließlich das angegebene Kriterium anhand
+des Pitch Decks, objektiv und ohne Hype. Antworte in deutscher Sprache mit dem criterion_evaluation Tool.""",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "document",
+                            "source": {
+                                "type": "base64",
+                                "media_type": "application/pdf",
+                                "data": pdf_data
+                            },
+                            # Deck als Cache-Präfix für alle weiteren Kriterien desselben Decks
+                            "cache_control": {"type": "ephemeral"}
+                        },
+                        {
+                            "type": "text",
+                            "text": f"Kriterium: {criterion}"
+                        }
+                    ]
+                }
+            ],
+            tools=[criterion_tool],
+            tool_choice={"type": "tool", "name": "criterion_evaluation"}
+        )
+
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            print(f"Criterion usage: {usage.input_tokens} input tokens, {getattr(usage, 'cache_read_input_tokens', 0) or 0} from cache")
+
+        for content in message.content:
+            if content.type == "tool_use" and content.name == "criterion_evaluation":
+                result = content.input
+                score = min(max(float(result.get("score", 0)), 0.0), 10.0)
+                confidence = min(max(float(result.get("confidence", 1.0)), 0.0), 1.0)
+                reasoning = result.get("reasoning", "")
+                print(f"Criterion '{criterion[:40]}': {score} ({confidence})")
+                return True, score, confidence, reasoning
+
+        return False, 0.0, 0.0, "No structured output received"
+
+    except Exception as e:
+        print(f"Error evaluating criterion '{criterion[:40]}': {e}")
+        return False, 0.0, 0.0, f"Error: {str(e)}"
     
-def do_websearch(client: anthropic.Anthropic = client, model: str = model, missing: str = "", allowed_sources: list = []):
+def get_deck_overview(client: anthropic.Anthropic = client, model: str = model, pdf_filename: str = "") -> Tuple[bool, bool, str, str, dict]:
+    """
+    Erstellt den Überblick eines Pitch Decks ohne Kategorie-Scores (für die parallele Bewertung pro Kategorie).
+
+    Liefert die Teile von get_prediction, die nicht zu einer einzelnen Kategorie gehören: kurze
+    Beschreibung, Gesamteinschätzung mit Begründung und die Kennzahlen aus KPI_FIELDS.
+
+    Args:
+        client (anthropic.Anthropic): Anthropic API Client
+        model (str): Name des zu verwendenden Modells
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
+
+    Returns:
+        Tuple[bool, bool, str, str, dict]: (Erfolg, Prognose, Begründung bzw. Fehlermeldung, Beschreibung, KPIs)
+    """
+    try:
+        with open("tmp/" + pdf_filename, 'rb') as f:
+            pdf_data = base64.standard_b64encode(f.read()).decode("utf-8")
+
+        overview_tool = {
+            "name": "pitch_deck_overview",
+            "description": "Provides a short overview of a startup pitch deck with an overall prediction and the stated key figures",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "pitch": {
+                        "type": "string",
+                        "description": "Short description of the startups idea, market and founders (if available)."
+                    },
+                    "prediction": {
+                        "type": "boolean",
+                        "description": "True if the startup is likely to survive and succeed, False otherwise"
+                    },
+                    "reasoning": {
+                        "type": "string",
+                        "description": "Brief justification in 2-3 sentences in German explaining the key factors that led to the decision"
+                    },
+                    "kpis": KPI_SCHEMA
+                },
+                "required": ["pitch", "prediction", "reasoning", "kpis"]
+            }
+        }
+
+        message = client.messages.create(
+            model=model,
+            max_tokens=2048,
+            system="""Du bist ein erfahrener Venture Capital Analyst. Verschaffe dir einen Überblick über das Pitch Deck, schätze
+objektiv und ohne Hype ein, ob das Startup voraussichtlich erfolgreich sein wird, und übernimm nur Kennzahlen, die im Deck genannt werden.
+Antworte in deutscher Sprache mit dem pitch_deck_overview Tool.""",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "document",
+                            "source": {
+                                "type": "base64",
+                                "media_type": "application/pdf",
+                                "data": pdf_data
+                            }
+                        },
+                        {
+                            "type": "text",
+                            "text": "Bitte erstelle den Überblick zu diesem Pitch Deck."
+                        }
+                    ]
+                }
+            ],
+            tools=[overview_tool],
+            tool_choice={"type": "tool", "name": "pitch_deck_overview"}
+        )
+
+        for content in message.content:
+            if content.type == "tool_use" and content.name == "pitch_deck_overview":
+                result = content.input
+                kpis = normalize_kpis(result.get("kpis", {}))
+                print(f"Overview prediction: {result.get('prediction', False)}, KPIs: {kpis}")
+                return True, result.get("prediction", False), result.get("reasoning", "No reasoning provided"), result.get("pitch", ""), kpis
+
+        return False, False, "No structured output received", "", normalize_kpis({})
+
+    except Exception as e:
+        print(f"Error in overview for {pdf_filename}: {e}")
+        return False, False, f"Error: {str(e)}", "", normalize_kpis({})
+
+def evaluate_category(client: anthropic.Anthropic = client, model: str = model, pdf_filename: str = "", category: str = "") -> Tuple[bool, float, float, str, str]:
+    """
+    Bewertet eine einzelne Kategorie aus EVALUATION_CRITERIA mit einer eigenen, fokussierten Anfrage.
+
+    System-Anweisung, Tool und Pitch Deck sind für alle Kategorien identisch und stehen vor der
+    Kategorie. Das Deck ist mit cache_control markiert, dadurch lesen alle weiteren Kategorien
+    dasselbe Deck aus dem Prompt-Cache (wie bei evaluate_criterion).
+
+    Args:
+        client (anthropic.Anthropic): Anthropic API Client
+        model (str): Name des zu verwendenden Modells
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
+        category (str): Schlüssel aus EVALUATION_CRITERIA (z.B. "TEAM")
+
+    Returns:
+        Tuple[bool, float, float, str, str]: (Erfolg, Score 0-10, Konfidenz 0-1, Begründung bzw. Fehlermeldung, fehlende_Informationen)
+    """
+    try:
+        with open("tmp/" + pdf_filename, 'rb') as f:
+            pdf_data = base64.standard_b64encode(f.read()).decode("utf-8")
+
+        category_tool = {
+            "name": "category_evaluation",
+            "description": "Scores one evaluation category of a startup pitch deck and lists the information missing for it",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "score": {
+                        "type": "number",
+                        "description": "Score for the category from 0 (very weak) to 10 (outstanding)"
+                    },
+                    "confidence": {
+                        "type": "number",
+                        "description": "Confidence from 0 to 1 how well the pitch deck supports this score (low if information is missing)"
+                    },
+                    "reasoning": {
+                        "type": "string",
+                        "description": "Brief justification in 1-2 sentences in German"
+                    },
+                    "missing": {
+                        "type": "string",
+                        "description": "Prompt for a web search assistant to research the information missing for this category, including relevant names (empty if nothing is missing)"
+                    }
+                },
+                "required": ["score", "confidence", "reasoning", "missing"]
+            }
+        }
+
+        message = client.messages.create(
+            model=model,
+            max_tokens=1024,
+            system="""Du bist ein erfahrener Venture Capital Analyst. Bewerte ausschließlich die angegebene Kategorie anhand
+des Pitch Decks, objektiv und ohne Hype, und konzentriere dich auf Fundamentaldaten statt auf das Narrativ.
+Antworte in deutscher Sprache mit dem category_evaluation Tool.""",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "document",
+                            "source": {
+                                "type": "base64",
+                                "media_type": "application/pdf",
+                                "data": pdf_data
+                            },
+                            # Deck als Cache-Präfix für alle weiteren Kategorien desselben Decks
+                            "cache_control": {"type": "ephemeral"}
+                        },
+                        {
+                            "type": "text",
+                            "text": f"Kategorie {category}: {EVALUATION_CRITERIA[category]}"
+                        }
+                    ]
+                }
+            ],
+            tools=[category_tool],
+            tool_choice={"type": "tool", "name": "category_evaluation"}
+        )
+
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            print(f"Category {category} usage: {usage.input_tokens} input tokens, {getattr(usage, 'cache_read_input_tokens', 0) or 0} from cache")
+
+        for content in message.content:
+            if content.type == "tool_use" and content.name == "category_evaluation":
+                result = content.input
+                score = min(max(float(result.get("score", 0)), 0.0), 10.0)
+                confidence = min(max(float(result.get("confidence", 1.0)), 0.0), 1.0)
+                print(f"Category {category}: {score} ({confidence})")
+                return True, score, confidence, result.get("reasoning", ""), result.get("missing", "")
+
+        return False, 0.0, 0.0, "No structured output received", ""
+
+    except Exception as e:
+        print(f"Error evaluating category {category}: {e}")
+        return False, 0.0, 0.0, f"Error: {str(e)}", ""
+
+def do_websearch(client: anthropic.Anthropic = client, model: str = model, missing: str = "", allowed_sources: list = [],
+                 blocked_sources: list = [], max_uses: int = None):
     """
     Führt eine umfassende Web-Recherche durch, um fehlende Informationen über das Startup
     und aktuelle Markt-Trends zu finden.
@@ -134,14 +511,17 @@ def do_websearch(client: anthropic.Anthropic = client, model: str = model, missi
     - Regulatorische Änderungen
     - Technologie-Trends und Investitionsaktivität
 
-    Die Recherche fokussiert sich auf definierte Quellen und erstellt eine eigenständige
-    Bewertung unter Berücksichtigung der Markt-Trends.
+    Erlaubte bzw. ausgeschlossene Quellen werden als allowed_domains/blocked_domains direkt an das
+    web_search Tool übergeben, max_uses begrenzt die Anzahl der Suchen (siehe SEARCH_DEPTH_PROFILES).
+    Die Recherche erstellt eine eigenständige Bewertung unter Berücksichtigung der Markt-Trends.
 
     Args:
         client (anthropic.Anthropic): Anthropic API Client
         model (str): Name des zu verwendenden Modells
         missing (str): Beschreibung der fehlenden Informationen und Recherche-Anweisungen
-        allowed_sources (list): Liste erlaubter Webseiten für die Recherche
+        allowed_sources (list): Nur in diesen Webseiten suchen
+        blocked_sources (list): Diese Webseiten ausschließen (nicht zusammen mit allowed_sources)
+        max_uses (int): Maximale Anzahl Web-Suchen (None = unbegrenzt)
 
     Returns:
         Tuple[bool, bool, str, list]: (Erfolg, Prognose, Begründung, Quellen)
@@ -191,9 +571,7 @@ def do_websearch(client: anthropic.Anthropic = client, model: str = model, missi
    - Veränderungen im Konsumentenverhalten und Nachfragemuster
    - Bemerkenswerte Investitionen oder M&A-Aktivitäten im Sektor
    - Expertenmeinungen und Analystenperspektiven zum Marktausblick
-
-Fokussiere dich auf diese Quellen: {allowed_sources}
-
+{search_budget_note(max_uses)}
 WICHTIG: Deine Bewertung muss Einblicke in aktuelle Markt-Trends enthalten und wie diese die Positionierung und das Wachstumspotenzial des Startups beeinflussen.
 
 Nach deiner umfassenden Recherche nutze das evaluation Tool, um deine Vorhersage und Begründung auf Deutsch bereitzustellen, die sowohl die fehlenden Informationen ALS AUCH die Markt-Trends-Analyse einbezieht.
@@ -201,10 +579,7 @@ Nach deiner umfassenden Recherche nutze das evaluation Tool, um deine Vorhersage
                 }
             ],
             tools=[
-                {
-                    "type": "web_search_20250305",
-                    "name": "web_search"
-                },
+                build_web_search_tool(max_uses, allowed_sources, blocked_sources),
                 evaluation_tool
             ]
         )
@@ -283,14 +658,7 @@ def summary(model: str = model, text_1: str = "", text_2: str = "", score_1: boo
     """
     try:
         # Bestimme finale Bewertung basierend auf beiden Prognosen
-        final_prediction = "red"
-        if score_1 == score_2:
-            if score_1:
-                final_prediction = "green"  # Beide Analysen positiv
-            else:
-                final_prediction = "red"    # Beide Analysen negativ
-        else:
-            final_prediction = "yellow"     # Gemischte Ergebnisse
+        final_prediction = compute_traffic_light(score_1, score_2)
 
         # Generiere zusammenfassende Analyse mit Claude
         message = client.messages.create(
@@ -408,7 +776,8 @@ BODY: [E-Mail-Text]
 
 
 
-def do_competitor_analysis(client: anthropic.Anthropic = client, model: str = model, startup_info: str = "", allowed_sources: list = []):
+def do_competitor_analysis(client: anthropic.Anthropic = client, model: str = model, startup_info: str = "", allowed_sources: list = [],
+                           blocked_sources: list = [], max_uses: int = None):
     """
     Führt eine detaillierte Wettbewerber-Analyse für das Startup durch.
 
@@ -420,7 +789,9 @@ def do_competitor_analysis(client: anthropic.Anthropic = client, model: str = mo
         client (anthropic.Anthropic): Anthropic API Client
         model (str): Name des zu verwendenden Modells
         startup_info (str): Informationen über das Startup (Idee, Markt, Produkt)
-        allowed_sources (list): Liste erlaubter Webseiten für die Recherche
+        allowed_sources (list): Nur in diesen Webseiten suchen (allowed_domains des web_search Tools)
+        blocked_sources (list): Diese Webseiten ausschließen (blocked_domains, nicht zusammen mit allowed_sources)
+        max_uses (int): Maximale Anzahl Web-Suchen (None = unbegrenzt)
 
     Returns:
         Tuple[bool, str, list]: (Erfolg, Analyse, Quellen)
@@ -469,9 +840,7 @@ def do_competitor_analysis(client: anthropic.Anthropic = client, model: str = mo
 Basierend auf den folgenden Startup-Informationen führe eine umfassende Wettbewerber-Analyse durch:
 
 {startup_info}
-
-Fokussiere dich auf diese Quellen, falls verfügbar: {allowed_sources}
-
+{search_budget_note(max_uses)}
 Deine Analyse sollte:
 1. 3-5 direkte Wettbewerber identifizieren (Unternehmen, die ähnliche Produkte/Dienstleistungen für denselben Zielmarkt anbieten)
 2. 2-3 indirekte Wettbewerber identifizieren (alternative Lösungen, die Kunden stattdessen nutzen könnten)
@@ -494,10 +863,7 @@ Nach deiner Recherche nutze das competitor_analysis Tool auf Deutsch, um struktu
                 }
             ],
             tools=[
-                {
-                    "type": "web_search_20250305",
-                    "name": "web_search"
-                },
+                build_web_search_tool(max_uses, allowed_sources, blocked_sources),
                 competitor_tool
             ]
         )
@@ -586,6 +952,8 @@ def check_red_flags(client: anthropic.Anthropic = client, model: str = model, pi
     Diese Funktion analysiert alle gesammelten Informationen (Pitch Deck, Web-Recherche,
     Wettbewerber-Analyse) und prüft systematisch, ob eine der definierten Red Flags zutrifft.
     Red Flags sind K.O.-Kriterien, die automatisch zu einer negativen Bewertung führen.
+    Die Red Flags werden nummeriert übergeben, damit jedes Ergebnis eindeutig der
+    ursprünglichen Red Flag zugeordnet werden kann (Grundlage für den Cache pro Red Flag).
 
     Args:
         client (anthropic.Anthropic): Anthropic API Client
@@ -596,15 +964,15 @@ def check_red_flags(client: anthropic.Anthropic = client, model: str = model, pi
         red_flags_list (list): Liste der zu prüfenden Red Flags
 
     Returns:
-        Tuple[bool, list, str]: (Erfolg, Getroffene_Red_Flags, Begründung)
+        Tuple[bool, dict, str]: (Erfolg, Getroffene_Red_Flags, Fehlermeldung)
             - Erfolg: True wenn Prüfung erfolgreich, False bei Fehler
-            - Getroffene_Red_Flags: Liste der Red Flags, die zutreffen
-            - Begründung: Detaillierte Erklärung für jede getroffene Red Flag
+            - Getroffene_Red_Flags: Red Flag (Text aus red_flags_list) -> Begründung, nur zutreffende Red Flags
+            - Fehlermeldung: Leer bei Erfolg
     """
     try:
         # Wenn keine Red Flags definiert sind, überspringe die Prüfung
         if not red_flags_list:
-            return True, [], ""
+            return True, {}, ""
 
         # Definiere strukturiertes Tool für Red Flag Check
         red_flag_tool = {
@@ -618,6 +986,10 @@ def check_red_flags(client: anthropic.Anthropic = client, model: str = model, pi
                         "items": {
                             "type": "object",
                             "properties": {
+                                "flag_number": {
+                                    "type": "integer",
+                                    "description": "Number of the red flag from the given list that was triggered"
+                                },
                                 "flag": {
                                     "type": "string",
                                     "description": "The red flag that was triggered"
@@ -627,7 +999,7 @@ def check_red_flags(client: anthropic.Anthropic = client, model: str = model, pi
                                     "description": "Detailed explanation why this red flag applies, with specific evidence from the analysis"
                                 }
                             },
-                            "required": ["flag", "reasoning"]
+                            "required": ["flag_number", "flag", "reasoning"]
                         },
                         "description": "List of red flags that apply to this startup"
                     }
@@ -637,7 +1009,7 @@ def check_red_flags(client: anthropic.Anthropic = client, model: str = model, pi
         }
 
         # Erstelle Prompt für Red Flag Check
-        red_flags_formatted = "\n".join([f"- {flag}" for flag in red_flags_list])
+        red_flags_formatted = "\n".join([f"{number}. {flag}" for number, flag in enumerate(red_flags_list, 1)])
 
         prompt = f"""Du bist ein kritischer Due-Diligence-Analyst für Venture Capital.
 
@@ -680,34 +1052,404 @@ Nutze das red_flag_check Tool, um deine Ergebnisse auf Deutsch zu melden.
             tool_choice={"type": "tool", "name": "red_flag_check"}
         )
 
-        # Extrahiere getroffene Red Flags
-        triggered_flags = []
-        reasoning_text = ""
+        # Extrahiere getroffene Red Flags (Zuordnung über die Nummer, Fallback über den Text)
+        triggered_flags = {}
 
         for content in response.content:
             if content.type == "tool_use" and content.name == "red_flag_check":
-                result = content.input
-                triggered_list = result.get("triggered_flags", [])
+                for item in content.input.get("triggered_flags", []):
+                    number = item.get("flag_number")
+                    if isinstance(number, int) and 1 <= number <= len(red_flags_list):
+                        flag = red_flags_list[number - 1]
+                    elif item.get("flag", "") in red_flags_list:
+                        flag = item["flag"]
+                    else:
+                        continue
+                    triggered_flags[flag] = item.get("reasoning", "")
+
+        print(f"Red Flag Check completed ({len(red_flags_list)} flags)")
+        print(f"Triggered Flags: {list(triggered_flags)}")
+
+        return True, triggered_flags, ""
+
+    except Exception as e:
+        print(f"Error in red flag check: {e}")
+        import traceback
+        traceback.print_exc()
+        return False, {}, f"Error: {str(e)}"
+
+
+def review_and_summarize(client: anthropic.Anthropic = client, model: str = model, pitch_deck_analysis: str = "", web_research_analysis: str = "", competitor_analysis: str = "", red_flags_list: list = [], score_1: bool = False, score_2: bool = False, known_triggered_flags: list = []):
+    """
+    Prüft Red Flags und erstellt die Zusammenfassung in einer einzigen Anfrage (kombinierte Stufe).
+
+    Red Flag Check und Zusammenfassung arbeiten auf denselben Eingaben; zusammengelegt sparen sie
+    einen kompletten Request pro Deck. Die Ampel selbst wird weiterhin lokal bestimmt
+    (compute_traffic_light), Claude liefert nur die Begründung dazu.
+
+    Args:
+        client (anthropic.Anthropic): Anthropic API Client
+        model (str): Name des zu verwendenden Modells
+        pitch_deck_analysis (str): Begründung aus der Pitch Deck Analyse
+        web_research_analysis (str): Begründung aus der Web-Recherche
+        competitor_analysis (str): Wettbewerber-Analyse
+        red_flags_list (list): Liste der von Claude zu prüfenden Red Flags (kann leer sein)
+        score_1 (bool): Prognose aus der Pitch Deck Analyse (True = Erfolg)
+        score_2 (bool): Prognose aus der Web-Recherche (True = Erfolg)
+        known_triggered_flags (list): Bereits festgestellte Red Flags (lokale KPI-Regeln oder letzter Lauf)
 
-                if triggered_list:
-                    reasoning_parts = ["**Getroffene Red Flags:**\n"]
-                    for item in triggered_list:
-                        flag = item.get("flag", "")
-                        reasoning = item.get("reasoning", "")
-                        triggered_flags.append(flag)
-                        reasoning_parts.append(f"🚨 **{flag}**")
-                        reasoning_parts.append(f"   {reasoning}\n")
+    Returns:
+        Tuple[bool, dict, str, str, str]: (Erfolg, Getroffene_Red_Flags, Zusammenfassung, Ampel-Begründung, Fehlermeldung)
+            - Getroffene_Red_Flags: Red Flag (Text aus red_flags_list) -> Begründung, nur zutreffende Red Flags
+    """
+    try:
+        review_tool = {
+            "name": "review_and_summary",
+            "description": "Reports which of the defined red flags apply, a comprehensive summary of the analysis and the rationale for the traffic light",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "triggered_flags": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "flag_number": {
+                                    "type": "integer",
+                                    "description": "Number of the red flag from the given list that was triggered"
+                                },
+                                "flag": {
+                                    "type": "string",
+                                    "description": "The red flag that was triggered"
+                                },
+                                "reasoning": {
+                                    "type": "string",
+                                    "description": "Detailed explanation why this red flag applies, with specific evidence from the analysis"
+                                }
+                            },
+                            "required": ["flag_number", "flag", "reasoning"]
+                        },
+                        "description": "List of red flags that apply to this startup (empty if none apply or no red flags were given)"
+                    },
+                    "summary": {
+                        "type": "string",
+                        "description": "Comprehensive, well-structured summary in German (Markdown) combining the pitch deck analysis and the web research"
+                    },
+                    "traffic_light_rationale": {
+                        "type": "string",
+                        "description": "Two to three sentences in German explaining the resulting traffic light"
+                    }
+                },
+                "required": ["triggered_flags", "summary", "traffic_light_rationale"]
+            }
+        }
+
+        red_flags_formatted = "\n".join([f"{number}. {flag}" for number, flag in enumerate(red_flags_list, 1)]) or "(keine)"
+        known_flags_formatted = "\n".join(f"- {flag}" for flag in known_triggered_flags) or "(keine)"
+
+        prompt = f"""Du bist ein kritischer VC-Analyst. Erledige auf Basis der folgenden Informationen zwei Aufgaben in einem Schritt.
+
+PITCH DECK ANALYSE (Prognose: {'Erfolg' if score_1 else 'Misserfolg'}):
+{pitch_deck_analysis}
+
+WEB-RECHERCHE (Prognose: {'Erfolg' if score_2 else 'Misserfolg'}):
+{web_research_analysis}
 
-                    reasoning_text = "\n".join(reasoning_parts)
+WETTBEWERBER-ANALYSE:
+{competitor_analysis}
 
-        print(f"Red Flag Check completed")
-        print(f"Triggered Flags: {triggered_flags}")
-        print(f"Reasoning: {reasoning_text[:200]}...")
+AUFGABE 1 - RED FLAGS: Prüfe, ob eine der folgenden Red Flags zutrifft:
+{red_flags_formatted}
 
-        return True, triggered_flags, reasoning_text
+1. Markiere eine Red Flag nur, wenn du konkrete Beweise aus den bereitgestellten Informationen hast
+2. Gib für jede zutreffende Red Flag spezifische Beweise an (auf Deutsch)
+3. Sei konservativ - markiere nur eindeutige Verstöße, keine Grenzfälle
+
+Bereits festgestellte Red Flags (nicht erneut prüfen, zählen aber für die Ampel):
+{known_flags_formatted}
+
+AUFGABE 2 - ZUSAMMENFASSUNG: Schreibe eine umfassende, gut strukturierte Zusammenfassung auf Deutsch, die Erkenntnisse aus Pitch Deck Analyse und Web-Recherche zusammenführt.
+
+AMPEL: Die Ampel ist ROT, sobald eine Red Flag getroffen ist. Sonst ist sie GRÜN, wenn beide Prognosen Erfolg lauten, ROT, wenn beide Misserfolg lauten, und GELB bei gemischten Prognosen. Begründe die daraus folgende Ampel in zwei bis drei Sätzen.
+
+Nutze das review_and_summary Tool, um alle Ergebnisse auf Deutsch zu melden.
+"""
+
+        response = client.messages.create(
+            model=model,
+            max_tokens=8192,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            tools=[review_tool],
+            tool_choice={"type": "tool", "name": "review_and_summary"}
+        )
+
+        # Getroffene Red Flags wie bei check_red_flags über die Nummer zuordnen (Fallback über den Text)
+        triggered_flags = {}
+        summary_text = ""
+        rationale = ""
+
+        for content in response.content:
+            if content.type == "tool_use" and content.name == "review_and_summary":
+                for item in content.input.get("triggered_flags", []):
+                    number = item.get("flag_number")
+                    if isinstance(number, int) and 1 <= number <= len(red_flags_list):
+                        flag = red_flags_list[number - 1]
+                    elif item.get("flag", "") in red_flags_list:
+                        flag = item["flag"]
+                    else:
+                        continue
+                    triggered_flags[flag] = item.get("reasoning", "")
+                summary_text = content.input.get("summary", "").strip()
+                rationale = content.input.get("traffic_light_rationale", "").strip()
+
+        if not summary_text:
+            return False, {}, "", "", "Error: Keine Zusammenfassung in der Antwort"
+
+        print(f"Review and summary completed ({len(red_flags_list)} flags)")
+        print(f"Triggered Flags: {list(triggered_flags)}")
+
+        return True, triggered_flags, summary_text, rationale, ""
 
     except Exception as e:
-        print(f"Error in red flag check: {e}")
+        print(f"Error in review and summary: {e}")
         import traceback
         traceback.print_exc()
-        return False, [], f"Error: {str(e)}"
\ No newline at end of file
+        return False, {}, "", "", f"Error: {str(e)}"
+
+
+def format_red_flag_reasoning(triggered_flags: dict) -> str:
+    """
+    Formatiert die getroffenen Red Flags als Markdown-Begründung.
+
+    Args:
+        triggered_flags (dict): Red Flag -> Begründung
+
+    Returns:
+        str: Markdown-Text (leer, falls keine Red Flag getroffen wurde)
+    """
+    if not triggered_flags:
+        return ""
+
+    reasoning_parts = ["**Getroffene Red Flags:**\n"]
+    for flag, reasoning in triggered_flags.items():
+        reasoning_parts.append(f"🚨 **{flag}**")
+        reasoning_parts.append(f"   {reasoning}\n")
+    return "\n".join(reasoning_parts)
+
+def build_chat_context(results: dict) -> str:
+    """
+    Erstellt den kompakten Analyse-Überblick für den Chat.
+
+    Details (Begründungen, Seiten, Quellen) kommen aus dem Retrieval-Index, daher enthält
+    der Überblick nur Ampel, Prognosen und getroffene Red Flags.
+
+    Args:
+        results (dict): Analyse-Ergebnisse aus dem Session State
+
+    Returns:
+        str: Analyse-Kontext für den System-Prompt
+    """
+    red_flags_context = ""
+    if results.get('red_flags') and results['red_flags'].get('triggered'):
+        red_flags_context = f"""
+        Red Flags: {len(results['red_flags']['triggered'])} K.O.-Kriterien getroffen ({', '.join(results['red_flags']['triggered'])})
+        WICHTIG: Die Bewertung wurde wegen Red Flags auf ROT gesetzt!
+        """
+
+    return f"""
+        Pitch Deck Analyse-Ergebnisse für {results['filename']}:
+
+        Gesamtbewertung: {results['final_prediction']}
+        {red_flags_context}
+        Pitch Deck Prognose: {'Erfolg' if results['pitch_deck']['prediction'] else 'Misserfolg'}
+        Web-Recherche Prognose: {'Erfolg' if results['web_research']['prediction'] else 'Misserfolg'}
+        """
+
+def answer_chat_question(client: anthropic.Anthropic = client, model: str = model, question: str = "", chat_history: list = [], analysis_context: str = "", retrieved_context: str = "", pdf_filename: str = ""):
+    """
+    Beantwortet eine Chat-Frage zu den Analyse-Ergebnissen.
+
+    Statt des kompletten PDFs werden nur die relevantesten Abschnitte aus dem lokalen
+    Retrieval-Index (mit Seitenangabe) und die letzten Chat-Nachrichten mitgeschickt.
+    Nur falls kein Abschnitt gefunden wurde (z.B. gescanntes PDF ohne Text), wird das PDF
+    wie bisher als Dokument angehängt.
+
+    Args:
+        client (anthropic.Anthropic): Anthropic API Client
+        model (str): Name des zu verwendenden Modells
+        question (str): Aktuelle Frage des Nutzers
+        chat_history (list): Bisheriger Chat-Verlauf (Liste von {"role", "content"}) ohne die aktuelle Frage
+        analysis_context (str): Kompakter Überblick über die Analyse (Ampel, Prognosen, Red Flags)
+        retrieved_context (str): Relevante Abschnitte aus dem Retrieval-Index
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner), nur für den Fallback
+
+    Returns:
+        Tuple[bool, str]: (Erfolg, Antwort)
+            - Erfolg: True wenn Antwort erfolgreich generiert
+            - Antwort: Antworttext inkl. Quellenliste (falls Web-Suche genutzt wurde)
+    """
+    try:
+        system_prompt = f"""Du bist ein hilfreicher VC-Analyst-Assistent. Beantworte Fragen zum Pitch Deck basierend auf dem folgenden Analyse-Kontext und den relevanten Auszügen.
+
+ANALYSE-KONTEXT:
+{analysis_context}
+
+RELEVANTE AUSZÜGE (mit Quelle bzw. Seitenangabe):
+{retrieved_context if retrieved_context else "Keine passenden Auszüge gefunden - nutze das angehängte Pitch Deck."}
+
+Gib bei Aussagen aus dem Deck die Seite an (z.B. "Seite 4"). Du hast auch Zugriff auf eine Web-Suche, um bei Bedarf zusätzliche Informationen zu finden. Antworte immer auf Deutsch."""
+
+        # Nur die letzten Nachrichten als Verlauf mitschicken
+        chat_messages = [{"role": msg["role"], "content": msg["content"]} for msg in chat_history]
+        # Der Verlauf muss mit einer Nutzer-Nachricht beginnen
+        while chat_messages and chat_messages[0]["role"] != "user":
+            chat_messages.pop(0)
+
+        question_content = question
+        if not retrieved_context and pdf_filename:
+            # Fallback: PDF anhängen, falls keine Auszüge verfügbar sind
+            with open("tmp/" + pdf_filename, 'rb') as f:
+                pdf_data = base64.standard_b64encode(f.read()).decode("utf-8")
+            question_content = [
+                {
+                    "type": "document",
+                    "source": {
+                        "type": "base64",
+                        "media_type": "application/pdf",
+                        "data": pdf_data
+                    }
+                },
+                {
+                    "type": "text",
+                    "text": question
+                }
+            ]
+        chat_messages.append({"role": "user", "content": question_content})
+
+        response = client.messages.create(
+            model=model,
+            max_tokens=8192,
+            system=system_prompt,
+            messages=chat_messages,
+            tools=[
+                {
+                    "type": "web_search_20250305",
+                    "name": "web_search"
+                }
+            ]
+        )
+
+        # Extrahiere Text aus Antwort und Quellen
+        assistant_message = ""
+        chat_sources = []
+
+        for content in response.content:
+            if content.type == "text":
+                assistant_message += content.text
+                # Extrahiere Zitate, falls verfügbar
+                if hasattr(content, 'citations') and content.citations:
+                    for citation in content.citations:
+                        if hasattr(citation, 'url'):
+                            chat_sources.append({
+                                'url': citation.url,
+                                'title': getattr(citation, 'title', citation.url)
+                            })
+
+        # Füge Quellen zur Nachricht hinzu, falls vorhanden
+        if chat_sources:
+            assistant_message += "\n\n**Quellen:**\n"
+            for i, source in enumerate(chat_sources, 1):
+                assistant_message += f"{i}. [{source['title']}]({source['url']})\n"
+
+        print(f"Chat usage: {response.usage.input_tokens} input tokens, {response.usage.output_tokens} output tokens")
+
+        return True, assistant_message
+
+    except Exception as e:
+        print(f"Error in chat: {e}")
+        return False, f"Fehler bei der Beantwortung: {str(e)}"
+
+def answer_portfolio_chat_question(client: anthropic.Anthropic = client, model: str = model, question: str = "", chat_history: list = [], tools: list = [], execute_tool=None, max_tool_rounds: int = 5):
+    """
+    Beantwortet eine Frage über alle gespeicherten Analysen mit lokal ausgeführten Tools.
+
+    Claude erhält nur die Tool-Definitionen und fordert die benötigten Daten selbst an
+    (tool_use); die Tools laufen lokal gegen den Analyse-Speicher und ihre kompakten Ergebnisse
+    gehen als tool_result zurück. Nach max_tool_rounds Runden muss Claude ohne weitere Tools antworten.
+
+    Args:
+        client (anthropic.Anthropic): Anthropic API Client
+        model (str): Name des zu verwendenden Modells
+        question (str): Aktuelle Frage des Nutzers
+        chat_history (list): Bisheriger Chat-Verlauf (Liste von {"role", "content"}) ohne die aktuelle Frage
+        tools (list): Tool-Definitionen (siehe portfolio_tools.PORTFOLIO_TOOLS)
+        execute_tool (callable): Führt ein Tool aus: (Name, Parameter) -> JSON-Text
+        max_tool_rounds (int): Maximale Anzahl Runden mit Tool-Aufrufen
+
+    Returns:
+        Tuple[bool, str, list]: (Erfolg, Antwort, ausgeführte Tool-Aufrufe als {"name", "input"})
+    """
+    tool_calls = []
+    try:
+        system_prompt = f"""Du bist ein hilfreicher VC-Analyst-Assistent mit Zugriff auf alle gespeicherten Pitch Deck Analysen des Fonds.
+
+Nutze die Tools, um die benötigten Daten abzufragen, statt zu raten. Heute ist der {datetime.now().date().isoformat()}; rechne relative Zeiträume (z.B. "dieses Quartal") in Datumsangaben für since/until um.
+Nenne Decks immer mit Dateiname und Analysedatum. Erfinde keine Decks oder Kennzahlen: Wenn die Tools nichts liefern, sage das. Antworte immer auf Deutsch."""
+
+        # Nur die letzten Nachrichten als Verlauf mitschicken (der Verlauf muss mit einer Nutzer-Nachricht beginnen)
+        messages = [{"role": msg["role"], "content": msg["content"]} for msg in chat_history]
+        while messages and messages[0]["role"] != "user":
+            messages.pop(0)
+        messages.append({"role": "user", "content": question})
+
+        input_tokens, output_tokens = 0, 0
+        for tool_round in range(max_tool_rounds + 1):
+            response = client.messages.create(
+                model=model,
+                max_tokens=4096,
+                system=system_prompt,
+                messages=messages,
+                tools=tools,
+                # In der letzten Runde keine Tools mehr, damit immer eine Antwort entsteht
+                tool_choice={"type": "auto"} if tool_round < max_tool_rounds else {"type": "none"}
+            )
+            input_tokens += response.usage.input_tokens
+            output_tokens += response.usage.output_tokens
+
+            tool_uses = [content for content in response.content if content.type == "tool_use"]
+            if response.stop_reason != "tool_use" or not tool_uses:
+                break
+
+            # Antwort des Assistenten inkl. tool_use-Blöcken übernehmen und die Tools lokal ausführen
+            messages.append({
+                "role": "assistant",
+                "content": [
+                    {"type": "text", "text": content.text} if content.type == "text"
+                    else {"type": "tool_use", "id": content.id, "name": content.name, "input": content.input}
+                    for content in response.content if content.type == "tool_use" or (content.type == "text" and content.text)
+                ]
+            })
+            tool_results = []
+            for tool_use in tool_uses:
+                tool_calls.append({"name": tool_use.name, "input": tool_use.input})
+                tool_results.append({
+                    "type": "tool_result",
+                    "tool_use_id": tool_use.id,
+                    "content": execute_tool(tool_use.name, tool_use.input)
+                })
+            messages.append({"role": "user", "content": tool_results})
+
+        assistant_message = "".join(content.text for content in response.content if content.type == "text")
+
+        print(f"Portfolio chat usage: {input_tokens} input tokens, {output_tokens} output tokens, {len(tool_calls)} tool calls")
+
+        return True, assistant_message, tool_calls
+
+    except Exception as e:
+        print(f"Error in portfolio chat: {e}")
+        return False, f"Fehler bei der Beantwortung: {str(e)}", tool_calls
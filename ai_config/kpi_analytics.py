@@ -0,0 +1,204 @@
+"""
+Spaltenorientierte KPI-Tabelle für Portfolio-Auswertungen.
+
+Die Kennzahlen aller analysierten Decks liegen als ein NumPy-Array pro Spalte im Speicher (float64,
+NaN = im Deck nicht genannt). Perzentile und Branchen-Kohorten werden vektorisiert über diese Spalten
+berechnet, ohne die gespeicherten Ergebnis-Blobs zu entpacken. Die Tabelle wird einmal aus der
+Datenbank geladen und danach bei jedem gespeicherten Lauf inkrementell ergänzt.
+"""
+
+#import von packages
+import threading
+import numpy as np
+
+from ai_config.config import KPI_FIELDS
+from ai_config.rules import DERIVED_KPI_FIELDS, kpi_value
+
+# Alle auswertbaren Kennzahlen (extrahiert und abgeleitet)
+KPI_COLUMNS = [*KPI_FIELDS, *DERIVED_KPI_FIELDS]
+
+
+def normalize_sector(sector: str) -> str:
+    """Vereinheitlicht Branchenbezeichnungen für die Kohortenbildung (z.B. " saas" -> "saas")."""
+    return " ".join((sector or "").split()).casefold()
+
+
+class KpiTable:
+    """
+    KPI-Spalten aller Decks (neuester Lauf pro Deck) mit vektorisierten Perzentil- und Kohorten-Auswertungen.
+
+    Die Spalten sind Arrow-/pandas-kompatibel (siehe to_columns). Die Instanz wird von allen
+    Streamlit-Sessions geteilt; Lesen und Ergänzen sind daher über ein gemeinsames Lock geschützt.
+    """
+
+    def __init__(self, rows: list = None):
+        """
+        Args:
+            rows (list): Tupel (analysis_id, deck_hash, sector, KPI-Werte in der Reihenfolge von KPI_FIELDS)
+        """
+        rows = rows or []
+        self._lock = threading.RLock()
+        self.analysis_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.deck_hashes = np.array([row[1] for row in rows], dtype=object)
+        self.sectors = np.array([normalize_sector(row[2]) for row in rows], dtype=object)
+        values = np.array([[np.nan if value is None else value for value in row[3:]] for row in rows], dtype=np.float64)
+        self.values = values.reshape(len(rows), len(KPI_FIELDS))
+
+    @classmethod
+    def from_store(cls, store):
+        """
+        Lädt die Tabelle aus dem Analyse-Speicher (nur die flachen KPI-Spalten).
+
+        Args:
+            store (AnalysisStore): Analyse-Speicher
+
+        Returns:
+            KpiTable: Geladene Tabelle
+        """
+        return cls(store.load_kpi_rows())
+
+    def __len__(self) -> int:
+        return len(self.analysis_ids)
+
+    def append(self, analysis_id: int, deck_hash: str, kpis: dict):
+        """
+        Ergänzt die Kennzahlen eines neu gespeicherten Laufs; ein älterer Lauf desselben Decks wird ersetzt.
+
+        Args:
+            analysis_id (int): ID des Laufs
+            deck_hash (str): SHA-256 Hash des Pitch Decks
+            kpis (dict): KPI-Datensatz des Laufs
+        """
+        kpis = kpis or {}
+        row = np.array([[np.nan if kpis.get(key) is None else kpis[key] for key in KPI_FIELDS]], dtype=np.float64)
+        with self._lock:
+            keep = self.deck_hashes != deck_hash
+            self.values = np.concatenate([self.values[keep], row])
+            self.analysis_ids = np.append(self.analysis_ids[keep], np.int64(analysis_id))
+            self.deck_hashes = np.append(self.deck_hashes[keep], np.array([deck_hash], dtype=object))
+            self.sectors = np.append(self.sectors[keep], np.array([normalize_sector(kpis.get('sector'))], dtype=object))
+
+    def column(self, key: str) -> np.ndarray:
+        """
+        Liefert eine Kennzahl als Spalte (abgeleitete Kennzahlen werden vektorisiert berechnet).
+
+        Args:
+            key (str): Feld aus KPI_FIELDS oder DERIVED_KPI_FIELDS
+
+        Returns:
+            np.ndarray: Werte pro Deck (NaN = unbekannt)
+        """
+        with self._lock:
+            if key == "ltv_cac_ratio":
+                ltv, cac = self.column("ltv"), self.column("cac")
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    return np.where(cac > 0, ltv / cac, np.nan)
+            return self.values[:, list(KPI_FIELDS).index(key)]
+
+    def to_columns(self) -> dict:
+        """
+        Gibt die Tabelle als Dict von Spalten zurück (direkt nutzbar mit pyarrow.table oder pandas.DataFrame).
+
+        Returns:
+            dict: Spaltenname -> np.ndarray
+        """
+        with self._lock:
+            columns = {'analysis_id': self.analysis_ids, 'deck_hash': self.deck_hashes, 'sector': self.sectors}
+            columns.update({key: self.column(key) for key in KPI_COLUMNS})
+            return columns
+
+    def _mask(self, sector: str = None, exclude_analysis_id: int = None) -> np.ndarray:
+        """Filter auf eine Branche und/oder ohne einen bestimmten Lauf (z.B. das aktuelle Deck)."""
+        mask = np.ones(len(self), dtype=bool)
+        if sector is not None:
+            mask &= self.sectors == normalize_sector(sector)
+        if exclude_analysis_id is not None:
+            mask &= self.analysis_ids != exclude_analysis_id
+        return mask
+
+    def percentile_rank(self, key: str, value: float, sector: str = None, exclude_analysis_id: int = None) -> tuple:
+        """
+        Bestimmt, wo ein Wert innerhalb der bisherigen Decks liegt.
+
+        Args:
+            key (str): Kennzahl
+            value (float): Wert des aktuellen Decks
+            sector (str): Optional, nur Decks dieser Branche
+            exclude_analysis_id (int): Optional, Lauf, der nicht mitgezählt wird
+
+        Returns:
+            tuple: (Perzentil 0-100 oder None, Median oder None, Anzahl Vergleichswerte)
+        """
+        with self._lock:
+            column = self.column(key)
+            known = column[self._mask(sector, exclude_analysis_id) & ~np.isnan(column)]
+        if value is None or len(known) == 0:
+            return None, (float(np.median(known)) if len(known) else None), len(known)
+        rank = (np.count_nonzero(known < value) + 0.5 * np.count_nonzero(known == value)) / len(known) * 100
+        return float(rank), float(np.median(known)), len(known)
+
+    def cohort_summary(self, key: str, exclude_analysis_id: int = None) -> list:
+        """
+        Verteilung einer Kennzahl pro Branche (Quartile).
+
+        Args:
+            key (str): Kennzahl
+            exclude_analysis_id (int): Optional, Lauf, der nicht mitgezählt wird
+
+        Returns:
+            list: Dicts {"sector", "count", "p25", "median", "p75"}, größte Kohorte zuerst
+        """
+        with self._lock:
+            column = self.column(key)
+            mask = self._mask(exclude_analysis_id=exclude_analysis_id) & ~np.isnan(column)
+            values, sectors = column[mask], self.sectors[mask]
+        if len(values) == 0:
+            return []
+
+        # Nach Branche sortieren und die Gruppen in einem Schritt bilden
+        sector_names, inverse, counts = np.unique(sectors.astype(str), return_inverse=True, return_counts=True)
+        order = np.argsort(inverse, kind="stable")
+        groups = np.split(values[order], np.cumsum(counts)[:-1])
+
+        summary = []
+        for sector, count, group in zip(sector_names, counts, groups):
+            p25, median, p75 = np.percentile(group, [25, 50, 75])
+            summary.append({
+                'sector': str(sector) or "(unbekannt)",
+                'count': int(count),
+                'p25': float(p25),
+                'median': float(median),
+                'p75': float(p75)
+            })
+        return sorted(summary, key=lambda row: row['count'], reverse=True)
+
+    def compare(self, kpis: dict, exclude_analysis_id: int = None) -> list:
+        """
+        Vergleicht die Kennzahlen eines Decks mit allen bisherigen Decks und mit seiner Branche.
+
+        Args:
+            kpis (dict): KPI-Datensatz des aktuellen Decks
+            exclude_analysis_id (int): Lauf des aktuellen Decks (wird nicht mitgezählt)
+
+        Returns:
+            list: Dicts pro Kennzahl mit Wert, Perzentil/Median gesamt und Perzentil/Median in der Branche
+        """
+        sector = (kpis or {}).get('sector') or None
+        comparison = []
+        for key in KPI_COLUMNS:
+            value = kpi_value(kpis, key)
+            overall_rank, overall_median, overall_count = self.percentile_rank(key, value, exclude_analysis_id=exclude_analysis_id)
+            sector_rank, sector_median, sector_count = (
+                self.percentile_rank(key, value, sector=sector, exclude_analysis_id=exclude_analysis_id) if sector else (None, None, 0)
+            )
+            comparison.append({
+                'kpi': key,
+                'value': value,
+                'overall_rank': overall_rank,
+                'overall_median': overall_median,
+                'overall_count': overall_count,
+                'sector_rank': sector_rank,
+                'sector_median': sector_median,
+                'sector_count': sector_count
+            })
+        return comparison
@@ -6,141 +6,241 @@ Enthält Funktionen für:
 - PDF-Generierung mit schönem Layout
 - Executive Summary Formatierung
 - Ampel-Bewertung und Key Findings
+- Cache der fertigen PDFs (Schlüssel: Hash über den Inhalt der Ergebnisse)
+- Portfolio-Report über beliebig viele Decks (wird seitenweise auf die Festplatte geschrieben)
 """
 #import packages
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from collections import OrderedDict
 from datetime import datetime
+import copy
+import hashlib
 import io
+import json
 import re
-
-def clean_and_simplify_text(text: str) -> str:
+import tempfile
+import threading
+
+# Ergebnis-Felder, die in die Executive Summary einfließen (nur diese bestimmen den Cache-Schlüssel)
+PDF_RESULT_KEYS = ['filename', 'final_prediction', 'summary', 'pitch_deck', 'web_research', 'competitor_analysis', 'red_flags', 'email']
+
+# Maximale Anzahl gecachter PDFs im Speicher
+PDF_CACHE_SIZE = 32
+
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+
+# Reihenfolge der Ampel im Portfolio-Ranking (grün zuerst)
+TRAFFIC_LIGHT_RANK = {'green': 0, 'yellow': 1, 'red': 2}
+
+# Ampel -> (Kurztext, Hintergrundfarbe) für die Übersichtstabelle im Portfolio-Report
+TRAFFIC_LIGHT_CELLS = {
+    'green': ('GRÜN', colors.HexColor('#d1fae5')),
+    'yellow': ('GELB', colors.HexColor('#fef3c7')),
+    'red': ('ROT', colors.HexColor('#fee2e2'))
+}
+
+# Zeilen pro Übersichtstabelle (lange Portfolios werden auf mehrere kleine Tabellen verteilt)
+PORTFOLIO_TABLE_ROWS = 40
+
+# Styles werden einmalig beim Import erstellt und für alle PDFs wiederverwendet
+SAMPLE_STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=SAMPLE_STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#2E4057'),
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=SAMPLE_STYLES['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#667eea'),
+    spaceAfter=12,
+    spaceBefore=20,
+    fontName='Helvetica-Bold'
+)
+
+NORMAL_STYLE = ParagraphStyle(
+    'CustomNormal',
+    parent=SAMPLE_STYLES['Normal'],
+    fontSize=11,
+    textColor=colors.HexColor('#333333'),
+    spaceAfter=12,
+    alignment=TA_JUSTIFY,
+    leading=16
+)
+
+WARNING_STYLE = ParagraphStyle(
+    'Warning',
+    parent=NORMAL_STYLE,
+    fontSize=12,
+    textColor=colors.HexColor('#ef4444'),
+    backColor=colors.HexColor('#fee2e2'),
+    borderColor=colors.HexColor('#ef4444'),
+    borderWidth=1,
+    borderPadding=10,
+    fontName='Helvetica-Bold'
+)
+
+RED_FLAG_STYLE = ParagraphStyle(
+    'RedFlag',
+    parent=NORMAL_STYLE,
+    fontSize=11,
+    textColor=colors.HexColor('#ef4444'),
+    leftIndent=20
+)
+
+FOOTER_STYLE = ParagraphStyle(
+    'Footer',
+    parent=SAMPLE_STYLES['Normal'],
+    fontSize=8,
+    textColor=colors.grey,
+    alignment=TA_CENTER
+)
+
+def _assessment_style(color_hex: str) -> ParagraphStyle:
     """
-    Bereinigt Text von Markdown und vereinfacht ihn für PDF-Ausgabe.
-
-    Args:
-        text (str): Text mit möglicherweise Markdown-Formatierung
-
-    Returns:
-        str: Bereinigter, ReportLab-kompatibler Text
+    Erstellt den Style für die Ampel-Bewertung in der jeweiligen Farbe.
     """
-    if not text:
-        return ""
-
-    # Entferne führende/trailing Whitespace
-    text = text.strip()
-
-    # Entferne Code-Blöcke und Inline-Code
-    text = re.sub(r'```[\s\S]*?```', '', text)
-    text = re.sub(r'`[^`]+`', '', text)
+    return ParagraphStyle(
+        'Assessment',
+        parent=NORMAL_STYLE,
+        fontSize=14,
+        textColor=colors.HexColor(color_hex),
+        fontName='Helvetica-Bold',
+        alignment=TA_CENTER,
+        spaceAfter=20
+    )
 
-    # Entferne Markdown-Tabellen (| col1 | col2 |)
-    # Tabellen werden zu einfachen Listen konvertiert
-    lines = text.split('\n')
+# Ampel -> (Text, Style)
+ASSESSMENT_STYLES = {
+    'green': ('🟢 GRÜN - POSITIV', _assessment_style('#10b981')),
+    'yellow': ('🟡 GELB - GEMISCHT', _assessment_style('#f59e0b')),
+    'red': ('🔴 ROT - NEGATIV', _assessment_style('#ef4444'))
+}
+
+# Vorkompilierte Muster für die Markdown-Bereinigung
+CODE_BLOCK_PATTERN = re.compile(r'```[\s\S]*?```')
+INLINE_CODE_PATTERN = re.compile(r'`[^`]+`')
+TABLE_ROW_PATTERN = re.compile(r'^\s*\|.*\|\s*$')
+TABLE_SEPARATOR_PATTERN = re.compile(r'^\s*\|[\s\-:]+\|\s*$')
+TABLE_DASH_CELL_PATTERN = re.compile(r'^[\-:]+$')
+LINK_PATTERN = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+HEADER_PATTERN = re.compile(r'^#{1,6}\s+', flags=re.MULTILINE)
+BULLET_PATTERN = re.compile(r'^[-*+•]\s+')
+BOLD_STAR_PATTERN = re.compile(r'\*\*([^\*]+)\*\*')
+BOLD_UNDERSCORE_PATTERN = re.compile(r'__([^_]+)__')
+
+
+def _convert_table_rows(text: str) -> str:
+    """
+    Konvertiert Markdown-Tabellenzeilen zu Bullet-Points und entfernt Trennzeilen.
+    """
     cleaned_lines = []
-    in_table = False
 
-    for line in lines:
+    for line in text.split('\n'):
         # Erkenne Tabellenzeilen (beginnen und enden mit |)
-        if re.match(r'^\s*\|.*\|\s*$', line):
-            # Ist das eine Trennzeile? (|---|---| oder |:---|:---|)
-            if re.match(r'^\s*\|[\s\-:]+\|\s*$', line):
-                in_table = True
-                continue  # Überspringe Trennzeilen komplett
-
-            # Konvertiere Tabellen-Zeile zu Bullet-Point
-            # Extrahiere Zellen und entferne leere
-            cells = [cell.strip() for cell in line.split('|') if cell.strip()]
+        if TABLE_ROW_PATTERN.match(line):
+            # Trennzeilen (|---|---| oder |:---|:---|) komplett überspringen
+            if TABLE_SEPARATOR_PATTERN.match(line):
+                continue
 
-            # Filtere Zellen die nur aus Bindestrichen bestehen
-            cells = [cell for cell in cells if not re.match(r'^[\-:]+$', cell)]
+            # Extrahiere Zellen, entferne leere und solche nur aus Bindestrichen
+            cells = [cell.strip() for cell in line.split('|') if cell.strip()]
+            cells = [cell for cell in cells if not TABLE_DASH_CELL_PATTERN.match(cell)]
 
             if cells:
-                # Erste Zelle fett, Rest normal
                 if len(cells) > 1:
                     cleaned_lines.append(f"• {cells[0]}: {', '.join(cells[1:])}")
                 else:
                     cleaned_lines.append(f"• {cells[0]}")
-            continue
         else:
-            in_table = False
             cleaned_lines.append(line)
 
-    text = '\n'.join(cleaned_lines)
+    return '\n'.join(cleaned_lines)
 
-    # Entferne verbleibende Pipe-Zeichen
-    text = text.replace('|', '')
 
-    # Entferne geschweifte Klammern {} (oft aus JSON oder Template-Syntax)
-    text = text.replace('{', '')
-    text = text.replace('}', '')
+def clean_and_simplify_text(text: str) -> str:
+    """
+    Bereinigt Text von Markdown und vereinfacht ihn für PDF-Ausgabe.
 
-    # Entferne eckige Klammern [] (oft aus Markdown-Links)
-    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)  # [text](url) -> text
-    text = text.replace('[', '')
-    text = text.replace(']', '')
+    Alle Muster sind vorkompiliert und laufen nur, wenn das jeweilige Markdown-Zeichen im Text
+    überhaupt vorkommt. Die Formatierung erfolgt in einem einzigen Durchlauf über die Zeilen.
 
-    # Escape XML-Zeichen
-    text = text.replace('&', '&amp;')
-    text = text.replace('<', '&lt;')
-    text = text.replace('>', '&gt;')
+    Args:
+        text (str): Text mit möglicherweise Markdown-Formatierung
 
-    # Entferne Header-Markierungen (###, ##, #)
-    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+    Returns:
+        str: Bereinigter, ReportLab-kompatibler Text
+    """
+    if not text:
+        return ""
 
-    # Verarbeite Text zeilenweise für Formatierung
-    lines = text.split('\n')
-    converted_lines = []
+    # Entferne führende/trailing Whitespace sowie Code-Blöcke und Inline-Code
+    text = text.strip()
+    if '`' in text:
+        text = CODE_BLOCK_PATTERN.sub('', text)
+        text = INLINE_CODE_PATTERN.sub('', text)
+
+    # Markdown-Tabellen werden zu einfachen Listen konvertiert
+    if '|' in text:
+        text = _convert_table_rows(text)
+
+    # Entferne Pipes und geschweifte Klammern, Links [text](url) -> text,
+    # restliche eckige Klammern und escape XML-Zeichen
+    text = text.replace('|', '').replace('{', '').replace('}', '')
+    if '[' in text:
+        text = LINK_PATTERN.sub(r'\1', text)
+    text = text.replace('[', '').replace(']', '')
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
 
-    for line in lines:
-        # Überspringe leere Zeilen (werden später wieder hinzugefügt)
-        original_line = line
+    # Entferne Header-Markierungen (###, ##, #)
+    if '#' in text:
+        text = HEADER_PATTERN.sub('', text)
 
-        # Entferne alle führenden Leerzeichen/Tabs (Einrückungen)
+    # Ein Durchlauf über alle Zeilen: Einrückung, Bullet-Points, Fettdruck, Emphasis-Marker
+    converted_lines = []
+    for line in text.split('\n'):
         line = line.lstrip()
+        if not line:
+            continue
 
         # Konvertiere Bullet-Points BEVOR wir * entfernen
-        if re.match(r'^[-*+•]\s+', line):
-            line = re.sub(r'^[-*+•]\s+', '• ', line)
+        if line[0] in '-*+•':
+            line = BULLET_PATTERN.sub('• ', line, count=1)
 
-        # Markdown-Formatierung auf der Zeile
         # Konvertiere Bold-Text (**text** und __text__)
-        line = re.sub(r'\*\*([^\*]+)\*\*', r'<b>\1</b>', line)
-        line = re.sub(r'__([^_]+)__', r'<b>\1</b>', line)
-
-        # Entferne restliche * und _ für Italic (machen wir einfach weg)
-        line = re.sub(r'\*([^\*]+)\*', r'\1', line)
-        line = re.sub(r'_([^_]+)_', r'\1', line)
+        if '**' in line:
+            line = BOLD_STAR_PATTERN.sub(r'<b>\1</b>', line)
+        if '__' in line:
+            line = BOLD_UNDERSCORE_PATTERN.sub(r'<b>\1</b>', line)
 
-        # Entferne übrig gebliebene einzelne * und _
-        line = line.replace('*', '')
-        line = line.replace('_', '')
+        # Italic und übrige * und _ werden einfach entfernt
+        line = line.replace('*', '').replace('_', '')
 
         # Nur nicht-leere Zeilen hinzufügen
         if line.strip():
             converted_lines.append(line)
 
-    text = '\n'.join(converted_lines)
-
-    # Ersetze mehrfache Leerzeilen
-    text = re.sub(r'\n{3,}', '\n\n', text)
-
-    # Konvertiere Zeilenumbrüche zu HTML
-    text = text.replace('\n\n', '<br/><br/>')
-    text = text.replace('\n', '<br/>')
+    # Zeilen enthalten keine Leerzeilen mehr, daher genügt ein einfacher Zeilenumbruch
+    return '<br/>'.join(converted_lines).strip()
 
-    # Bereinige mehrfache <br/> Tags
-    text = re.sub(r'(<br/>){3,}', '<br/><br/>', text)
-
-    # Entferne führende/trailing <br/> Tags
-    text = re.sub(r'^(<br/>)+', '', text)
-    text = re.sub(r'(<br/>)+$', '', text)
-
-    return text.strip()
+def _startup_name(results: dict) -> str:
+    """
+    Leitet den Anzeigenamen des Startups aus dem Dateinamen des Pitch Decks ab.
+    """
+    return results.get('filename', 'Unknown').replace('.pdf', '').replace('_', ' ').title()
 
 def generate_executive_summary_pdf(results: dict, filename: str = "executive_summary.pdf"):
     """
@@ -169,47 +269,13 @@ def generate_executive_summary_pdf(results: dict, filename: str = "executive_sum
     # Sammle alle Story-Elemente
     story = []
 
-    # Styles
-    styles = getSampleStyleSheet()
-
-    # Custom Styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#2E4057'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#667eea'),
-        spaceAfter=12,
-        spaceBefore=20,
-        fontName='Helvetica-Bold'
-    )
-
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=12,
-        alignment=TA_JUSTIFY,
-        leading=16
-    )
-
     # Header
-    story.append(Paragraph("VC PITCH DECK ANALYSE", title_style))
-    story.append(Paragraph("Executive Summary", styles['Heading2']))
+    story.append(Paragraph("VC PITCH DECK ANALYSE", TITLE_STYLE))
+    story.append(Paragraph("Executive Summary", SAMPLE_STYLES['Heading2']))
     story.append(Spacer(1, 0.3*inch))
 
     # Metadaten-Tabelle mit verbessertem Styling
-    startup_name = results.get('filename', 'Unknown').replace('.pdf', '').replace('_', ' ').title()
+    startup_name = _startup_name(results)
     date_str = datetime.now().strftime("%d.%m.%Y")
 
     meta_data = [
@@ -247,116 +313,79 @@ def generate_executive_summary_pdf(results: dict, filename: str = "executive_sum
     story.append(Spacer(1, 0.5*inch))
 
     # Gesamtbewertung (Ampel)
-    story.append(Paragraph("Gesamtbewertung", heading_style))
+    story.append(Paragraph("Gesamtbewertung", HEADING_STYLE))
 
     final_prediction = results.get('final_prediction', 'yellow')
-    color_mapping = {
-        'green': ('🟢 GRÜN - POSITIV', colors.HexColor('#10b981')),
-        'yellow': ('🟡 GELB - GEMISCHT', colors.HexColor('#f59e0b')),
-        'red': ('🔴 ROT - NEGATIV', colors.HexColor('#ef4444'))
-    }
-
-    assessment_text, assessment_color = color_mapping.get(final_prediction, color_mapping['yellow'])
-
-    assessment_style = ParagraphStyle(
-        'Assessment',
-        parent=normal_style,
-        fontSize=14,
-        textColor=assessment_color,
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
+    assessment_text, assessment_style = ASSESSMENT_STYLES.get(final_prediction, ASSESSMENT_STYLES['yellow'])
 
     story.append(Paragraph(assessment_text, assessment_style))
 
     # Red Flags Warnung (falls vorhanden)
     if results.get('red_flags') and results['red_flags'].get('triggered'):
-        warning_style = ParagraphStyle(
-            'Warning',
-            parent=normal_style,
-            fontSize=12,
-            textColor=colors.HexColor('#ef4444'),
-            backColor=colors.HexColor('#fee2e2'),
-            borderColor=colors.HexColor('#ef4444'),
-            borderWidth=1,
-            borderPadding=10,
-            fontName='Helvetica-Bold'
-        )
-
         red_flags = results['red_flags']['triggered']
         warning_text = f"⚠️ WARNUNG: {len(red_flags)} K.O.-Kriterium(en) getroffen!"
-        story.append(Paragraph(warning_text, warning_style))
+        story.append(Paragraph(warning_text, WARNING_STYLE))
         story.append(Spacer(1, 0.3*inch))
 
     # Zusammenfassung
-    story.append(Paragraph("Zusammenfassung", heading_style))
+    story.append(Paragraph("Zusammenfassung", HEADING_STYLE))
     summary_text = results.get('summary', 'Keine Zusammenfassung verfügbar.')
     summary_clean = clean_and_simplify_text(summary_text)
-    story.append(Paragraph(summary_clean, normal_style))
+    story.append(Paragraph(summary_clean, NORMAL_STYLE))
     story.append(Spacer(1, 0.3*inch))
 
     # Detaillierte Ergebnisse
-    story.append(Paragraph("Detaillierte Bewertungen", heading_style))
+    story.append(Paragraph("Detaillierte Bewertungen", HEADING_STYLE))
 
     # Pitch Deck Analyse
     pitch_prediction = results.get('pitch_deck', {}).get('prediction', False)
     pitch_emoji = "✅ Erfolg" if pitch_prediction else "❌ Misserfolg"
 
-    story.append(Paragraph(f"<b>Pitch Deck Analyse:</b> {pitch_emoji}", normal_style))
+    story.append(Paragraph(f"<b>Pitch Deck Analyse:</b> {pitch_emoji}", NORMAL_STYLE))
     pitch_reasoning = results.get('pitch_deck', {}).get('reasoning', '')
     if pitch_reasoning:
         pitch_clean = clean_and_simplify_text(pitch_reasoning)
-        story.append(Paragraph(pitch_clean, normal_style))
+        story.append(Paragraph(pitch_clean, NORMAL_STYLE))
     story.append(Spacer(1, 0.2*inch))
 
     # Web-Recherche
     web_prediction = results.get('web_research', {}).get('prediction', False)
     web_emoji = "✅ Erfolg" if web_prediction else "❌ Misserfolg"
 
-    story.append(Paragraph(f"<b>Web-Recherche:</b> {web_emoji}", normal_style))
+    story.append(Paragraph(f"<b>Web-Recherche:</b> {web_emoji}", NORMAL_STYLE))
     web_reasoning = results.get('web_research', {}).get('reasoning', '')
     if web_reasoning:
         web_clean = clean_and_simplify_text(web_reasoning)
-        story.append(Paragraph(web_clean, normal_style))
+        story.append(Paragraph(web_clean, NORMAL_STYLE))
     story.append(Spacer(1, 0.2*inch))
 
     # Wettbewerber-Screening (falls vorhanden)
     if results.get('competitor_analysis'):
-        story.append(Paragraph("<b>Wettbewerber-Screening:</b>", normal_style))
+        story.append(Paragraph("<b>Wettbewerber-Screening:</b>", NORMAL_STYLE))
         competitor_text = results['competitor_analysis'].get('analysis', '')
         if competitor_text:
             competitor_clean = clean_and_simplify_text(competitor_text)
-            story.append(Paragraph(competitor_clean, normal_style))
+            story.append(Paragraph(competitor_clean, NORMAL_STYLE))
         story.append(Spacer(1, 0.2*inch))
 
     # Red Flags Details (falls vorhanden)
     if results.get('red_flags') and results['red_flags'].get('triggered'):
         story.append(PageBreak())
-        story.append(Paragraph("K.O.-Kriterien Details", heading_style))
-
-        red_flag_style = ParagraphStyle(
-            'RedFlag',
-            parent=normal_style,
-            fontSize=11,
-            textColor=colors.HexColor('#ef4444'),
-            leftIndent=20
-        )
+        story.append(Paragraph("K.O.-Kriterien Details", HEADING_STYLE))
 
         red_flag_text = results['red_flags'].get('reasoning', '')
         red_flag_clean = clean_and_simplify_text(red_flag_text)
-        story.append(Paragraph(red_flag_clean, red_flag_style))
+        story.append(Paragraph(red_flag_clean, RED_FLAG_STYLE))
+
+    # Generierte Antwort-E-Mail (falls vorhanden)
+    if results.get('email'):
+        story.append(Paragraph("Antwort-E-Mail (Entwurf)", HEADING_STYLE))
+        story.append(Paragraph(f"<b>Betreff:</b> {clean_and_simplify_text(results['email'].get('subject', ''))}", NORMAL_STYLE))
+        story.append(Paragraph(clean_and_simplify_text(results['email'].get('body', '')), NORMAL_STYLE))
 
     # Footer
     story.append(Spacer(1, 0.5*inch))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph("Generiert mit VC Pitch Deck Analysator | Powered by Claude AI", footer_style))
+    story.append(Paragraph("Generiert mit VC Pitch Deck Analysator | Powered by Claude AI", FOOTER_STYLE))
 
     # Baue PDF
     doc.build(story)
@@ -366,3 +395,281 @@ def generate_executive_summary_pdf(results: dict, filename: str = "executive_sum
     buffer.close()
 
     return pdf_bytes
+
+
+def compute_results_hash(results: dict) -> str:
+    """
+    Berechnet einen Hash über alle Ergebnis-Felder, die in die Executive Summary einfließen.
+
+    Das Analysedatum ist Teil des Schlüssels, da es im PDF ausgegeben wird.
+
+    Args:
+        results (dict): Dictionary mit allen Analyse-Ergebnissen
+
+    Returns:
+        str: SHA-256 Hash (hex)
+    """
+    relevant = {key: results.get(key) for key in PDF_RESULT_KEYS}
+    relevant['date'] = datetime.now().strftime("%d.%m.%Y")
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def snapshot_pdf_results(results: dict) -> dict:
+    """
+    Tiefe Kopie der Ergebnis-Felder der Executive Summary.
+
+    apply_weights ändert z.B. results['pitch_deck'] direkt, daher erhält ein PDF-Build im Hintergrund
+    eine eigene Kopie statt einer Referenz auf die Session-Ergebnisse.
+
+    Args:
+        results (dict): Dictionary mit allen Analyse-Ergebnissen
+
+    Returns:
+        dict: Unabhängige Kopie aller vorhandenen Felder aus PDF_RESULT_KEYS
+    """
+    return {key: copy.deepcopy(results[key]) for key in PDF_RESULT_KEYS if key in results}
+
+
+def get_cached_summary_pdf(results: dict):
+    """
+    Liefert ein bereits erzeugtes PDF für genau diese Ergebnisse, ohne es neu zu erzeugen.
+
+    Args:
+        results (dict): Dictionary mit allen Analyse-Ergebnissen
+
+    Returns:
+        bytes oder None: PDF-Bytes falls im Cache vorhanden, sonst None
+    """
+    key = compute_results_hash(results)
+    with _pdf_cache_lock:
+        if key in _pdf_cache:
+            _pdf_cache.move_to_end(key)
+            return _pdf_cache[key]
+    return None
+
+
+def get_executive_summary_pdf(results: dict) -> bytes:
+    """
+    Liefert die Executive Summary als PDF und erzeugt sie nur, wenn sich die Ergebnisse geändert haben.
+
+    Wird direkt nach dem Speichern der Ergebnisse in einem Hintergrund-Thread aufgerufen,
+    sodass der Download-Button das PDF danach sofort ausliefern kann.
+
+    Args:
+        results (dict): Dictionary mit allen Analyse-Ergebnissen
+
+    Returns:
+        bytes: PDF als Bytes-Stream für Download
+    """
+    pdf_bytes = get_cached_summary_pdf(results)
+    if pdf_bytes is not None:
+        return pdf_bytes
+
+    key = compute_results_hash(results)
+    pdf_bytes = generate_executive_summary_pdf(results)
+
+    with _pdf_cache_lock:
+        _pdf_cache[key] = pdf_bytes
+        # Älteste Einträge verwerfen
+        while len(_pdf_cache) > PDF_CACHE_SIZE:
+            _pdf_cache.popitem(last=False)
+
+    print(f"Executive summary PDF generated ({len(pdf_bytes)} bytes)")
+    return pdf_bytes
+
+
+def _escape(text: str) -> str:
+    """
+    Escaped XML-Zeichen für ReportLab Paragraphs.
+    """
+    return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _portfolio_row(results: dict) -> dict:
+    """
+    Erstellt die kompakte Ranking-Zeile eines Decks (nur diese Zeilen bleiben für die Übersicht im Speicher).
+    """
+    return {
+        'name': _startup_name(results),
+        'final_prediction': results.get('final_prediction', 'yellow'),
+        'red_flags': len((results.get('red_flags') or {}).get('triggered') or []),
+        'pitch_deck': bool((results.get('pitch_deck') or {}).get('prediction')),
+        'web_research': bool((results.get('web_research') or {}).get('prediction')),
+        'date': results.get('date', '')
+    }
+
+
+def _portfolio_rank_key(row: dict) -> tuple:
+    """
+    Sortierschlüssel für das Portfolio-Ranking: Ampel, dann Anzahl Red Flags, dann positive Einzelbewertungen.
+    """
+    return (
+        TRAFFIC_LIGHT_RANK.get(row['final_prediction'], 1),
+        row['red_flags'],
+        -(int(row['pitch_deck']) + int(row['web_research'])),
+        row['name'].lower()
+    )
+
+
+def _overview_tables(rows: list) -> list:
+    """
+    Erstellt die Ranking-Übersicht, aufgeteilt auf Tabellen mit je PORTFOLIO_TABLE_ROWS Zeilen.
+    """
+    header = ["#", "Startup", "Ampel", "Red Flags", "Pitch Deck", "Web-Recherche", "Datum"]
+    flowables = []
+
+    for start in range(0, len(rows), PORTFOLIO_TABLE_ROWS):
+        data = [header]
+        table_style = [
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (2, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#e0e7ff')),
+            ('LINEBELOW', (0, 0), (-1, -2), 0.5, colors.HexColor('#e0e7ff')),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ]
+
+        for offset, row in enumerate(rows[start:start + PORTFOLIO_TABLE_ROWS], 1):
+            light_text, light_color = TRAFFIC_LIGHT_CELLS.get(row['final_prediction'], TRAFFIC_LIGHT_CELLS['yellow'])
+            data.append([
+                str(start + offset),
+                Paragraph(_escape(row['name']), SAMPLE_STYLES['BodyText']),
+                light_text,
+                str(row['red_flags']) if row['red_flags'] else "-",
+                "Erfolg" if row['pitch_deck'] else "Misserfolg",
+                "Erfolg" if row['web_research'] else "Misserfolg",
+                _escape(row['date'])
+            ])
+            table_style.append(('BACKGROUND', (2, offset), (2, offset), light_color))
+
+        table = Table(data, colWidths=[1*cm, 5.5*cm, 1.8*cm, 1.8*cm, 2.2*cm, 2.5*cm, 2.2*cm], repeatRows=1)
+        table.setStyle(TableStyle(table_style))
+        flowables.append(table)
+        flowables.append(Spacer(1, 0.3*inch))
+
+    return flowables
+
+
+def _deck_section(results: dict, rank: int) -> list:
+    """
+    Erstellt den Abschnitt eines einzelnen Decks im Portfolio-Report (Ampel, Red Flags, Zusammenfassung).
+    """
+    section = [Paragraph(f"{rank}. {_escape(_startup_name(results))}", HEADING_STYLE)]
+
+    assessment_text, assessment_style = ASSESSMENT_STYLES.get(results.get('final_prediction', 'yellow'), ASSESSMENT_STYLES['yellow'])
+    section.append(Paragraph(assessment_text, assessment_style))
+
+    pitch_emoji = "✅ Erfolg" if (results.get('pitch_deck') or {}).get('prediction') else "❌ Misserfolg"
+    web_emoji = "✅ Erfolg" if (results.get('web_research') or {}).get('prediction') else "❌ Misserfolg"
+    section.append(Paragraph(f"<b>Pitch Deck Analyse:</b> {pitch_emoji} &nbsp;&nbsp; <b>Web-Recherche:</b> {web_emoji}", NORMAL_STYLE))
+
+    triggered = (results.get('red_flags') or {}).get('triggered') or []
+    if triggered:
+        section.append(Paragraph(f"⚠️ WARNUNG: {len(triggered)} K.O.-Kriterium(en) getroffen!", WARNING_STYLE))
+        for flag in triggered:
+            section.append(Paragraph(f"• {_escape(flag)}", RED_FLAG_STYLE))
+
+    summary_clean = clean_and_simplify_text(results.get('summary', '')) or 'Keine Zusammenfassung verfügbar.'
+    section.append(Paragraph(summary_clean, NORMAL_STYLE))
+    section.append(Spacer(1, 0.3*inch))
+    return section
+
+
+def _draw_portfolio_footer(canvas, doc):
+    """
+    Zeichnet Fußzeile mit Seitenzahl auf jede Seite des Portfolio-Reports.
+    """
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.grey)
+    canvas.drawCentredString(A4[0] / 2, 1*cm, f"VC Pitch Deck Analysator | Portfolio Report | Seite {doc.page}")
+    canvas.restoreState()
+
+
+def _stream_flowables(doc: BaseDocTemplate, flowables: list):
+    """
+    Setzt Flowables direkt in das bereits gestartete Dokument (wie BaseDocTemplate.build, aber abschnittsweise).
+    """
+    while flowables:
+        doc.clean_hanging()
+        doc.handle_flowable(flowables)
+
+
+def generate_portfolio_report_pdf(results_iter, output_path: str, title: str = "Portfolio Report") -> int:
+    """
+    Generiert einen Portfolio-Report über beliebig viele analysierte Pitch Decks.
+
+    Die Ergebnisse werden im ersten Durchlauf in eine temporäre Datei ausgelagert; im Speicher
+    bleiben nur die kompakten Ranking-Zeilen. Danach wird das PDF abschnittsweise aufgebaut:
+    Jeder Deck-Abschnitt wird einzeln aus der Datei gelesen, gesetzt und wieder verworfen, statt
+    eine Story-Liste über alle Decks aufzubauen. Zusätzlich hält ReportLab nur noch den bereits
+    komprimierten Seiteninhalt bis zum Schreiben der Datei (ca. 15 KB pro Deck).
+
+    Args:
+        results_iter (iterable): Iterator über gespeicherte Analyse-Ergebnisse (ein Dict pro Deck)
+        output_path (str): Pfad der zu erstellenden PDF-Datei
+        title (str): Titel des Reports
+
+    Returns:
+        int: Anzahl der Decks im Report
+    """
+    rows = []
+
+    with tempfile.TemporaryFile() as spool:
+        # Erster Durchlauf: Ergebnisse auslagern, nur Ranking-Zeilen behalten
+        for results in results_iter:
+            row = _portfolio_row(results)
+            row['offset'] = spool.tell()
+            spool.write(json.dumps(results, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+            rows.append(row)
+
+        rows.sort(key=_portfolio_rank_key)
+
+        doc = BaseDocTemplate(
+            output_path,
+            pagesize=A4,
+            rightMargin=2*cm,
+            leftMargin=2*cm,
+            topMargin=2*cm,
+            bottomMargin=2*cm,
+            title=title
+        )
+        frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal')
+        doc.addPageTemplates([PageTemplate(id='Portfolio', frames=frame, onPage=_draw_portfolio_footer)])
+
+        doc._startBuild()
+        doc.canv._doctemplate = doc
+        try:
+            # Header und Ranking-Übersicht
+            counts = {light: sum(1 for row in rows if row['final_prediction'] == light) for light in TRAFFIC_LIGHT_RANK}
+            _stream_flowables(doc, [
+                Paragraph("VC PITCH DECK ANALYSE", TITLE_STYLE),
+                Paragraph(_escape(title), SAMPLE_STYLES['Heading2']),
+                Paragraph(
+                    f"Erstellt am {datetime.now().strftime('%d.%m.%Y')} | {len(rows)} Decks | "
+                    f"{counts['green']} grün, {counts['yellow']} gelb, {counts['red']} rot",
+                    NORMAL_STYLE
+                ),
+                Paragraph("Ranking", HEADING_STYLE)
+            ] + _overview_tables(rows))
+
+            # Zweiter Durchlauf: Deck-Abschnitte in Ranking-Reihenfolge aus der Auslagerungsdatei
+            if rows:
+                _stream_flowables(doc, [PageBreak(), Paragraph("Einzelbewertungen", HEADING_STYLE)])
+            for rank, row in enumerate(rows, 1):
+                spool.seek(row['offset'])
+                _stream_flowables(doc, _deck_section(json.loads(spool.readline()), rank))
+        finally:
+            del doc.canv._doctemplate
+
+        doc._endBuild()
+
+    print(f"Portfolio report generated: {len(rows)} decks -> {output_path}")
+    return len(rows)
@@ -0,0 +1,299 @@
+"""
+Lokale Tools für den Portfolio-Chat.
+
+Statt alle gespeicherten Analysen in den Prompt zu packen, bekommt Claude im Portfolio-Chat
+Tools, die lokal gegen den Analyse-Speicher ausgeführt werden (Volltextsuche, einzelner Lauf,
+KPI-Auswertung, Decks mit Red Flags). Jede Tool-Antwort ist ein kompaktes JSON mit höchstens
+PORTFOLIO_TOOL_RESULT_LIMIT Decks, dadurch bleiben die Prompts auch bei großen Portfolios klein.
+"""
+
+#import von packages
+import json
+from datetime import datetime
+import numpy as np
+
+from ai_config.config import KPI_FIELDS, PORTFOLIO_TOOL_RESULT_LIMIT
+from ai_config.kpi_analytics import KPI_COLUMNS, normalize_sector
+from ai_config.rules import DERIVED_KPI_FIELDS, OPERATORS, kpi_value
+from ai_config.comparables import extract_competitors
+
+# Gemeinsame Parameter für den Zeitraum
+DATE_RANGE_PROPERTIES = {
+    "since": {
+        "type": "string",
+        "description": "Only analyses created on or after this date (YYYY-MM-DD)"
+    },
+    "until": {
+        "type": "string",
+        "description": "Only analyses created on or before this date (YYYY-MM-DD)"
+    }
+}
+
+# Tool-Definitionen für die Claude API
+PORTFOLIO_TOOLS = [
+    {
+        "name": "search_analyses",
+        "description": "Searches all stored pitch deck analyses (full-text search over reasoning, summary, competitor analysis, red flags and sources). Without a query, lists the most recent analyses. Returns id, filename, date, traffic light and red flag count per analysis.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Search terms (all must occur, phrases in double quotes). Leave empty to list analyses."
+                },
+                "final_predictions": {
+                    "type": "array",
+                    "items": {"type": "string", "enum": ["green", "yellow", "red"]},
+                    "description": "Only analyses with one of these traffic lights"
+                },
+                **DATE_RANGE_PROPERTIES
+            }
+        }
+    },
+    {
+        "name": "get_analysis",
+        "description": "Returns the stored result of one analysis: traffic light, predictions, category scores, KPIs, triggered red flags, competitors and the summary.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "analysis_id": {
+                    "type": "integer",
+                    "description": "ID of the analysis (from search_analyses or another tool)"
+                }
+            },
+            "required": ["analysis_id"]
+        }
+    },
+    {
+        "name": "aggregate_kpis",
+        "description": "Aggregates one KPI over the latest analysis of every deck (count, min, quartiles, max, mean), optionally filtered by sector and date. With operator and threshold, also lists the decks whose KPI matches the condition, e.g. runway_months < 12.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "kpi": {
+                    "type": "string",
+                    "enum": KPI_COLUMNS,
+                    "description": "KPI to aggregate: " + ", ".join(
+                        f"{key} ({field['label']})" for key, field in {**KPI_FIELDS, **DERIVED_KPI_FIELDS}.items()
+                    )
+                },
+                "sector": {
+                    "type": "string",
+                    "description": "Only decks whose sector contains this text (case-insensitive), e.g. 'SaaS'"
+                },
+                "operator": {
+                    "type": "string",
+                    "enum": list(OPERATORS.keys()),
+                    "description": "Comparison for listing matching decks"
+                },
+                "threshold": {
+                    "type": "number",
+                    "description": "Threshold for the comparison (plain number in the KPI's unit)"
+                },
+                "group_by_sector": {
+                    "type": "boolean",
+                    "description": "Additionally return the statistics per sector"
+                },
+                **DATE_RANGE_PROPERTIES
+            },
+            "required": ["kpi"]
+        }
+    },
+    {
+        "name": "list_decks_by_red_flag",
+        "description": "Lists decks (latest analysis per deck) with triggered red flags, optionally only those whose triggered red flag contains a given text.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "red_flag": {
+                    "type": "string",
+                    "description": "Text that the triggered red flag must contain (case-insensitive). Leave empty for all red flags."
+                },
+                **DATE_RANGE_PROPERTIES
+            }
+        }
+    }
+]
+
+
+def format_date(created_at: str) -> str:
+    """Datum eines Laufs im ISO-Format (ohne Uhrzeit)."""
+    return datetime.fromisoformat(created_at).date().isoformat()
+
+
+def kpi_statistics(values: np.ndarray) -> dict:
+    """
+    Kennzahlen-Statistik über bekannte Werte.
+
+    Returns:
+        dict: {"count", "min", "p25", "median", "p75", "max", "mean"} (nur "count" bei leeren Werten)
+    """
+    if len(values) == 0:
+        return {'count': 0}
+    p25, median, p75 = np.percentile(values, [25, 50, 75])
+    return {
+        'count': int(len(values)),
+        'min': round(float(values.min()), 2),
+        'p25': round(float(p25), 2),
+        'median': round(float(median), 2),
+        'p75': round(float(p75), 2),
+        'max': round(float(values.max()), 2),
+        'mean': round(float(values.mean()), 2)
+    }
+
+
+class PortfolioTools:
+    """
+    Führt die Tools des Portfolio-Chats lokal gegen den Analyse-Speicher aus.
+    """
+
+    def __init__(self, store, limit: int = PORTFOLIO_TOOL_RESULT_LIMIT):
+        """
+        Args:
+            store (AnalysisStore): Analyse-Speicher
+            limit (int): Maximale Anzahl Decks pro Tool-Ergebnis
+        """
+        self.store = store
+        self.limit = limit
+
+    def execute(self, name: str, tool_input: dict) -> str:
+        """
+        Führt ein Tool aus und gibt das Ergebnis als JSON-Text für den tool_result-Block zurück.
+
+        Args:
+            name (str): Name des Tools aus PORTFOLIO_TOOLS
+            tool_input (dict): Parameter aus dem tool_use-Block
+
+        Returns:
+            str: JSON-Ergebnis bzw. {"error": ...} bei unbekannten Tools oder ungültigen Parametern
+        """
+        handlers = {
+            'search_analyses': self.search_analyses,
+            'get_analysis': self.get_analysis,
+            'aggregate_kpis': self.aggregate_kpis,
+            'list_decks_by_red_flag': self.list_decks_by_red_flag
+        }
+        try:
+            if name not in handlers:
+                raise ValueError(f"Unknown tool: {name}")
+            result = handlers[name](**(tool_input or {}))
+        except Exception as e:
+            print(f"Error in portfolio tool {name}: {e}")
+            result = {'error': str(e)}
+        return json.dumps(result, ensure_ascii=False)
+
+    def search_analyses(self, query: str = "", final_predictions: list = None, since: str = "", until: str = "") -> dict:
+        """Volltextsuche bzw. Liste der neuesten Läufe."""
+        if query.strip():
+            analyses = self.store.search(query, final_predictions=final_predictions, limit=self.limit, since=since, until=until)
+        else:
+            analyses = self.store.list_analyses(final_predictions=final_predictions, limit=self.limit, since=since, until=until)
+
+        return {
+            'analyses': [
+                {
+                    'analysis_id': analysis['id'],
+                    'filename': analysis['filename'],
+                    'date': format_date(analysis['created_at']),
+                    'traffic_light': analysis['final_prediction'],
+                    'red_flag_count': analysis['red_flag_count'],
+                    **({'snippet': analysis['snippet']} if analysis.get('snippet') else {})
+                }
+                for analysis in analyses
+            ]
+        }
+
+    def get_analysis(self, analysis_id: int) -> dict:
+        """Kompakte Darstellung eines gespeicherten Laufs."""
+        record = self.store.load_analysis(int(analysis_id))
+        if record is None:
+            return {'error': f"Analysis {analysis_id} not found"}
+
+        results = record['results']
+        pitch_deck = results.get('pitch_deck') or {}
+        kpis = pitch_deck.get('kpis') or {}
+        return {
+            'analysis_id': record['id'],
+            'filename': results.get('filename'),
+            'date': format_date(record['created_at']),
+            'traffic_light': results.get('final_prediction'),
+            'pitch_deck_prediction': pitch_deck.get('prediction'),
+            'pitch_deck_score': pitch_deck.get('score'),
+            'web_research_prediction': (results.get('web_research') or {}).get('prediction'),
+            'category_scores': {
+                category: entry.get('score') for category, entry in (pitch_deck.get('category_scores') or {}).items()
+            },
+            'custom_criteria': [
+                {'criterion': criterion.get('description'), 'score': criterion.get('score')}
+                for criterion in pitch_deck.get('custom_criteria') or []
+            ],
+            'kpis': {key: value for key, value in kpis.items() if value not in (None, "")},
+            'triggered_red_flags': (results.get('red_flags') or {}).get('triggered') or [],
+            'competitors': extract_competitors((results.get('competitor_analysis') or {}).get('analysis', '')),
+            'summary': (results.get('summary') or '')[:1500]
+        }
+
+    def aggregate_kpis(self, kpi: str, sector: str = "", operator: str = "", threshold: float = None,
+                       group_by_sector: bool = False, since: str = "", until: str = "") -> dict:
+        """Statistik einer Kennzahl, optional mit den Decks, die eine Bedingung erfüllen."""
+        if kpi not in KPI_COLUMNS:
+            return {'error': f"Unknown KPI: {kpi}"}
+
+        records = self.store.load_kpi_records(since=since, until=until)
+        if sector.strip():
+            records = [record for record in records if normalize_sector(sector) in normalize_sector(record['sector'])]
+        known = [(record, kpi_value(record, kpi)) for record in records]
+        known = [(record, value) for record, value in known if value is not None]
+        values = np.array([value for _, value in known], dtype=np.float64)
+
+        result = {
+            'kpi': kpi,
+            'unit': {**KPI_FIELDS, **DERIVED_KPI_FIELDS}[kpi].get('unit', ''),
+            'decks_considered': len(records),
+            'decks_without_value': len(records) - len(known),
+            'statistics': kpi_statistics(values)
+        }
+
+        if group_by_sector:
+            sectors = np.array([normalize_sector(record['sector']) or "(unknown)" for record, _ in known], dtype=object)
+            result['by_sector'] = {
+                str(name): kpi_statistics(values[sectors == name]) for name in sorted(set(sectors))
+            }
+
+        if operator and threshold is not None:
+            if operator not in OPERATORS:
+                return {'error': f"Unknown operator: {operator}"}
+            matches = sorted(
+                ((record, value) for record, value in known if OPERATORS[operator](value, float(threshold))),
+                key=lambda match: match[1]
+            )
+            result['condition'] = f"{kpi} {operator} {threshold}"
+            result['matching_count'] = len(matches)
+            result['matching_decks'] = [
+                {
+                    'analysis_id': record['analysis_id'],
+                    'filename': record['filename'],
+                    'date': format_date(record['created_at']),
+                    'sector': record['sector'],
+                    'traffic_light': record['final_prediction'],
+                    'value': round(value, 2)
+                }
+                for record, value in matches[:self.limit]
+            ]
+        return result
+
+    def list_decks_by_red_flag(self, red_flag: str = "", since: str = "", until: str = "") -> dict:
+        """Decks mit getroffenen Red Flags, optional gefiltert nach dem Text der Red Flag."""
+        needle = red_flag.strip().casefold()
+        decks = []
+        for analysis in self.store.list_red_flag_analyses(since=since, until=until, limit=1000):
+            triggered = [flag for flag in analysis['triggered'] if needle in flag.casefold()]
+            if triggered:
+                decks.append({
+                    'analysis_id': analysis['id'],
+                    'filename': analysis['filename'],
+                    'date': format_date(analysis['created_at']),
+                    'traffic_light': analysis['final_prediction'],
+                    'triggered_red_flags': triggered
+                })
+        return {'matching_count': len(decks), 'decks': decks[:self.limit]}
@@ -0,0 +1,141 @@
+"""
+Portfolio-Ranking über alle gespeicherten Analysen.
+
+Die Kategorie-Scores aller Decks liegen als Matrizen (Decks x Kategorien) im Speicher. Bei jeder
+Änderung einer Gewichtung werden Gesamtscore, Pitch-Deck-Prognose und Ampel aller Decks in einer
+vektorisierten Operation neu berechnet (siehe scoring.weighted_scores) und neu sortiert; dadurch
+bleibt das Ranking auch mit tausenden gespeicherten Analysen ohne Wartezeit bedienbar.
+"""
+
+#import von packages
+import threading
+from datetime import datetime
+import numpy as np
+
+from ai_config.config import PREDICTION_SCORE_THRESHOLD
+from ai_config.scoring import CATEGORY_KEYS, weight_vector, weighted_scores
+
+# Reihenfolge der Ampel-Codes in den Arrays
+TRAFFIC_LIGHTS = np.array(['green', 'yellow', 'red'], dtype=object)
+
+
+class ScoreTable:
+    """
+    Kategorie-Scores, Prognosen und Red Flags aller Decks (neuester Lauf pro Deck) als NumPy-Arrays.
+
+    Wird von allen Streamlit-Sessions geteilt; Lesen und Ergänzen sind über ein gemeinsames Lock geschützt.
+    """
+
+    def __init__(self, rows: list = None):
+        """
+        Args:
+            rows (list): Dicts mit den Spalten der Tabelle analysis_scores (siehe AnalysisStore.load_score_rows)
+        """
+        self._lock = threading.Lock()
+        self._set_rows(rows or [])
+
+    @classmethod
+    def from_store(cls, store):
+        """
+        Lädt die Tabelle aus dem Analyse-Speicher (nur die flachen Score-Spalten).
+
+        Args:
+            store (AnalysisStore): Analyse-Speicher
+
+        Returns:
+            ScoreTable: Geladene Tabelle
+        """
+        return cls(store.load_score_rows())
+
+    def _set_rows(self, rows: list):
+        """Baut alle Arrays aus Zeilen-Dicts auf."""
+        def column(name, dtype=np.float64):
+            return np.array([np.nan if row[name] is None else row[name] for row in rows], dtype=dtype)
+
+        self.analysis_ids = np.array([row['analysis_id'] for row in rows], dtype=np.int64)
+        self.deck_hashes = np.array([row['deck_hash'] for row in rows], dtype=object)
+        self.filenames = np.array([row['filename'] for row in rows], dtype=object)
+        self.created_at = np.array([row['created_at'] for row in rows], dtype='datetime64[s]')
+        self.red_flag_counts = np.array([row['red_flag_count'] for row in rows], dtype=np.int64)
+        self.pitch_predictions = np.array([bool(row['pitch_prediction']) for row in rows], dtype=bool)
+        self.web_predictions = np.array([bool(row['web_prediction']) for row in rows], dtype=bool)
+        self.scores = np.column_stack([column(f"{key.lower()}_score") for key in CATEGORY_KEYS]) if rows else np.empty((0, len(CATEGORY_KEYS)))
+        self.confidences = np.nan_to_num(np.column_stack([column(f"{key.lower()}_confidence") for key in CATEGORY_KEYS])) if rows else np.empty((0, len(CATEGORY_KEYS)))
+        self.custom_totals = np.column_stack([column('custom_weighted'), column('custom_weight')]) if rows else np.empty((0, 2))
+
+    def __len__(self) -> int:
+        return len(self.analysis_ids)
+
+    def upsert(self, row: dict):
+        """
+        Ergänzt oder ersetzt den Eintrag eines Decks (z.B. nach einem neuen Lauf oder einer neuen Gewichtung).
+
+        Args:
+            row (dict): Zeile wie aus AnalysisStore.load_score_rows
+        """
+        with self._lock:
+            keep = self.deck_hashes != row['deck_hash']
+            new = ScoreTable.__new__(ScoreTable)
+            new._set_rows([row])
+            for name in ('analysis_ids', 'deck_hashes', 'filenames', 'created_at', 'red_flag_counts',
+                         'pitch_predictions', 'web_predictions', 'scores', 'confidences', 'custom_totals'):
+                setattr(self, name, np.concatenate([getattr(self, name)[keep], getattr(new, name)]))
+
+    def rank(self, criteria_weights: dict = None, lights: list = None, red_flags: str = "all", since: datetime = None,
+             limit: int = 100) -> tuple:
+        """
+        Bewertet alle Decks mit den angegebenen Gewichtungen neu und liefert das gefilterte Ranking.
+
+        Args:
+            criteria_weights (dict): Kategorie -> Gewichtung (Label oder Zahl)
+            lights (list): Optional, Filter auf die (neu berechnete) Ampel, z.B. ["green", "yellow"]
+            red_flags (str): "all", "none" (nur ohne getroffene Red Flags) oder "any" (nur mit Red Flags)
+            since (datetime): Optional, nur Läufe ab diesem Zeitpunkt
+            limit (int): Maximale Anzahl Einträge
+
+        Returns:
+            tuple: (Liste von Dicts pro Deck, bestes zuerst; Anzahl Decks nach Filter)
+        """
+        with self._lock:
+            totals = weighted_scores(self.scores, self.confidences, weight_vector(criteria_weights), self.custom_totals)
+            # Decks ohne Kategorie-Scores behalten ihre gespeicherte Pitch-Deck-Prognose
+            has_score = ~np.isnan(totals)
+            pitch = np.where(has_score, np.nan_to_num(totals) >= PREDICTION_SCORE_THRESHOLD, self.pitch_predictions)
+
+            # Ampel vektorisiert: Red Flag -> rot, beide positiv -> grün, beide negativ -> rot, sonst gelb
+            light_codes = np.where(pitch == self.web_predictions, np.where(pitch, 0, 2), 1)
+            light_codes = np.where(self.red_flag_counts > 0, 2, light_codes)
+            computed_lights = TRAFFIC_LIGHTS[light_codes]
+
+            mask = np.ones(len(self), dtype=bool)
+            if lights:
+                mask &= np.isin(computed_lights, lights)
+            if red_flags == "none":
+                mask &= self.red_flag_counts == 0
+            elif red_flags == "any":
+                mask &= self.red_flag_counts > 0
+            if since is not None:
+                mask &= self.created_at >= np.datetime64(since, 's')
+
+            indices = np.flatnonzero(mask)
+            # Absteigend nach Score, Decks ohne Score ans Ende, bei Gleichstand neuere zuerst
+            order = np.lexsort((-self.analysis_ids[indices], -np.nan_to_num(totals[indices], nan=-1.0)))
+            top = indices[order[:limit]]
+
+            ranking = [
+                {
+                    'rank': position,
+                    'analysis_id': int(self.analysis_ids[index]),
+                    'filename': self.filenames[index],
+                    'created_at': str(self.created_at[index]),
+                    'score': None if np.isnan(totals[index]) else round(float(totals[index]), 2),
+                    'final_prediction': computed_lights[index],
+                    'red_flag_count': int(self.red_flag_counts[index]),
+                    'category_scores': {
+                        key: None if np.isnan(self.scores[index, column]) else float(self.scores[index, column])
+                        for column, key in enumerate(CATEGORY_KEYS)
+                    }
+                }
+                for position, index in enumerate(top, 1)
+            ]
+            return ranking, len(indices)
@@ -0,0 +1,256 @@
+"""
+Retrieval-Modul für den Chat mit den Analyse-Ergebnissen.
+
+Dieses Modul baut pro Pitch Deck einen lokalen BM25-Index (NumPy, ohne Netzwerk) auf über:
+- den Text jeder einzelnen PDF-Seite
+- die Begründungen aus Pitch Deck Analyse und Web-Recherche
+- die Wettbewerber-Analyse, die Zusammenfassung und die Titel der Quellen
+
+Der Chat sendet dadurch nur noch die relevantesten Abschnitte (mit Seitenangabe) an Claude
+statt bei jeder Frage das komplette PDF.
+"""
+
+#import von packages
+import hashlib
+import re
+import numpy as np
+from pypdf import PdfReader
+
+# Tokenisierung: Wörter inkl. Umlaute und Zahlen
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Häufige Füllwörter, die für die Suche keine Aussagekraft haben
+STOPWORDS = {
+    "der", "die", "das", "den", "dem", "des", "ein", "eine", "einer", "eines", "einem", "einen",
+    "und", "oder", "aber", "ist", "sind", "war", "wird", "werden", "im", "in", "am", "an", "auf",
+    "zu", "zum", "zur", "mit", "von", "vom", "für", "bei", "aus", "wie", "was", "wer", "wo",
+    "welche", "welcher", "welches", "es", "sie", "er", "wir", "ihr", "hat", "haben", "gibt",
+    "nicht", "auch", "noch", "so", "als", "dass", "the", "a", "an", "of", "and", "or", "is",
+    "are", "to", "for", "on", "with", "what", "who", "how"
+}
+
+# Maximale Länge eines Abschnitts in Zeichen
+MAX_CHUNK_CHARS = 1200
+
+
+def tokenize(text: str) -> list:
+    """
+    Zerlegt einen Text in kleingeschriebene Suchbegriffe ohne Stoppwörter.
+
+    Args:
+        text (str): Beliebiger Text
+
+    Returns:
+        list: Liste von Tokens
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def compute_deck_hash(pdf_filename: str) -> str:
+    """
+    Berechnet einen eindeutigen Hash über den Inhalt eines Pitch Decks.
+
+    Args:
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
+
+    Returns:
+        str: SHA-256 Hash des Dateiinhalts (hex)
+    """
+    with open("tmp/" + pdf_filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def extract_page_texts(pdf_filename: str) -> list:
+    """
+    Extrahiert den Text jeder Seite eines Pitch Decks.
+
+    Args:
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
+
+    Returns:
+        list: Text pro Seite (leerer String, falls eine Seite keinen extrahierbaren Text enthält)
+    """
+    return extract_page_texts_from_stream("tmp/" + pdf_filename)
+
+
+def extract_page_texts_from_stream(stream) -> list:
+    """
+    Extrahiert den Text jeder Seite aus einem PDF-Pfad oder einem Datei-Objekt (z.B. ein noch nicht gespeicherter Upload).
+
+    Args:
+        stream: Pfad zur PDF-Datei oder binäres Datei-Objekt
+
+    Returns:
+        list: Text pro Seite (leere Liste, falls das PDF nicht gelesen werden kann)
+    """
+    try:
+        reader = PdfReader(stream)
+        return [(page.extract_text() or "").strip() for page in reader.pages]
+    except Exception as e:
+        print(f"Error extracting pages from {stream}: {e}")
+        return []
+
+
+def split_text(text: str, max_chars: int = MAX_CHUNK_CHARS) -> list:
+    """
+    Teilt einen längeren Text an Absatzgrenzen in Abschnitte mit begrenzter Länge.
+
+    Args:
+        text (str): Zu teilender Text
+        max_chars (int): Maximale Länge eines Abschnitts
+
+    Returns:
+        list: Liste von Textabschnitten
+    """
+    parts = []
+    current = ""
+
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+
+        # Sehr lange Absätze hart umbrechen
+        while len(current) > max_chars:
+            parts.append(current[:max_chars])
+            current = current[max_chars:]
+
+    if current:
+        parts.append(current)
+
+    return parts
+
+
+def build_chunks(page_texts: list, results: dict) -> list:
+    """
+    Erstellt die durchsuchbaren Abschnitte aus Deck-Seiten und Analyse-Ergebnissen.
+
+    Args:
+        page_texts (list): Text pro PDF-Seite
+        results (dict): Analyse-Ergebnisse aus dem Session State
+
+    Returns:
+        list: Liste von Dicts mit {"source": str, "text": str}
+    """
+    chunks = []
+
+    # Jede Seite des Decks mit Seitenangabe
+    for page_number, page_text in enumerate(page_texts, 1):
+        for part in split_text(page_text):
+            chunks.append({"source": f"Seite {page_number}", "text": part})
+
+    # Analyse-Artefakte
+    artifacts = [
+        ("Pitch Deck Analyse", results.get('pitch_deck', {}).get('reasoning', '')),
+        ("Web-Recherche", results.get('web_research', {}).get('reasoning', '')),
+        ("Wettbewerber-Analyse", results.get('competitor_analysis', {}).get('analysis', '')),
+        ("Red Flags", results.get('red_flags', {}).get('reasoning', '')),
+        ("Zusammenfassung", results.get('summary', '')),
+    ]
+    for source, text in artifacts:
+        for part in split_text(text):
+            chunks.append({"source": source, "text": part})
+
+    # Quellentitel (kurz, daher gesammelt als ein Abschnitt pro Quellenliste)
+    for source, section in [("Quellen Web-Recherche", 'web_research'), ("Quellen Wettbewerber", 'competitor_analysis')]:
+        titles = [
+            f"{s.get('title', '')} ({s.get('url', '')})" if isinstance(s, dict) else str(s)
+            for s in results.get(section, {}).get('sources', [])
+        ]
+        for part in split_text("\n\n".join(titles)):
+            chunks.append({"source": source, "text": part})
+
+    return chunks
+
+
+class BM25Index:
+    """
+    Einfacher BM25-Index über eine Liste von Textabschnitten.
+
+    Die Termfrequenzen werden einmalig als NumPy-Matrix (Abschnitte x Vokabular) aufgebaut,
+    eine Suche ist danach nur noch eine gewichtete Summe über die Spalten der Suchbegriffe.
+    """
+
+    def __init__(self, chunks: list, k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+
+        tokenized = [tokenize(chunk["text"]) for chunk in chunks]
+
+        # Vokabular aufbauen
+        self.vocabulary = {}
+        for tokens in tokenized:
+            for token in tokens:
+                if token not in self.vocabulary:
+                    self.vocabulary[token] = len(self.vocabulary)
+
+        # Termfrequenz-Matrix
+        self.term_frequencies = np.zeros((len(chunks), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                self.term_frequencies[row, self.vocabulary[token]] += 1
+
+        # Dokumentlängen und IDF
+        self.doc_lengths = self.term_frequencies.sum(axis=1)
+        self.avg_doc_length = float(self.doc_lengths.mean()) if len(chunks) else 0.0
+        document_frequency = (self.term_frequencies > 0).sum(axis=0)
+        self.idf = np.log(1 + (len(chunks) - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+
+    def search(self, query: str, k: int = 6) -> list:
+        """
+        Sucht die relevantesten Abschnitte zu einer Anfrage.
+
+        Args:
+            query (str): Suchanfrage (z.B. Chat-Frage)
+            k (int): Anzahl der zurückgegebenen Abschnitte
+
+        Returns:
+            list: Liste von (Abschnitt, Score) Tupeln, absteigend sortiert
+        """
+        columns = [self.vocabulary[token] for token in set(tokenize(query)) if token in self.vocabulary]
+        if not columns or not self.chunks:
+            return []
+
+        tf = self.term_frequencies[:, columns]
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_doc_length, 1e-6))
+        scores = (self.idf[columns] * tf * (self.k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+        top = np.argsort(-scores)[:k]
+        return [(self.chunks[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+def build_deck_index(pdf_filename: str, results: dict) -> BM25Index:
+    """
+    Baut den Retrieval-Index für ein analysiertes Pitch Deck.
+
+    Args:
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
+        results (dict): Analyse-Ergebnisse aus dem Session State
+
+    Returns:
+        BM25Index: Index über Deck-Seiten und Analyse-Artefakte
+    """
+    page_texts = extract_page_texts(pdf_filename)
+    index = BM25Index(build_chunks(page_texts, results))
+    # Merke, ob das Deck überhaupt extrahierbaren Text hat (sonst Fallback auf das PDF)
+    index.has_page_text = any(text for text in page_texts)
+    print(f"Retrieval index built: {len(index.chunks)} chunks, {len(index.vocabulary)} terms")
+    return index
+
+
+def format_chunks(hits: list) -> str:
+    """
+    Formatiert gefundene Abschnitte mit Quellenangabe für den Prompt.
+
+    Args:
+        hits (list): Ergebnis von BM25Index.search
+
+    Returns:
+        str: Abschnitte im Format "[Seite 3] Text"
+    """
+    return "\n\n".join(f"[{chunk['source']}] {chunk['text']}" for chunk, _ in hits)
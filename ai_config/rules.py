@@ -0,0 +1,275 @@
+"""
+Lokale Regel-Engine für quantitative Red Flags.
+
+Die Pitch Deck Analyse extrahiert einen strukturierten KPI-Datensatz (siehe KPI_FIELDS). Red Flags,
+die eine einzelne Kennzahl mit einem Schwellwert vergleichen (z.B. "weniger als 10 zahlende Kunden",
+"Runway < 12 Monate", "LTV/CAC unter 3"), werden hier als Regel erkannt und lokal ausgewertet.
+Qualitative und mehrdeutige Red Flags sowie Regeln ohne passende Kennzahl im Deck gehen an den LLM-Check.
+"""
+
+#import von packages
+import operator
+import re
+
+from ai_config.config import KPI_FIELDS
+
+# Abgeleitete Kennzahlen (aus den extrahierten KPIs berechnet)
+DERIVED_KPI_FIELDS = {
+    "ltv_cac_ratio": {"label": "LTV/CAC", "unit": ""}
+}
+
+# Begriffe pro Kennzahl, wie sie in Red Flags vorkommen (Kleinschreibung)
+KPI_ALIASES = {
+    "ltv_cac_ratio": ["ltv/cac", "ltv:cac", "ltv zu cac", "ltv-cac-verhältnis", "ltv-cac"],
+    "revenue_growth": ["umsatzwachstum", "wachstum", "growth"],
+    "revenue": ["jahresumsatz", "umsatz", "revenue", "arr"],
+    "monthly_burn": ["burn rate", "burn-rate", "burnrate", "cash burn", "burn"],
+    "runway_months": ["runway"],
+    "paying_customers": ["zahlende kunden", "paying customers", "kunden", "customers"],
+    "cac": ["kundenakquisitionskosten", "cac"],
+    "ltv": ["customer lifetime value", "lifetime value", "ltv", "clv"],
+    "round_size": ["rundengröße", "finanzierungsrunde", "round size", "ticketgröße"],
+    "valuation": ["pre-money-bewertung", "pre-money", "bewertung", "valuation"]
+}
+
+# Längere Begriffe zuerst, damit z.B. "ltv/cac" nicht als "ltv" und "cac" erkannt wird
+ALIAS_PATTERN = re.compile(
+    r"(?<!\w)(" + "|".join(
+        re.escape(alias) for alias in sorted((a for aliases in KPI_ALIASES.values() for a in aliases), key=len, reverse=True)
+    ) + r")(?!\w)"
+)
+ALIAS_TO_KPI = {alias: kpi for kpi, aliases in KPI_ALIASES.items() for alias in aliases}
+
+# Vergleichsoperatoren als Symbol oder Formulierung
+OPERATOR_WORDS = {
+    "<=": ["<=", "≤", "höchstens", "maximal", "bis zu", "at most"],
+    ">=": [">=", "≥", "mindestens", "at least"],
+    "<": ["<", "weniger als", "unter", "kleiner als", "niedriger als", "less than", "fewer than", "below"],
+    ">": [">", "mehr als", "über", "größer als", "höher als", "more than", "greater than", "above"]
+}
+WORD_TO_OPERATOR = {word: symbol for symbol, words in OPERATOR_WORDS.items() for word in words}
+OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+# Mengen-Suffixe (z.B. "1,5 Mio", "500k", "100 Tsd.")
+MULTIPLIERS = {
+    "k": 1e3, "tsd": 1e3, "tausend": 1e3,
+    "m": 1e6, "mio": 1e6, "millionen": 1e6,
+    "mrd": 1e9, "milliarden": 1e9
+}
+
+# Einheiten, wie sie hinter dem Schwellwert stehen (Schlüssel wie "unit" in KPI_FIELDS, "Jahre" wird umgerechnet)
+UNIT_WORDS = {
+    "€/Monat": ["€/monat", "€ pro monat", "€ im monat", "eur/monat", "eur pro monat", "euro pro monat", "/monat", "pro monat", "im monat"],
+    "€": ["€", "eur", "euro"],
+    "%": ["%", "prozent", "percent"],
+    "Monate": ["monaten", "monate", "monat", "months", "month"],
+    "Jahre": ["jahren", "jahre", "jahr", "years", "year"]
+}
+WORD_TO_UNIT = {word: unit for unit, words in UNIT_WORDS.items() for word in words}
+
+# Umrechnungsfaktor (Einheit der Kennzahl, Einheit im Red Flag) -> Faktor; andere Kombinationen passen nicht
+UNIT_FACTORS = {
+    ("Monate", "Jahre"): 12,
+    ("€/Monat", "€"): 1
+}
+# Mengen-Suffixe sind nur bei Beträgen und Anzahlen eindeutig ("12m" Runway könnte auch Monate meinen)
+MULTIPLIER_UNITS = {"€", "€/Monat", ""}
+
+# Füllwörter zwischen Kennzahl und Vergleich ("Runway liegt bei unter 12 Monaten")
+FILLER_WORDS = ["liegt", "ist", "beträgt", "bei", "von", "is", "of"]
+
+
+def _alternation(words, after_number: bool = False) -> str:
+    """
+    Regex-Alternative über alle Begriffe, längere zuerst. Wörter werden nur als ganze Wörter erkannt,
+    direkt hinter einer Zahl (after_number) genügt das Wortende ("500k", "24months").
+    """
+    def boundary(word):
+        start = r"(?<!\w)" if word[0].isalpha() and not after_number else ""
+        end = r"(?!\w)" if word[-1].isalpha() else ""
+        return start + re.escape(word) + end
+    return "|".join(boundary(word) for word in sorted(words, key=len, reverse=True))
+
+
+# Schwellwert mit optionalem Währungszeichen, Mengen-Suffix und Einheit
+QUANTITY_PATTERN = (
+    r"(?P<currency>€\s*)?(?P<number>\d+(?:[.,]\d+)*)"
+    r"(?:\s*(?P<multiplier>" + _alternation(MULTIPLIERS, after_number=True) + r")\.?)?"
+    r"(?:\s*(?P<unit>" + _alternation(WORD_TO_UNIT, after_number=True) + r"))?"
+)
+OPERATOR_GROUP = r"(?P<operator>" + _alternation(WORD_TO_OPERATOR) + r")"
+ALIAS_GROUP = r"(?P<alias>" + ALIAS_PATTERN.pattern + r")"
+FILLER_GROUP = r"(?:\s+(?:" + _alternation(FILLER_WORDS) + r"))*"
+
+# Eine Regel besteht nur aus Kennzahl, Vergleich und Schwellwert ("Runway < 12 Monate") oder
+# Vergleich, Schwellwert und Kennzahl ("weniger als 10 zahlende Kunden"). Jeder weitere Begriff
+# (z.B. "Burn Multiple", "CAC Payback", "Churn der Kunden") macht die Red Flag mehrdeutig.
+RULE_PATTERNS = [
+    re.compile(r"\s*" + ALIAS_GROUP + FILLER_GROUP + r"\s*" + OPERATOR_GROUP + r"\s*" + QUANTITY_PATTERN + r"\s*[.!]?\s*"),
+    re.compile(r"\s*" + OPERATOR_GROUP + r"\s*" + QUANTITY_PATTERN + r"\s+" + ALIAS_GROUP + r"\s*[.!]?\s*")
+]
+
+
+def parse_number(text: str, suffix: str = None) -> float:
+    """
+    Wandelt eine Zahl im deutschen oder englischen Format in einen float um.
+
+    Args:
+        text (str): Zahl wie "1.500.000", "1,5" oder "2.5"
+        suffix (str): Optionales Mengen-Suffix ("k", "Mio", "Mrd", ...)
+
+    Returns:
+        float: Wert inkl. Multiplikator
+    """
+    if "," in text:
+        # Deutsches Format: Punkt = Tausendertrennzeichen, Komma = Dezimaltrennzeichen
+        value = float(text.replace(".", "").replace(",", "."))
+    elif re.fullmatch(r"\d{1,3}(\.\d{3})+", text):
+        value = float(text.replace(".", ""))
+    else:
+        value = float(text)
+    return value * MULTIPLIERS.get((suffix or "").lower(), 1.0)
+
+
+def normalize_kpis(raw_kpis: dict) -> dict:
+    """
+    Bereinigt den KPI-Datensatz aus der Tool-Antwort (Zahlen als float, fehlende Werte als None).
+
+    Args:
+        raw_kpis (dict): KPIs wie von Claude geliefert
+
+    Returns:
+        dict: Ein Eintrag pro Feld aus KPI_FIELDS (float oder None) plus "sector" (str)
+    """
+    raw_kpis = raw_kpis or {}
+    kpis = {}
+    for key in KPI_FIELDS:
+        value = raw_kpis.get(key)
+        try:
+            kpis[key] = float(value) if value is not None and value != "" else None
+        except (TypeError, ValueError):
+            kpis[key] = None
+    kpis["sector"] = str(raw_kpis.get("sector") or "").strip()
+    return kpis
+
+
+def kpi_value(kpis: dict, key: str):
+    """
+    Liefert eine (ggf. abgeleitete) Kennzahl aus dem KPI-Datensatz.
+
+    Returns:
+        float oder None: Wert der Kennzahl, None falls nicht bekannt
+    """
+    kpis = kpis or {}
+    if key == "ltv_cac_ratio":
+        ltv, cac = kpis.get("ltv"), kpis.get("cac")
+        return ltv / cac if ltv is not None and cac else None
+    return kpis.get(key)
+
+
+def kpi_label(key: str) -> str:
+    """Anzeigename einer (ggf. abgeleiteten) Kennzahl."""
+    return {**KPI_FIELDS, **DERIVED_KPI_FIELDS}.get(key, {}).get("label", key)
+
+
+def format_kpi_value(key: str, value) -> str:
+    """
+    Formatiert eine Kennzahl für die Anzeige (Tausenderpunkte, Einheit).
+
+    Returns:
+        str: z.B. "1.200.000 €", "14 Monate", "3,2" oder "–" für unbekannte Werte
+    """
+    if value is None:
+        return "–"
+    unit = {**KPI_FIELDS, **DERIVED_KPI_FIELDS}.get(key, {}).get("unit", "")
+    if abs(value) >= 1000 or float(value).is_integer():
+        text = f"{value:,.0f}".replace(",", ".")
+    else:
+        text = f"{value:.1f}".replace(".", ",")
+    return f"{text} {unit}".strip()
+
+
+def parse_rule(flag: str):
+    """
+    Erkennt eine quantitative Red Flag (genau eine Kennzahl, ein Vergleich, ein Schwellwert).
+
+    Die Kennzahl muss das Subjekt der Red Flag sein, weitere Begriffe wie "Multiple", "Payback" oder
+    "Churn" führen zum LLM-Check. Einheiten werden in die Einheit der Kennzahl umgerechnet
+    ("1 Jahr" -> 12 Monate), unpassende Einheiten ("Runway unter 5%") ebenfalls an den LLM-Check gegeben.
+
+    Args:
+        flag (str): Red Flag wie vom Nutzer eingegeben
+
+    Returns:
+        dict oder None: {"flag", "kpi", "operator", "threshold"} oder None für qualitative und mehrdeutige Red Flags
+    """
+    text = flag.lower()
+    match = next((m for m in (pattern.fullmatch(text) for pattern in RULE_PATTERNS) if m), None)
+    if match is None:
+        return None
+
+    kpi = ALIAS_TO_KPI[match["alias"]]
+    kpi_unit = {**KPI_FIELDS, **DERIVED_KPI_FIELDS}[kpi]["unit"]
+    unit = WORD_TO_UNIT[match["unit"]] if match["unit"] else None
+    if match["currency"]:
+        if unit not in (None, "€", "€/Monat"):
+            return None
+        unit = unit or "€"
+
+    # Ohne Einheit gilt die Einheit der Kennzahl
+    factor = 1 if unit is None or unit == kpi_unit else UNIT_FACTORS.get((kpi_unit, unit))
+    if factor is None:
+        return None
+    if match["multiplier"] and kpi_unit not in MULTIPLIER_UNITS:
+        return None
+
+    return {
+        "flag": flag,
+        "kpi": kpi,
+        "operator": WORD_TO_OPERATOR[match["operator"]],
+        "threshold": parse_number(match["number"], match["multiplier"]) * factor
+    }
+
+
+def evaluate_rule(rule: dict, kpis: dict):
+    """
+    Wertet eine Regel gegen den KPI-Datensatz aus.
+
+    Returns:
+        bool oder None: True falls die Red Flag zutrifft, None falls die Kennzahl im Deck fehlt
+    """
+    value = kpi_value(kpis, rule["kpi"])
+    if value is None:
+        return None
+    return OPERATORS[rule["operator"]](value, rule["threshold"])
+
+
+def apply_kpi_rules(red_flags_list: list, kpis: dict) -> tuple:
+    """
+    Wertet alle quantitativen Red Flags lokal aus.
+
+    Args:
+        red_flags_list (list): Liste der Red Flags
+        kpis (dict): KPI-Datensatz des Decks
+
+    Returns:
+        tuple: (Getroffene Red Flags {flag: Begründung}, Red Flags für den LLM-Check, Anzahl lokal entschiedener Red Flags)
+            An den LLM-Check gehen qualitative Red Flags und Regeln, deren Kennzahl im Deck fehlt.
+    """
+    triggered = {}
+    remaining = []
+    decided = 0
+    for flag in red_flags_list:
+        rule = parse_rule(flag)
+        result = evaluate_rule(rule, kpis) if rule else None
+        if result is None:
+            remaining.append(flag)
+            continue
+
+        decided += 1
+        if result:
+            value = format_kpi_value(rule["kpi"], kpi_value(kpis, rule["kpi"]))
+            threshold = format_kpi_value(rule["kpi"], rule["threshold"])
+            triggered[flag] = f"Lokale Regel: {kpi_label(rule['kpi'])} laut Pitch Deck {value} ({rule['operator']} {threshold})"
+
+    return triggered, remaining, decided
@@ -0,0 +1,218 @@
+"""
+Lokale Bewertungslogik für die Kategorie-Scores.
+
+Claude bewertet jede Kategorie aus EVALUATION_CRITERIA und jedes benutzerdefinierte Kriterium
+mit einem Score (0-10) und einer Konfidenz (0-1), ohne Gewichtungen zu kennen. Die Gewichtung und die Gesamtprognose werden
+lokal mit NumPy berechnet, dadurch:
+- ändert ein Gewichtungs-Regler das Ergebnis sofort, ohne neuen API-Aufruf
+- kann ein ganzes Portfolio in einer einzigen vektorisierten Operation neu bewertet werden
+"""
+
+#import von packages
+import numpy as np
+
+from ai_config.config import EVALUATION_CRITERIA, WEIGHT_VALUES, PREDICTION_SCORE_THRESHOLD
+
+# Feste Reihenfolge der Kategorien für alle Vektoren und Matrizen
+CATEGORY_KEYS = list(EVALUATION_CRITERIA.keys())
+
+
+def weight_value(weight) -> float:
+    """
+    Wandelt eine Gewichtung ("niedrig"/"mittel"/"hoch" oder Zahl) in einen numerischen Wert um.
+
+    Args:
+        weight: Gewichtung als Label oder Zahl
+
+    Returns:
+        float: Numerische Gewichtung (>= 0)
+    """
+    if isinstance(weight, (int, float)):
+        return max(float(weight), 0.0)
+    return WEIGHT_VALUES.get(weight, WEIGHT_VALUES["mittel"])
+
+
+def weight_vector(criteria_weights: dict = None) -> np.ndarray:
+    """
+    Erstellt den Gewichtungsvektor in der Reihenfolge von CATEGORY_KEYS.
+
+    Args:
+        criteria_weights (dict): Kategorie -> Gewichtung (Label oder Zahl); fehlende Kategorien = "mittel"
+
+    Returns:
+        np.ndarray: Gewichtungen (Länge = Anzahl Kategorien)
+    """
+    criteria_weights = criteria_weights or {}
+    return np.array([weight_value(criteria_weights.get(key, "mittel")) for key in CATEGORY_KEYS], dtype=np.float64)
+
+
+def normalize_category_scores(raw_scores: dict) -> dict:
+    """
+    Bereinigt die Kategorie-Scores aus der Tool-Antwort (Wertebereich begrenzen, fehlende Kategorien weglassen).
+
+    Args:
+        raw_scores (dict): Kategorie -> {"score": Zahl, "confidence": Zahl}
+
+    Returns:
+        dict: Kategorie -> {"score": float 0-10, "confidence": float 0-1}
+    """
+    normalized = {}
+    for key in CATEGORY_KEYS:
+        entry = (raw_scores or {}).get(key)
+        if not isinstance(entry, dict):
+            continue
+        try:
+            score = min(max(float(entry.get("score")), 0.0), 10.0)
+            confidence = min(max(float(entry.get("confidence", 1.0)), 0.0), 1.0)
+        except (TypeError, ValueError):
+            continue
+        normalized[key] = {"score": score, "confidence": confidence}
+    return normalized
+
+
+def score_matrix(category_scores_list: list) -> tuple:
+    """
+    Stapelt die Kategorie-Scores mehrerer Decks zu Matrizen (Decks x Kategorien).
+
+    Args:
+        category_scores_list (list): Liste von Kategorie-Score-Dicts (eines pro Deck)
+
+    Returns:
+        tuple: (Scores, Konfidenzen) als np.ndarray; fehlende Kategorien sind NaN bzw. 0
+    """
+    scores = np.full((len(category_scores_list), len(CATEGORY_KEYS)), np.nan)
+    confidences = np.zeros_like(scores)
+    for row, category_scores in enumerate(category_scores_list):
+        for column, key in enumerate(CATEGORY_KEYS):
+            entry = (category_scores or {}).get(key)
+            if entry:
+                scores[row, column] = entry["score"]
+                confidences[row, column] = entry["confidence"]
+    return scores, confidences
+
+
+def custom_criteria_totals(custom_criteria_list: list) -> np.ndarray:
+    """
+    Summiert die benutzerdefinierten Kriterien pro Deck (Anzahl und Inhalt unterscheiden sich je Deck).
+
+    Args:
+        custom_criteria_list (list): Pro Deck eine Liste von Dicts {"weight", "score", "confidence"}
+
+    Returns:
+        np.ndarray: (Decks x 2) mit gewichteter Score-Summe und Gewichtssumme
+    """
+    totals = np.zeros((len(custom_criteria_list), 2))
+    for row, custom_criteria in enumerate(custom_criteria_list):
+        for criterion in custom_criteria or []:
+            effective = weight_value(criterion.get("weight", "mittel")) * criterion["confidence"]
+            totals[row, 0] += effective * criterion["score"]
+            totals[row, 1] += effective
+    return totals
+
+
+def weighted_scores(scores: np.ndarray, confidences: np.ndarray, weights: np.ndarray, custom_totals: np.ndarray = None) -> np.ndarray:
+    """
+    Berechnet den gewichteten Gesamtscore pro Deck (Gewichtung x Konfidenz, fehlende Kategorien ignoriert).
+
+    Args:
+        scores (np.ndarray): Scores (Decks x Kategorien), NaN für fehlende Werte
+        confidences (np.ndarray): Konfidenzen (Decks x Kategorien)
+        weights (np.ndarray): Gewichtungsvektor (Kategorien)
+        custom_totals (np.ndarray): Optional, Summen der benutzerdefinierten Kriterien (siehe custom_criteria_totals)
+
+    Returns:
+        np.ndarray: Gesamtscore pro Deck (0-10), NaN falls keine Kategorie bewertet wurde
+    """
+    effective = np.where(np.isnan(scores), 0.0, confidences * weights[None, :])
+    total = effective.sum(axis=1)
+    weighted = (effective * np.nan_to_num(scores)).sum(axis=1)
+    if custom_totals is not None:
+        weighted = weighted + custom_totals[:, 0]
+        total = total + custom_totals[:, 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, weighted / total, np.nan)
+
+
+def aggregate_prediction(category_scores: dict, criteria_weights: dict = None, custom_criteria: list = None) -> tuple:
+    """
+    Berechnet Gesamtscore und Prognose eines einzelnen Decks lokal.
+
+    Args:
+        category_scores (dict): Kategorie -> {"score", "confidence"}
+        criteria_weights (dict): Kategorie -> Gewichtung
+        custom_criteria (list): Bewertete benutzerdefinierte Kriterien {"weight", "score", "confidence"}
+
+    Returns:
+        tuple: (Gesamtscore oder None, Prognose oder None) - None, falls keine Kategorie bewertet wurde
+    """
+    if not category_scores:
+        return None, None
+    scores, confidences = score_matrix([category_scores])
+    score = weighted_scores(scores, confidences, weight_vector(criteria_weights), custom_criteria_totals([custom_criteria]))[0]
+    if np.isnan(score):
+        return None, None
+    return round(float(score), 2), bool(score >= PREDICTION_SCORE_THRESHOLD)
+
+
+def compute_traffic_light(pitch_prediction: bool, web_prediction: bool, triggered_red_flags: list = None) -> str:
+    """
+    Bestimmt die Ampel aus beiden Prognosen; getroffene Red Flags führen immer zu Rot.
+
+    Returns:
+        str: "green" (beide positiv), "red" (beide negativ oder Red Flag), "yellow" (gemischt)
+    """
+    if triggered_red_flags:
+        return "red"
+    if pitch_prediction == web_prediction:
+        return "green" if pitch_prediction else "red"
+    return "yellow"
+
+
+def apply_weights(results: dict, criteria_weights: dict) -> bool:
+    """
+    Bewertet ein gespeichertes Ergebnis mit neuen Gewichtungen neu (ohne API-Aufruf).
+
+    Aktualisiert Gesamtscore, Pitch-Deck-Prognose und Ampel direkt im Ergebnis-Dict.
+
+    Args:
+        results (dict): Analyse-Ergebnisse mit results['pitch_deck']['category_scores']
+        criteria_weights (dict): Kategorie -> Gewichtung
+
+    Returns:
+        bool: True, falls sich die Ampel oder der Score geändert hat
+    """
+    pitch_deck = results.get('pitch_deck') or {}
+    score, prediction = aggregate_prediction(pitch_deck.get('category_scores'), criteria_weights, pitch_deck.get('custom_criteria'))
+    if score is None:
+        return False
+
+    final_prediction = compute_traffic_light(
+        prediction,
+        (results.get('web_research') or {}).get('prediction', False),
+        (results.get('red_flags') or {}).get('triggered')
+    )
+    changed = (score, prediction, final_prediction) != (pitch_deck.get('score'), pitch_deck.get('prediction'), results.get('final_prediction'))
+
+    pitch_deck['score'] = score
+    pitch_deck['prediction'] = prediction
+    results['final_prediction'] = final_prediction
+    results['criteria_weights'] = {key: float(value) for key, value in zip(CATEGORY_KEYS, weight_vector(criteria_weights))}
+    return changed
+
+
+def rescore_portfolio(category_scores_list: list, criteria_weights: dict, custom_criteria_list: list = None) -> tuple:
+    """
+    Bewertet ein ganzes Portfolio mit neuen Gewichtungen in einer vektorisierten Operation neu.
+
+    Args:
+        category_scores_list (list): Kategorie-Scores pro Deck
+        criteria_weights (dict): Kategorie -> Gewichtung
+        custom_criteria_list (list): Optional, bewertete benutzerdefinierte Kriterien pro Deck (mit eigener Gewichtung)
+
+    Returns:
+        tuple: (Gesamtscores, Prognosen) als np.ndarray (NaN bzw. False für Decks ohne Kategorie-Scores)
+    """
+    scores, confidences = score_matrix(category_scores_list)
+    custom_totals = custom_criteria_totals(custom_criteria_list) if custom_criteria_list else None
+    totals = weighted_scores(scores, confidences, weight_vector(criteria_weights), custom_totals)
+    return totals, np.nan_to_num(totals, nan=-1.0) >= PREDICTION_SCORE_THRESHOLD
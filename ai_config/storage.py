@@ -0,0 +1,860 @@
+"""
+Persistente Analyse-Historie.
+
+Jede abgeschlossene Analyse wird in einer lokalen SQLite-Datenbank gespeichert, damit
+Ergebnisse einen Neustart oder ein Neuladen des Browsers überleben und ohne erneute
+API-Aufrufe wieder geöffnet werden können. Gespeichert werden:
+- das komplette Ergebnis-Dict (zlib-komprimiertes JSON)
+- die Konfiguration des Laufs (Gewichtungen, Quellen, Red Flags)
+- das verwendete Modell und die Laufzeiten der einzelnen Schritte
+
+Für schnelle Filter sind Deck-Hash, Dateiname, Datum und Ampel als eigene, indizierte Spalten abgelegt.
+Zusätzlich hält ein FTS5-Index die Texte aller Läufe (Begründungen, Zusammenfassung, Wettbewerber-Analyse,
+Red Flags, Quellentitel) für eine gerankte Volltextsuche bereit. Für die Erkennung überarbeiteter Decks
+werden pro Deck die Seitentexte, die MinHash-Signatur und die LSH-Buckets gespeichert (siehe dedup.py).
+Die extrahierten Kennzahlen und die Kategorie-Scores liegen zusätzlich als flache numerische Spalten vor,
+damit Portfolio-Auswertungen sie ohne Entpacken der Ergebnis-Blobs laden können (siehe kpi_analytics.py
+und ranking.py). Für die Suche nach vergleichbaren Decks wird pro Lauf ein dünn besetzter, gehashter
+Term-Vektor über Seitentexte und Begründungen gespeichert (siehe comparables.py).
+"""
+
+#import von packages
+import json
+import re
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+
+from ai_config.config import HISTORY_DB_PATH, KPI_FIELDS, EVALUATION_CRITERIA
+from ai_config.scoring import custom_criteria_totals
+from ai_config.comparables import build_comparable_text, extract_competitors, hashed_term_counts
+
+# Abgeleitete Felder, die beim Laden jederzeit neu berechnet werden können und nicht gespeichert werden
+DERIVED_RESULT_KEYS = {'sources_html'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    deck_hash TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    final_prediction TEXT NOT NULL,
+    red_flag_count INTEGER NOT NULL DEFAULT 0,
+    model TEXT,
+    total_seconds REAL,
+    timings TEXT,
+    config BLOB NOT NULL,
+    results BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_deck_hash ON analyses (deck_hash);
+CREATE INDEX IF NOT EXISTS idx_analyses_filename ON analyses (filename);
+CREATE INDEX IF NOT EXISTS idx_analyses_created_at ON analyses (created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_final_prediction ON analyses (final_prediction, created_at);
+
+CREATE TABLE IF NOT EXISTS deck_signatures (
+    deck_hash TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    page_texts BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deck_lsh (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    deck_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deck_lsh_bucket ON deck_lsh (band, bucket);
+CREATE INDEX IF NOT EXISTS idx_deck_lsh_deck_hash ON deck_lsh (deck_hash);
+"""
+
+# Kennzahlen pro Lauf als eigene REAL-Spalten (NULL = im Deck nicht genannt)
+KPI_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS analysis_kpis (
+    analysis_id INTEGER PRIMARY KEY,
+    deck_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    sector TEXT NOT NULL DEFAULT '',
+    {', '.join(f'{key} REAL' for key in KPI_FIELDS)}
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_kpis_deck_hash ON analysis_kpis (deck_hash);
+"""
+
+# Kategorie-Scores pro Lauf für das Portfolio-Ranking (Score und Konfidenz je Kategorie, NULL = nicht bewertet)
+# sowie die bereits gewichteten Summen der eigenen Kriterien (deren Gewichtung ist Teil des Laufs)
+SCORE_COLUMNS = [f"{category.lower()}_{part}" for category in EVALUATION_CRITERIA for part in ("score", "confidence")]
+
+SCORE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS analysis_scores (
+    analysis_id INTEGER PRIMARY KEY,
+    deck_hash TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    final_prediction TEXT NOT NULL,
+    red_flag_count INTEGER NOT NULL DEFAULT 0,
+    pitch_prediction INTEGER NOT NULL DEFAULT 0,
+    web_prediction INTEGER NOT NULL DEFAULT 0,
+    {', '.join(f'{column} REAL' for column in SCORE_COLUMNS)},
+    custom_weighted REAL NOT NULL DEFAULT 0,
+    custom_weight REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_scores_deck_hash ON analysis_scores (deck_hash);
+"""
+
+# Gehashte Term-Vektoren pro Lauf (Dimensionen als int32-, Häufigkeiten als float32-Bytes) für vergleichbare Decks
+VECTOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_vectors (
+    analysis_id INTEGER PRIMARY KEY,
+    deck_hash TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    final_prediction TEXT NOT NULL,
+    competitors TEXT NOT NULL,
+    term_indices BLOB NOT NULL,
+    term_counts BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_vectors_deck_hash ON analysis_vectors (deck_hash);
+"""
+
+# Modell-Kaskade pro Lauf (nur Läufe mit eingeschalteter Kaskade) für Eskalationsrate und Laufzeit pro Stufe
+CASCADE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_cascade (
+    analysis_id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    screening_model TEXT NOT NULL,
+    escalation_model TEXT NOT NULL,
+    screening_traffic_light TEXT NOT NULL,
+    final_prediction TEXT NOT NULL,
+    escalated INTEGER NOT NULL DEFAULT 0,
+    reasons TEXT NOT NULL,
+    screening_seconds REAL NOT NULL DEFAULT 0,
+    escalation_seconds REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_cascade_created_at ON analysis_cascade (created_at);
+"""
+
+# Volltext-Index (rowid = ID des Laufs); Umlaute und Akzente werden beim Suchen ignoriert
+SEARCH_COLUMNS = ['filename', 'summary', 'pitch_deck', 'web_research', 'competitor_analysis', 'red_flags', 'sources']
+
+SEARCH_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+    {', '.join(SEARCH_COLUMNS)},
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Gewichtung der Spalten für das BM25-Ranking (gleiche Reihenfolge wie SEARCH_COLUMNS)
+SEARCH_WEIGHTS = [3.0, 2.0, 1.0, 1.0, 1.0, 1.5, 0.5]
+
+# Spalten für die Übersicht (ohne die komprimierten Blobs)
+SUMMARY_COLUMNS = "id, deck_hash, filename, created_at, final_prediction, red_flag_count, model, total_seconds"
+
+# Markdown-Zeichen, die vor dem Indizieren entfernt werden (die Treffer-Ausschnitte bleiben dadurch lesbar)
+MARKDOWN_PATTERN = re.compile(r"[*_#`>|]+")
+
+# Phrasen in Anführungszeichen oder einzelne Wörter einer Suchanfrage
+SEARCH_TERM_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def compress_json(data) -> bytes:
+    """
+    Serialisiert ein Objekt als JSON und komprimiert es mit zlib.
+
+    Args:
+        data: JSON-serialisierbares Objekt
+
+    Returns:
+        bytes: Komprimiertes JSON
+    """
+    return zlib.compress(json.dumps(data, ensure_ascii=False, default=str).encode("utf-8"), 6)
+
+
+def decompress_json(blob: bytes):
+    """
+    Entpackt ein mit compress_json gespeichertes Objekt.
+
+    Args:
+        blob (bytes): Komprimiertes JSON
+
+    Returns:
+        Das ursprüngliche Objekt
+    """
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def build_search_document(results: dict) -> dict:
+    """
+    Extrahiert die durchsuchbaren Texte eines Laufs für den Volltext-Index.
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+
+    Returns:
+        dict: Text pro Spalte aus SEARCH_COLUMNS
+    """
+    red_flags = results.get('red_flags') or {}
+    source_titles = []
+    for section in ('web_research', 'competitor_analysis'):
+        for source in (results.get(section) or {}).get('sources') or []:
+            source_titles.append(source.get('title', '') if isinstance(source, dict) else str(source))
+
+    texts = {
+        'summary': results.get('summary', ''),
+        'pitch_deck': (results.get('pitch_deck') or {}).get('reasoning', ''),
+        'web_research': (results.get('web_research') or {}).get('reasoning', ''),
+        'competitor_analysis': (results.get('competitor_analysis') or {}).get('analysis', ''),
+        'red_flags': "\n".join(red_flags.get('triggered') or []) + "\n" + (red_flags.get('reasoning') or ''),
+        'sources': "\n".join(source_titles)
+    }
+    document = {column: MARKDOWN_PATTERN.sub(" ", text or "") for column, text in texts.items()}
+    document['filename'] = results.get('filename', '')
+    return document
+
+
+def build_fts_query(query: str) -> str:
+    """
+    Wandelt eine Nutzereingabe in eine sichere FTS5-Abfrage um.
+
+    Jedes Wort bzw. jede Phrase in Anführungszeichen wird als Phrase gequotet (alle müssen vorkommen),
+    sodass Sonderzeichen in der Eingabe keine FTS5-Syntaxfehler auslösen.
+
+    Args:
+        query (str): Suchanfrage des Nutzers (z.B. '"embedded finance" kmu')
+
+    Returns:
+        str: FTS5 MATCH-Ausdruck (leer, falls keine Suchbegriffe enthalten sind)
+    """
+    terms = []
+    for phrase, word in SEARCH_TERM_PATTERN.findall(query or ""):
+        term = (phrase or word).replace('"', '').strip()
+        if term:
+            terms.append(f'"{term}"')
+    return " ".join(terms)
+
+
+def _filter_conditions(filename: str = "", final_predictions: list = None, deck_hash: str = "", prefix: str = "",
+                       since: str = "", until: str = "") -> tuple:
+    """
+    Baut die WHERE-Bedingungen für Dateiname, Ampel, Deck-Hash und Zeitraum (ISO-Datum, jeweils inklusive).
+
+    Returns:
+        tuple: (Liste von Bedingungen, Liste von Parametern)
+    """
+    conditions, params = [], []
+    if filename:
+        conditions.append(f"{prefix}filename LIKE ?")
+        params.append(f"%{filename}%")
+    if final_predictions:
+        conditions.append(f"{prefix}final_prediction IN ({', '.join('?' for _ in final_predictions)})")
+        params.extend(final_predictions)
+    if deck_hash:
+        conditions.append(f"{prefix}deck_hash = ?")
+        params.append(deck_hash)
+    if since:
+        conditions.append(f"{prefix}created_at >= ?")
+        params.append(since)
+    if until:
+        conditions.append(f"{prefix}created_at < date(?, '+1 day')")
+        params.append(until)
+    return conditions, params
+
+
+class AnalysisStore:
+    """
+    SQLite-Speicher für alle Analyse-Läufe (WAL-Modus, damit Lesen und Schreiben parallel möglich sind).
+
+    Jeder Aufruf öffnet eine eigene kurze Verbindung, dadurch kann die Instanz von mehreren
+    Streamlit-Sessions und Hintergrund-Threads gleichzeitig genutzt werden.
+    """
+
+    def __init__(self, db_path: str = HISTORY_DB_PATH):
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            conn.executescript(SEARCH_SCHEMA)
+            conn.executescript(KPI_SCHEMA)
+            conn.executescript(SCORE_SCHEMA)
+            conn.executescript(VECTOR_SCHEMA)
+            conn.executescript(CASCADE_SCHEMA)
+
+        self._backfill_search_index()
+        self._backfill_kpis()
+        self._backfill_scores()
+        self._backfill_vectors()
+
+    @contextmanager
+    def _connect(self):
+        """
+        Öffnet eine kurze Verbindung zur Datenbank (Zeilen als sqlite3.Row), committet und schließt sie wieder.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_analysis(self, results: dict, config: dict, model: str, timings: dict) -> int:
+        """
+        Speichert einen abgeschlossenen Analyse-Lauf.
+
+        Args:
+            results (dict): Analyse-Ergebnisse aus dem Session State
+            config (dict): Konfiguration des Laufs (Gewichtungen, Quellen, Red Flags, ...)
+            model (str): Verwendetes Claude Modell
+            timings (dict): Laufzeit pro Schritt in Sekunden
+
+        Returns:
+            int: ID des gespeicherten Laufs
+        """
+        stored_results = {key: value for key, value in results.items() if key not in DERIVED_RESULT_KEYS}
+
+        with self._write_lock, self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO analyses (deck_hash, filename, created_at, final_prediction, red_flag_count, "
+                "model, total_seconds, timings, config, results) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    results.get('deck_hash', ''),
+                    results.get('filename', ''),
+                    datetime.now().isoformat(timespec="seconds"),
+                    results.get('final_prediction', 'yellow'),
+                    len((results.get('red_flags') or {}).get('triggered') or []),
+                    model,
+                    round(sum(timings.values()), 2),
+                    json.dumps(timings),
+                    compress_json(config),
+                    compress_json(stored_results)
+                )
+            )
+            analysis_id = cursor.lastrowid
+
+            self._index_results(conn, analysis_id, results)
+            self._store_kpis(conn, analysis_id, results)
+            self._store_scores(conn, analysis_id, results)
+            self._store_vector(conn, analysis_id, results)
+            self._store_cascade(conn, analysis_id, results)
+
+        print(f"Analysis {analysis_id} saved to history ({results.get('filename')})")
+        return analysis_id
+
+    def _index_results(self, conn: sqlite3.Connection, analysis_id: int, results: dict):
+        """
+        Schreibt (oder ersetzt) die Texte eines Laufs im Volltext-Index, innerhalb der laufenden Transaktion.
+        """
+        document = build_search_document(results)
+        conn.execute("DELETE FROM analyses_fts WHERE rowid = ?", (analysis_id,))
+        conn.execute(
+            f"INSERT INTO analyses_fts (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (?, {', '.join('?' for _ in SEARCH_COLUMNS)})",
+            [analysis_id] + [document[column] for column in SEARCH_COLUMNS]
+        )
+
+    def _backfill_search_index(self):
+        """
+        Indiziert Läufe, die gespeichert wurden, bevor es den Volltext-Index gab.
+        """
+        with self._write_lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, results FROM analyses WHERE id NOT IN (SELECT rowid FROM analyses_fts)"
+            ).fetchall()
+            for row in rows:
+                self._index_results(conn, row['id'], decompress_json(row['results']))
+
+        if rows:
+            print(f"Search index backfilled for {len(rows)} analyses")
+
+    def _store_kpis(self, conn: sqlite3.Connection, analysis_id: int, results: dict, created_at: str = None):
+        """
+        Schreibt die Kennzahlen eines Laufs in die KPI-Tabelle, innerhalb der laufenden Transaktion.
+
+        Läufe ohne Kennzahlen erhalten eine leere Zeile, damit der Backfill sie nicht erneut entpackt.
+        """
+        kpis = (results.get('pitch_deck') or {}).get('kpis') or {}
+        conn.execute(
+            f"INSERT OR REPLACE INTO analysis_kpis (analysis_id, deck_hash, created_at, sector, {', '.join(KPI_FIELDS)}) "
+            f"VALUES (?, ?, ?, ?, {', '.join('?' for _ in KPI_FIELDS)})",
+            [
+                analysis_id,
+                results.get('deck_hash', ''),
+                created_at or datetime.now().isoformat(timespec="seconds"),
+                kpis.get('sector') or ''
+            ] + [kpis.get(key) for key in KPI_FIELDS]
+        )
+
+    def _backfill_kpis(self):
+        """
+        Überträgt die Kennzahlen von Läufen, die vor der KPI-Tabelle gespeichert wurden.
+        """
+        with self._write_lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, created_at, results FROM analyses WHERE id NOT IN (SELECT analysis_id FROM analysis_kpis)"
+            ).fetchall()
+            for row in rows:
+                self._store_kpis(conn, row['id'], decompress_json(row['results']), row['created_at'])
+
+        if rows:
+            print(f"KPI table backfilled for {len(rows)} analyses")
+
+    def load_kpi_rows(self) -> list:
+        """
+        Lädt die Kennzahlen des jeweils neuesten Laufs pro Pitch Deck (ohne die Ergebnis-Blobs zu entpacken).
+
+        Returns:
+            list: Tupel (analysis_id, deck_hash, sector, KPI-Werte in der Reihenfolge von KPI_FIELDS)
+        """
+        with self._connect() as conn:
+            return [tuple(row) for row in conn.execute(
+                f"SELECT analysis_id, deck_hash, sector, {', '.join(KPI_FIELDS)} FROM analysis_kpis "
+                "WHERE analysis_id IN (SELECT MAX(analysis_id) FROM analysis_kpis GROUP BY deck_hash) "
+                "ORDER BY analysis_id"
+            )]
+
+    def _store_scores(self, conn: sqlite3.Connection, analysis_id: int, results: dict, created_at: str = None):
+        """
+        Schreibt Kategorie-Scores, Prognosen und Ampel eines Laufs in die Score-Tabelle, innerhalb der laufenden Transaktion.
+        """
+        pitch_deck = results.get('pitch_deck') or {}
+        category_scores = pitch_deck.get('category_scores') or {}
+        custom_weighted, custom_weight = custom_criteria_totals([pitch_deck.get('custom_criteria')])[0]
+        values = []
+        for category in EVALUATION_CRITERIA:
+            entry = category_scores.get(category) or {}
+            values.extend([entry.get('score'), entry.get('confidence')])
+
+        conn.execute(
+            "INSERT OR REPLACE INTO analysis_scores (analysis_id, deck_hash, filename, created_at, final_prediction, "
+            f"red_flag_count, pitch_prediction, web_prediction, {', '.join(SCORE_COLUMNS)}, custom_weighted, custom_weight) "
+            f"VALUES (?, ?, ?, COALESCE(?, (SELECT created_at FROM analyses WHERE id = ?), ?), ?, ?, ?, ?, "
+            f"{', '.join('?' for _ in SCORE_COLUMNS)}, ?, ?)",
+            [
+                analysis_id,
+                results.get('deck_hash', ''),
+                results.get('filename', ''),
+                created_at,
+                analysis_id,
+                datetime.now().isoformat(timespec="seconds"),
+                results.get('final_prediction', 'yellow'),
+                len((results.get('red_flags') or {}).get('triggered') or []),
+                int(bool(pitch_deck.get('prediction'))),
+                int(bool((results.get('web_research') or {}).get('prediction')))
+            ] + values + [float(custom_weighted), float(custom_weight)]
+        )
+
+    def _backfill_scores(self):
+        """
+        Überträgt Kategorie-Scores und Ampel von Läufen, die vor der Score-Tabelle gespeichert wurden.
+        """
+        with self._write_lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, created_at, results FROM analyses WHERE id NOT IN (SELECT analysis_id FROM analysis_scores)"
+            ).fetchall()
+            for row in rows:
+                self._store_scores(conn, row['id'], decompress_json(row['results']), row['created_at'])
+
+        if rows:
+            print(f"Score table backfilled for {len(rows)} analyses")
+
+    def load_score_rows(self) -> list:
+        """
+        Lädt Kategorie-Scores und Ampel des jeweils neuesten Laufs pro Pitch Deck (ohne die Ergebnis-Blobs zu entpacken).
+
+        Returns:
+            list: Dicts mit den Spalten der Tabelle analysis_scores
+        """
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(
+                "SELECT * FROM analysis_scores "
+                "WHERE analysis_id IN (SELECT MAX(analysis_id) FROM analysis_scores GROUP BY deck_hash) "
+                "ORDER BY analysis_id"
+            )]
+
+    def load_score_row(self, analysis_id: int):
+        """
+        Lädt die Score-Zeile eines einzelnen Laufs (z.B. um das Ranking nach dem Speichern zu ergänzen).
+
+        Returns:
+            dict oder None: Spalten der Tabelle analysis_scores
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM analysis_scores WHERE analysis_id = ?", (analysis_id,)).fetchone()
+        return dict(row) if row else None
+
+    def _store_vector(self, conn: sqlite3.Connection, analysis_id: int, results: dict, created_at: str = None):
+        """
+        Schreibt den gehashten Term-Vektor eines Laufs, innerhalb der laufenden Transaktion.
+
+        Die Seitentexte stammen aus deck_signatures; die Signatur des Decks wird daher vor dem Lauf gespeichert.
+        """
+        row = conn.execute("SELECT page_texts FROM deck_signatures WHERE deck_hash = ?", (results.get('deck_hash', ''),)).fetchone()
+        page_texts = decompress_json(row['page_texts']) if row else []
+        indices, counts = hashed_term_counts(build_comparable_text(results, page_texts))
+        conn.execute(
+            "INSERT OR REPLACE INTO analysis_vectors (analysis_id, deck_hash, filename, created_at, final_prediction, "
+            "competitors, term_indices, term_counts) "
+            "VALUES (?, ?, ?, COALESCE(?, (SELECT created_at FROM analyses WHERE id = ?), ?), ?, ?, ?, ?)",
+            (
+                analysis_id,
+                results.get('deck_hash', ''),
+                results.get('filename', ''),
+                created_at,
+                analysis_id,
+                datetime.now().isoformat(timespec="seconds"),
+                results.get('final_prediction', 'yellow'),
+                json.dumps(extract_competitors((results.get('competitor_analysis') or {}).get('analysis', ''))),
+                indices.tobytes(),
+                counts.tobytes()
+            )
+        )
+
+    def _backfill_vectors(self):
+        """
+        Berechnet die Term-Vektoren von Läufen, die vor der Vektor-Tabelle gespeichert wurden.
+        """
+        with self._write_lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, created_at, results FROM analyses WHERE id NOT IN (SELECT analysis_id FROM analysis_vectors)"
+            ).fetchall()
+            for row in rows:
+                self._store_vector(conn, row['id'], decompress_json(row['results']), row['created_at'])
+
+        if rows:
+            print(f"Vector table backfilled for {len(rows)} analyses")
+
+    def load_vector_rows(self, analysis_id: int = None) -> list:
+        """
+        Lädt die Term-Vektoren des jeweils neuesten Laufs pro Pitch Deck (oder eines einzelnen Laufs).
+
+        Args:
+            analysis_id (int): Optional, nur diesen Lauf laden (z.B. um den Index nach dem Speichern zu ergänzen)
+
+        Returns:
+            list: Dicts mit den Spalten der Tabelle analysis_vectors (competitors als Dict)
+        """
+        with self._connect() as conn:
+            if analysis_id is not None:
+                rows = conn.execute("SELECT * FROM analysis_vectors WHERE analysis_id = ?", (analysis_id,)).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM analysis_vectors "
+                    "WHERE analysis_id IN (SELECT MAX(analysis_id) FROM analysis_vectors GROUP BY deck_hash) "
+                    "ORDER BY analysis_id"
+                ).fetchall()
+        return [{**dict(row), 'competitors': json.loads(row['competitors'])} for row in rows]
+
+    def _store_cascade(self, conn: sqlite3.Connection, analysis_id: int, results: dict):
+        """
+        Schreibt Eskalation und Laufzeit pro Stufe eines Laufs mit Modell-Kaskade, innerhalb der laufenden Transaktion.
+        """
+        cascade = results.get('cascade')
+        if not cascade:
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO analysis_cascade (analysis_id, created_at, screening_model, escalation_model, "
+            "screening_traffic_light, final_prediction, escalated, reasons, screening_seconds, escalation_seconds) "
+            "VALUES (?, (SELECT created_at FROM analyses WHERE id = ?), ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                analysis_id,
+                analysis_id,
+                cascade['screening_model'],
+                cascade['escalation_model'],
+                cascade['screening_traffic_light'],
+                results.get('final_prediction', 'yellow'),
+                int(cascade['escalated']),
+                json.dumps(sorted(cascade['reasons'])),
+                cascade['screening_seconds'],
+                cascade['escalation_seconds']
+            )
+        )
+
+    def cascade_statistics(self, since: str = "", until: str = "") -> dict:
+        """
+        Wertet die Modell-Kaskade über alle gespeicherten Läufe aus (Grundlage, um die Schwellwerte anzupassen).
+
+        Args:
+            since (str): Optional, nur Läufe ab diesem Datum (YYYY-MM-DD)
+            until (str): Optional, nur Läufe bis einschließlich zu diesem Datum (YYYY-MM-DD)
+
+        Returns:
+            dict: {"runs", "escalated", "escalation_rate", "reasons" (Grund -> Anzahl),
+                   "changed_traffic_light" (eskalierte Läufe mit anderer Ampel als im Screening),
+                   "tiers" (Stufe -> {"runs", "models", "mean_seconds", "p50_seconds", "p90_seconds"})}
+        """
+        conditions, params = _filter_conditions(since=since, until=until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM analysis_cascade {where}", params).fetchall()
+
+        escalated = [row for row in rows if row['escalated']]
+        reasons = {}
+        for row in escalated:
+            for reason in json.loads(row['reasons']):
+                reasons[reason] = reasons.get(reason, 0) + 1
+
+        def tier(tier_rows: list, model_column: str, seconds_column: str) -> dict:
+            seconds = np.array([row[seconds_column] for row in tier_rows], dtype=np.float64)
+            statistics = {'runs': len(tier_rows), 'models': sorted({row[model_column] for row in tier_rows})}
+            if len(seconds):
+                p50, p90 = np.percentile(seconds, [50, 90])
+                statistics.update(mean_seconds=round(float(seconds.mean()), 2), p50_seconds=round(float(p50), 2), p90_seconds=round(float(p90), 2))
+            return statistics
+
+        return {
+            'runs': len(rows),
+            'escalated': len(escalated),
+            'escalation_rate': len(escalated) / len(rows) if rows else 0.0,
+            'reasons': reasons,
+            'changed_traffic_light': sum(row['final_prediction'] != row['screening_traffic_light'] for row in escalated),
+            'tiers': {
+                'screening': tier(rows, 'screening_model', 'screening_seconds'),
+                'escalation': tier(escalated, 'escalation_model', 'escalation_seconds')
+            }
+        }
+
+    def update_results(self, analysis_id: int, results: dict):
+        """
+        Aktualisiert die Ergebnisse eines gespeicherten Laufs (z.B. nach dem Generieren der E-Mail oder einer neuen Gewichtung).
+
+        Args:
+            analysis_id (int): ID des Laufs
+            results (dict): Aktualisierte Analyse-Ergebnisse
+        """
+        stored_results = {key: value for key, value in results.items() if key not in DERIVED_RESULT_KEYS}
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE analyses SET results = ?, final_prediction = ? WHERE id = ?",
+                (compress_json(stored_results), results.get('final_prediction', 'yellow'), analysis_id)
+            )
+            self._index_results(conn, analysis_id, results)
+            self._store_scores(conn, analysis_id, results)
+            for table in ('analysis_vectors', 'analysis_cascade'):
+                conn.execute(
+                    f"UPDATE {table} SET final_prediction = ? WHERE analysis_id = ?",
+                    (results.get('final_prediction', 'yellow'), analysis_id)
+                )
+
+    def list_analyses(self, filename: str = "", final_predictions: list = None, deck_hash: str = "", limit: int = 100,
+                      since: str = "", until: str = "") -> list:
+        """
+        Listet gespeicherte Läufe (neueste zuerst) ohne die Ergebnisse zu entpacken.
+
+        Args:
+            filename (str): Filter auf den Dateinamen (Teilstring, Groß-/Kleinschreibung egal)
+            final_predictions (list): Filter auf die Ampel (z.B. ["green", "yellow"])
+            deck_hash (str): Filter auf genau ein Pitch Deck
+            limit (int): Maximale Anzahl Einträge
+            since (str): Optional, nur Läufe ab diesem Datum (YYYY-MM-DD)
+            until (str): Optional, nur Läufe bis einschließlich zu diesem Datum (YYYY-MM-DD)
+
+        Returns:
+            list: Liste von Dicts mit den Übersichtsspalten
+        """
+        conditions, params = _filter_conditions(filename, final_predictions, deck_hash, since=since, until=until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM analyses {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, query: str, column: str = "", filename: str = "", final_predictions: list = None, limit: int = 50,
+               since: str = "", until: str = "") -> list:
+        """
+        Durchsucht alle gespeicherten Läufe (FTS5, gerankt mit BM25).
+
+        Args:
+            query (str): Suchanfrage (Wörter müssen alle vorkommen, Phrasen in Anführungszeichen)
+            column (str): Optional nur in einer Spalte aus SEARCH_COLUMNS suchen (z.B. 'red_flags')
+            filename (str): Zusätzlicher Filter auf den Dateinamen
+            final_predictions (list): Zusätzlicher Filter auf die Ampel
+            limit (int): Maximale Anzahl Treffer
+            since (str): Optional, nur Läufe ab diesem Datum (YYYY-MM-DD)
+            until (str): Optional, nur Läufe bis einschließlich zu diesem Datum (YYYY-MM-DD)
+
+        Returns:
+            list: Liste von Dicts mit den Übersichtsspalten sowie 'score' und 'snippet' (beste Treffer zuerst)
+        """
+        fts_query = build_fts_query(query)
+        if not fts_query:
+            return []
+        if column in SEARCH_COLUMNS:
+            fts_query = f"{column} : ({fts_query})"
+
+        conditions, params = _filter_conditions(filename, final_predictions, "", prefix="a.", since=since, until=until)
+        where = "".join(f" AND {condition}" for condition in conditions)
+        weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+        columns = ", ".join(f"a.{name.strip()}" for name in SUMMARY_COLUMNS.split(","))
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {columns}, bm25(analyses_fts, {weights}) AS score, "
+                f"snippet(analyses_fts, -1, '**', '**', ' … ', 16) AS snippet "
+                f"FROM analyses_fts JOIN analyses a ON a.id = analyses_fts.rowid "
+                f"WHERE analyses_fts MATCH ?{where} ORDER BY score LIMIT ?",
+                [fts_query] + params + [limit]
+            ).fetchall()
+
+        hits = [dict(row) for row in rows]
+        for hit in hits:
+            hit['snippet'] = " ".join((hit['snippet'] or "").split())
+        return hits
+
+    def load_kpi_records(self, since: str = "", until: str = "") -> list:
+        """
+        Lädt die Kennzahlen des neuesten Laufs pro Pitch Deck inkl. Dateiname und Ampel (z.B. für Portfolio-Abfragen im Chat).
+
+        Args:
+            since (str): Optional, nur Läufe ab diesem Datum (YYYY-MM-DD)
+            until (str): Optional, nur Läufe bis einschließlich zu diesem Datum (YYYY-MM-DD)
+
+        Returns:
+            list: Dicts mit analysis_id, filename, created_at, final_prediction, sector und den Feldern aus KPI_FIELDS
+        """
+        conditions, params = _filter_conditions(prefix="k.", since=since, until=until)
+        where = "".join(f" AND {condition}" for condition in conditions)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT k.analysis_id, a.filename, k.created_at, a.final_prediction, k.sector, "
+                f"{', '.join(f'k.{key}' for key in KPI_FIELDS)} FROM analysis_kpis k JOIN analyses a ON a.id = k.analysis_id "
+                f"WHERE k.analysis_id IN (SELECT MAX(analysis_id) FROM analysis_kpis GROUP BY deck_hash){where} "
+                "ORDER BY k.created_at DESC",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_red_flag_analyses(self, since: str = "", until: str = "", limit: int = 100) -> list:
+        """
+        Listet den neuesten Lauf pro Pitch Deck mit getroffenen Red Flags (inkl. der Red Flags selbst).
+
+        Args:
+            since (str): Optional, nur Läufe ab diesem Datum (YYYY-MM-DD)
+            until (str): Optional, nur Läufe bis einschließlich zu diesem Datum (YYYY-MM-DD)
+            limit (int): Maximale Anzahl Läufe
+
+        Returns:
+            list: Dicts mit den Übersichtsspalten und 'triggered' (Liste der getroffenen Red Flags), neueste zuerst
+        """
+        conditions, params = _filter_conditions(since=since, until=until)
+        where = "".join(f" AND {condition}" for condition in conditions)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {SUMMARY_COLUMNS}, results FROM analyses "
+                f"WHERE red_flag_count > 0 AND id IN (SELECT MAX(id) FROM analyses GROUP BY deck_hash){where} "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+
+        analyses = []
+        for row in rows:
+            analysis = {key: row[key] for key in row.keys() if key != 'results'}
+            analysis['triggered'] = (decompress_json(row['results']).get('red_flags') or {}).get('triggered') or []
+            analyses.append(analysis)
+        return analyses
+
+    def save_deck_signature(self, deck_hash: str, filename: str, page_texts: list, signature: bytes, band_keys: list):
+        """
+        Speichert Seitentexte und MinHash-Signatur eines Decks und trägt es in die LSH-Buckets ein.
+
+        Args:
+            deck_hash (str): Hash des Pitch Decks
+            filename (str): Dateiname des Pitch Decks
+            page_texts (list): Text pro PDF-Seite (für den Diff gegen spätere Versionen)
+            signature (bytes): MinHash-Signatur als Bytes
+            band_keys (list): (Band, Bucket) Tupel aus dedup.lsh_band_keys
+        """
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO deck_signatures (deck_hash, filename, created_at, signature, page_texts) VALUES (?, ?, ?, ?, ?)",
+                (deck_hash, filename, datetime.now().isoformat(timespec="seconds"), signature, compress_json(page_texts))
+            )
+            conn.execute("DELETE FROM deck_lsh WHERE deck_hash = ?", (deck_hash,))
+            conn.executemany(
+                "INSERT INTO deck_lsh (band, bucket, deck_hash) VALUES (?, ?, ?)",
+                [(band, bucket, deck_hash) for band, bucket in band_keys]
+            )
+
+    def find_deck_candidates(self, band_keys: list) -> list:
+        """
+        Liefert alle Decks, die mindestens einen LSH-Bucket mit der Anfrage teilen.
+
+        Args:
+            band_keys (list): (Band, Bucket) Tupel aus dedup.lsh_band_keys
+
+        Returns:
+            list: Liste von Dicts mit {"deck_hash", "filename", "signature"}
+        """
+        if not band_keys:
+            return []
+
+        values = ", ".join("(?, ?)" for _ in band_keys)
+        params = [value for key in band_keys for value in key]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT s.deck_hash, s.filename, s.signature FROM deck_signatures s WHERE s.deck_hash IN "
+                f"(SELECT DISTINCT deck_hash FROM deck_lsh WHERE (band, bucket) IN (VALUES {values}))",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def load_deck_pages(self, deck_hash: str) -> list:
+        """
+        Lädt die gespeicherten Seitentexte eines Decks.
+
+        Args:
+            deck_hash (str): Hash des Pitch Decks
+
+        Returns:
+            list: Text pro PDF-Seite (leer, falls das Deck nicht gespeichert ist)
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT page_texts FROM deck_signatures WHERE deck_hash = ?", (deck_hash,)).fetchone()
+        return decompress_json(row['page_texts']) if row else []
+
+    def load_analysis(self, analysis_id: int):
+        """
+        Lädt einen gespeicherten Lauf vollständig.
+
+        Args:
+            analysis_id (int): ID des Laufs
+
+        Returns:
+            dict oder None: {"id", "results", "config", "model", "timings", "created_at", ...} oder None, falls nicht vorhanden
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        if row is None:
+            return None
+
+        record = dict(row)
+        record['results'] = decompress_json(row['results'])
+        record['config'] = decompress_json(row['config'])
+        record['timings'] = json.loads(row['timings'] or "{}")
+
+        # Analysedatum und ID für Anzeige, Portfolio-Report und spätere Aktualisierungen mitgeben
+        record['results']['date'] = datetime.fromisoformat(row['created_at']).strftime("%d.%m.%Y")
+        record['results']['analysis_id'] = row['id']
+        return record
+
+    def iter_results(self, analysis_ids: list):
+        """
+        Liefert die Ergebnisse mehrerer Läufe nacheinander (z.B. für den Portfolio-Report),
+        ohne alle gleichzeitig im Speicher zu halten.
+
+        Args:
+            analysis_ids (list): IDs der Läufe
+
+        Yields:
+            dict: Analyse-Ergebnisse eines Laufs
+        """
+        for analysis_id in analysis_ids:
+            record = self.load_analysis(analysis_id)
+            if record is not None:
+                yield record['results']
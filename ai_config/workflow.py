@@ -5,9 +5,29 @@ Dieses Modul koordiniert den gesamten Analyse-Workflow:
 1. Pitch Deck PDF Analyse
 2. Web-Recherche für fehlende Informationen
 3. Zusammenfassung und finale Bewertung
+4. Hintergrund-Aufgaben nach Abschluss der Analyse (z.B. Standard-Fragen vorab beantworten)
+5. Inkrementelle Neuanalyse: Stufen laufen nur erneut, wenn sich ihre Eingaben geändert haben
+6. Benutzerdefinierte Kriterien als einzelne, parallele und gecachte Bewertungen
+7. Red Flag Check mit Cache pro Red Flag (nur neue oder geänderte Red Flags werden geprüft)
+8. Portfolio-Chat über alle gespeicherten Analysen mit lokal ausgeführten Tools
+9. Optional kombinierte Stufe: Red Flag Check und Zusammenfassung in einer Anfrage
+10. Optional Ensemble der Pitch Deck Analyse: parallele Bewertungen mit Mehrheitsentscheid und vorzeitigem Abbruch
+11. Optional parallele Pitch Deck Analyse pro Kategorie, lokal zum Ergebnis von get_prediction zusammengeführt
 """
 
-from ai_config.functions import get_prediction, do_websearch, summary
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from ai_config.scoring import aggregate_prediction, compute_traffic_light
+from ai_config.functions import get_prediction, get_deck_overview, evaluate_category, evaluate_criterion, do_websearch, summary, answer_chat_question, build_chat_context, check_red_flags, format_red_flag_reasoning, answer_portfolio_chat_question, review_and_summarize
+from ai_config.config import client, model, instruction, EVALUATION_CRITERIA, CHAT_TOP_K, RED_FLAG_BATCH_SIZE, PORTFOLIO_CHAT_MAX_TOOL_ROUNDS
+from ai_config.portfolio_tools import PORTFOLIO_TOOLS, PortfolioTools
+from ai_config.retrieval import format_chunks
+from ai_config.rules import apply_kpi_rules
+
+# Gemeinsamer Thread-Pool für Hintergrund-Aufgaben (blockiert die Streamlit-Oberfläche nicht)
+executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="background")
 
 def start_workflow(file_name: str = "", allowed_sources: list = []):
     """
@@ -33,11 +53,16 @@ def start_workflow(file_name: str = "", allowed_sources: list = []):
     alert = {}
 
     # Schritt 1: Pitch Deck Analyse 
-    success_1, prediction_1, reasoning_1, missing = get_prediction(pdf_filename=file_name)
+    success_1, prediction_1, reasoning_1, missing, category_scores, _ = get_prediction(pdf_filename=file_name)
     if not success_1:
         alert = {"error": reasoning_1}
         return alert
 
+    # Prognose lokal aus den Kategorie-Scores (Standard-Gewichtung), Claudes Einschätzung nur als Fallback
+    _, score_prediction = aggregate_prediction(category_scores)
+    if score_prediction is not None:
+        prediction_1 = score_prediction
+
     # Schritt 2: Web-Recherche für fehlende oder zusätzliche Informationen (Beispielsweise falls keine Competitors im Pitchdeck genannt werden --> Identifikation als "missing" --> WebSearch)
     success_2, prediction_2, reasoning_2, sources = do_websearch(missing=missing, allowed_sources=allowed_sources)
     if not success_2:
@@ -54,4 +79,609 @@ def start_workflow(file_name: str = "", allowed_sources: list = []):
         alert = {"error": final_result}
         return alert
 
-    return final_prediction, final_result, (prediction_1, reasoning_1), (prediction_2, reasoning_2, sources)
\ No newline at end of file
+    return final_prediction, final_result, (prediction_1, reasoning_1), (prediction_2, reasoning_2, sources)
+
+def answer_question(results: dict, deck_index, question: str, chat_history: list = []):
+    """
+    Beantwortet eine Frage zu einem analysierten Deck mit den relevantesten Abschnitten aus dem Index.
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+        deck_index (BM25Index): Retrieval-Index des Decks
+        question (str): Frage des Nutzers
+        chat_history (list): Bisheriger Chat-Verlauf ohne die aktuelle Frage
+
+    Returns:
+        Tuple[bool, str]: (Erfolg, Antwort)
+    """
+    hits = deck_index.search(question, k=CHAT_TOP_K)
+    retrieved_context = format_chunks(hits) if deck_index.has_page_text else ""
+
+    return answer_chat_question(
+        client=client,
+        model=model,
+        question=question,
+        chat_history=chat_history,
+        analysis_context=build_chat_context(results),
+        retrieved_context=retrieved_context,
+        pdf_filename=results['filename']
+    )
+
+
+def answer_portfolio_question(store, question: str, chat_history: list = []):
+    """
+    Beantwortet eine Frage über alle gespeicherten Analysen; Claude fragt die Daten über lokale Tools ab.
+
+    Args:
+        store (AnalysisStore): Analyse-Speicher
+        question (str): Frage des Nutzers
+        chat_history (list): Bisheriger Chat-Verlauf ohne die aktuelle Frage
+
+    Returns:
+        Tuple[bool, str, list]: (Erfolg, Antwort, ausgeführte Tool-Aufrufe)
+    """
+    tools = PortfolioTools(store)
+    return answer_portfolio_chat_question(
+        client=client,
+        model=model,
+        question=question,
+        chat_history=chat_history,
+        tools=PORTFOLIO_TOOLS,
+        execute_tool=tools.execute,
+        max_tool_rounds=PORTFOLIO_CHAT_MAX_TOOL_ROUNDS
+    )
+
+
+def precompute_standard_answers(results: dict, deck_index, questions: list, answer_cache=None, generation: int = None):
+    """
+    Beantwortet die Standard-Fragen der Partner parallel, solange der Analyst die Ergebnisse liest.
+
+    Wird direkt nach der Zusammenfassung im Hintergrund gestartet. Die Antworten werden
+    zusätzlich im Antwort-Cache abgelegt, damit auch ähnlich formulierte Fragen im Chat
+    sofort beantwortet werden.
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+        deck_index (BM25Index): Retrieval-Index des Decks
+        questions (list): Liste der Standard-Fragen
+        answer_cache (AnswerCache): Optionaler Antwort-Cache zum Vorbefüllen
+        generation (int): Generation des Decks im Antwort-Cache beim Einplanen (None = beim Start lesen);
+            wird die Analyse inzwischen neu gestartet, landen die Antworten nicht mehr im Cache
+
+    Returns:
+        dict: Frage -> Antwort (nur erfolgreich beantwortete Fragen)
+    """
+    if not questions:
+        return {}
+    if answer_cache is not None and generation is None:
+        generation = answer_cache.generation(results['deck_hash'])
+
+    # Eigener kleiner Pool, damit der gemeinsame Pool nicht durch verschachtelte Aufgaben blockiert wird
+    with ThreadPoolExecutor(max_workers=len(questions)) as pool:
+        futures = {question: pool.submit(answer_question, results, deck_index, question) for question in questions}
+
+    answers = {}
+    for question, future in futures.items():
+        success, answer = future.result()
+        if success:
+            answers[question] = answer
+            if answer_cache is not None:
+                answer_cache.store(results['deck_hash'], question, answer, generation)
+
+    print(f"Standard questions precomputed: {len(answers)}/{len(questions)}")
+    return answers
+
+
+def stage_fingerprint(stage: str, inputs: dict) -> str:
+    """
+    Berechnet einen stabilen Fingerabdruck über alle Eingaben einer Analyse-Stufe.
+
+    Args:
+        stage (str): Name der Stufe (z.B. 'pitch_deck', 'red_flags')
+        inputs (dict): Alle Eingaben der Stufe (Deck-Hash, Instruktion, Quellen, Ergebnisse vorheriger Stufen, Modell)
+
+    Returns:
+        str: SHA-256 Hash (hex)
+    """
+    payload = json.dumps({'stage': stage, 'inputs': inputs}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def run_cached_stage(stage_cache: dict, stage: str, inputs: dict, compute):
+    """
+    Führt eine Analyse-Stufe nur aus, wenn sich ihr Fingerabdruck seit dem letzten Lauf geändert hat.
+
+    Nur erfolgreiche Ergebnisse (erstes Tupel-Element True) werden gemerkt. Da die Ergebnisse
+    vorheriger Stufen Teil der Eingaben sind, laufen abhängige Stufen automatisch mit neu.
+
+    Args:
+        stage_cache (dict): Stufe -> {"fingerprint", "output"} (z.B. aus dem Session State)
+        stage (str): Name der Stufe
+        inputs (dict): Alle Eingaben der Stufe
+        compute (callable): Führt die Stufe aus und liefert ein Tupel (success, ...)
+
+    Returns:
+        tuple: (Ergebnis-Tupel der Stufe, True falls wiederverwendet)
+    """
+    fingerprint = stage_fingerprint(stage, inputs)
+    cached = stage_cache.get(stage)
+    if cached and cached['fingerprint'] == fingerprint:
+        print(f"Stage {stage} unchanged, reusing previous result")
+        return cached['output'], True
+
+    output = compute()
+    if output[0]:
+        stage_cache[stage] = {'fingerprint': fingerprint, 'output': output}
+    return output, False
+
+
+def evaluate_custom_criteria(stage_cache: dict, deck_hash: str, pdf_filename: str, additional_criteria: list, model: str = model):
+    """
+    Bewertet benutzerdefinierte Kriterien einzeln gegen das (im Prompt-Cache liegende) Pitch Deck.
+
+    Jedes Kriterium wird pro (Deck-Hash, Kriteriumstext, Modell) gemerkt. Die Gewichtung ist nicht
+    Teil des Schlüssels, da sie lokal angewendet wird. Ein neues oder geändertes Kriterium kostet
+    damit genau eine kleine Anfrage. Fehlende Kriterien laufen parallel; bei mehreren wird zuerst
+    eines allein ausgeführt, damit die übrigen das Deck bereits aus dem Prompt-Cache lesen.
+
+    Args:
+        stage_cache (dict): Stufen-Cache (z.B. aus dem Session State), Kriterien liegen unter 'custom_criteria'
+        deck_hash (str): SHA-256 Hash des Pitch Decks
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
+        additional_criteria (list): Liste von Dicts mit {"weight": str, "description": str}
+        model (str): Name des zu verwendenden Modells
+
+    Returns:
+        tuple: (Erfolg, Liste der bewerteten Kriterien, Anzahl neuer Anfragen bzw. Fehlermeldung)
+            Bewertetes Kriterium: {"description", "weight", "score", "confidence", "reasoning"}
+    """
+    criterion_cache = stage_cache.setdefault('custom_criteria', {})
+    criteria = [criterion for criterion in additional_criteria or [] if criterion.get("description", "").strip()]
+    fingerprints = [
+        stage_fingerprint('custom_criterion', {'deck_hash': deck_hash, 'criterion': criterion["description"].strip(), 'model': model})
+        for criterion in criteria
+    ]
+
+    # Noch nicht bewertete Kriterien (gleiche Texte nur einmal)
+    pending = {}
+    for criterion, fingerprint in zip(criteria, fingerprints):
+        if fingerprint not in criterion_cache and fingerprint not in pending:
+            pending[fingerprint] = criterion["description"].strip()
+
+    def evaluate(description):
+        return evaluate_criterion(client=client, model=model, pdf_filename=pdf_filename, criterion=description)
+
+    outputs = {}
+    pending_items = list(pending.items())
+    if len(pending_items) > 1:
+        # Erste Anfrage schreibt das Deck in den Prompt-Cache, die übrigen laufen danach parallel
+        first_fingerprint, first_description = pending_items.pop(0)
+        outputs[first_fingerprint] = evaluate(first_description)
+    futures = {fingerprint: executor.submit(evaluate, description) for fingerprint, description in pending_items}
+    for fingerprint, future in futures.items():
+        outputs[fingerprint] = future.result()
+
+    for fingerprint, output in outputs.items():
+        if not output[0]:
+            return False, [], output[3]
+        criterion_cache[fingerprint] = output
+
+    evaluated = []
+    for criterion, fingerprint in zip(criteria, fingerprints):
+        _, score, confidence, reasoning = criterion_cache[fingerprint]
+        evaluated.append({
+            'description': criterion["description"].strip(),
+            'weight': criterion.get("weight", "mittel"),
+            'score': score,
+            'confidence': confidence,
+            'reasoning': reasoning
+        })
+
+    print(f"Custom criteria: {len(outputs)} evaluated, {len(criteria) - len(outputs)} reused")
+    return True, evaluated, len(outputs)
+
+
+def evaluate_pitch_deck_by_category(stage_cache: dict, deck_hash: str, pdf_filename: str, model: str = model):
+    """
+    Bewertet das Pitch Deck mit einer fokussierten Anfrage pro Kategorie statt einer langen Anfrage.
+
+    Der Überblick (Beschreibung, Gesamteinschätzung, KPIs) läuft parallel zu den Kategorien. Von den
+    Kategorien läuft zuerst eine allein, damit die übrigen das Deck bereits aus dem Prompt-Cache lesen
+    (wie bei evaluate_custom_criteria). Überblick und Kategorien werden einzeln pro (Deck-Hash, Text,
+    Modell) gemerkt; eine geänderte Kategorie-Beschreibung kostet damit genau eine Anfrage.
+
+    Args:
+        stage_cache (dict): Stufen-Cache (z.B. aus dem Session State), Teilergebnisse liegen unter 'pitch_deck_categories'
+        deck_hash (str): SHA-256 Hash des Pitch Decks
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
+        model (str): Name des zu verwendenden Modells
+
+    Returns:
+        tuple: Wie get_prediction (Erfolg, Prognose, Begründung bzw. Fehlermeldung, fehlende_Informationen, Kategorie_Scores, KPIs);
+            die Kategorie-Scores enthalten zusätzlich die Begründung pro Kategorie ("reasoning")
+    """
+    part_cache = stage_cache.setdefault('pitch_deck_categories', {})
+    overview_fingerprint = stage_fingerprint('pitch_deck_overview', {'deck_hash': deck_hash, 'model': model})
+    category_fingerprints = {
+        category: stage_fingerprint('pitch_deck_category', {'deck_hash': deck_hash, 'category': category, 'description': description, 'model': model})
+        for category, description in EVALUATION_CRITERIA.items()
+    }
+
+    futures = {}
+    if overview_fingerprint not in part_cache:
+        futures[overview_fingerprint] = executor.submit(get_deck_overview, client=client, model=model, pdf_filename=pdf_filename)
+
+    def evaluate(category):
+        return evaluate_category(client=client, model=model, pdf_filename=pdf_filename, category=category)
+
+    outputs = {}
+    pending = [(fingerprint, category) for category, fingerprint in category_fingerprints.items() if fingerprint not in part_cache]
+    if len(pending) > 1:
+        # Erste Kategorie schreibt das Deck in den Prompt-Cache, die übrigen laufen danach parallel
+        first_fingerprint, first_category = pending.pop(0)
+        outputs[first_fingerprint] = evaluate(first_category)
+    futures.update({fingerprint: executor.submit(evaluate, category) for fingerprint, category in pending})
+    for fingerprint, future in futures.items():
+        outputs[fingerprint] = future.result()
+
+    # Erfolgreiche Teile immer merken, damit nach einem Fehler nur die fehlgeschlagenen Anfragen wiederholt werden
+    errors = []
+    for fingerprint, output in outputs.items():
+        if output[0]:
+            part_cache[fingerprint] = output
+        else:
+            errors.append(output[2] if fingerprint == overview_fingerprint else output[3])
+    if errors:
+        return False, False, errors[0], "", {}, {}
+
+    # Lokal zusammenführen (gleiches Format wie get_prediction)
+    _, prediction, reasoning, pitch, kpis = part_cache[overview_fingerprint]
+    category_scores = {}
+    missing_parts = []
+    for category, fingerprint in category_fingerprints.items():
+        _, score, confidence, category_reasoning, category_missing = part_cache[fingerprint]
+        category_scores[category] = {'score': score, 'confidence': confidence, 'reasoning': category_reasoning}
+        if category_missing.strip():
+            missing_parts.append(f"{category}: {category_missing.strip()}")
+    missing = " ".join([pitch, *missing_parts]) + " Recherchiere Informationen über den Markt und die Gründer"
+
+    print(f"Category evaluation: {len(outputs)} requests, {len(category_fingerprints) + 1 - len(outputs)} reused")
+    return True, prediction, reasoning, missing, category_scores, kpis
+
+
+def merge_category_scores(category_scores_list: list) -> dict:
+    """
+    Mittelt Score und Konfidenz pro Kategorie über mehrere Bewertungen (nur Kategorien, die bewertet wurden).
+
+    Args:
+        category_scores_list (list): Kategorie-Scores pro Bewertung
+
+    Returns:
+        dict: Kategorie -> {"score", "confidence"}
+    """
+    merged = {}
+    for category in EVALUATION_CRITERIA:
+        entries = [scores[category] for scores in category_scores_list if category in (scores or {})]
+        if entries:
+            merged[category] = {
+                'score': round(sum(entry['score'] for entry in entries) / len(entries), 2),
+                'confidence': round(sum(entry['confidence'] for entry in entries) / len(entries), 2)
+            }
+    return merged
+
+
+def evaluate_pitch_deck_ensemble(stage_cache: dict, deck_hash: str, pdf_filename: str, models: list, vote):
+    """
+    Bewertet das Pitch Deck mehrfach parallel und entscheidet per Mehrheit (Self-Consistency).
+
+    Jede Bewertung wird pro (Deck-Hash, Instruktion, Modell, Nummer) gemerkt, unabhängig von der Gewichtung.
+    Die Stimmen werden bei jedem Aufruf lokal mit vote neu ausgezählt; fehlende Bewertungen laufen
+    gleichzeitig in einem eigenen kleinen Thread-Pool (belegt nicht den gemeinsamen executor) und der Aufruf
+    kehrt zurück, sobald eine Seite die Mehrheit aller len(models) Stimmen hat. Noch laufende Bewertungen
+    lassen sich nicht abbrechen; sie werden unter 'pitch_deck_running_samples' gemerkt und beim nächsten Lauf
+    übernommen bzw. abgewartet statt neu gestartet. Der Stufen-Cache wird nur im aufrufenden Thread beschrieben.
+
+    Args:
+        stage_cache (dict): Stufen-Cache (z.B. aus dem Session State), Bewertungen liegen unter 'pitch_deck_samples'
+        deck_hash (str): SHA-256 Hash des Pitch Decks
+        pdf_filename (str): Dateiname des PDF (liegt im tmp/ Ordner)
+        models (list): Modell pro Bewertung (gleiches Modell mehrfach oder verschiedene Modelle)
+        vote (callable): Ergebnis-Tupel von get_prediction -> bool (Prognose dieser Bewertung)
+
+    Returns:
+        tuple: (Erfolg, Prognose von Claude, Begründung bzw. Fehlermeldung, fehlende_Informationen, Kategorie_Scores, KPIs, Ensemble)
+            Begründung, fehlende Informationen und KPIs stammen aus der ersten Bewertung der Mehrheit, die
+            Kategorie-Scores sind über alle Bewertungen der Mehrheit gemittelt.
+            Ensemble: {"models", "votes" [{"model", "prediction"}], "prediction", "agreeing",
+            "agreement" (agreeing / len(models), 0-1), "early_stop"}
+    """
+    sample_cache = stage_cache.setdefault('pitch_deck_samples', {})
+    running = stage_cache.setdefault('pitch_deck_running_samples', {})
+    fingerprints = [
+        stage_fingerprint('pitch_deck_sample', {'deck_hash': deck_hash, 'instruction': instruction, 'model': sample_model, 'sample': number})
+        for number, sample_model in enumerate(models)
+    ]
+    majority = len(models) // 2 + 1
+
+    # Inzwischen fertige Bewertungen aus früheren Läufen übernehmen
+    for fingerprint, future in list(running.items()):
+        if future.done():
+            del running[fingerprint]
+            if not future.cancelled() and future.exception() is None and future.result()[0]:
+                sample_cache[fingerprint] = future.result()
+
+    outputs = {number: sample_cache[fingerprint] for number, fingerprint in enumerate(fingerprints) if fingerprint in sample_cache}
+    votes = {number: vote(output) for number, output in outputs.items()}
+
+    def decided() -> bool:
+        return max(sum(votes.values()), len(votes) - sum(votes.values())) >= majority
+
+    pending = {}
+    pool = None
+    if not decided() and len(outputs) < len(models):
+        missing_numbers = [number for number in range(len(models)) if number not in outputs]
+        pool = ThreadPoolExecutor(max_workers=len(missing_numbers), thread_name_prefix="ensemble")
+        for number in missing_numbers:
+            # Noch laufende Bewertung aus einem früheren Lauf abwarten statt neu zu starten
+            future = running.pop(fingerprints[number], None) or pool.submit(
+                get_prediction, client=client, model=models[number], instruction=instruction, pdf_filename=pdf_filename
+            )
+            pending[future] = number
+
+    error = ""
+    while pending and not decided():
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            number = pending.pop(future)
+            output = future.result()
+            if output[0]:
+                outputs[number] = output
+                votes[number] = vote(output)
+                sample_cache[fingerprints[number]] = output
+            else:
+                error = output[2]
+
+    # Nicht gestartete Bewertungen verwerfen, laufende für den nächsten Lauf merken
+    for future, number in pending.items():
+        if not future.cancel():
+            running[fingerprints[number]] = future
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if not votes:
+        return False, False, error or "No prediction received", "", {}, {}, None
+
+    # Mehrheit der abgegebenen Stimmen; bei Gleichstand (nur nach Fehlern möglich) entscheidet die erste Bewertung
+    positive = sum(votes.values())
+    prediction = positive * 2 > len(votes) if positive * 2 != len(votes) else votes[min(votes)]
+    agreeing = sorted(number for number, sample_vote in votes.items() if sample_vote == prediction)
+
+    _, llm_prediction, reasoning, missing, _, kpis = outputs[agreeing[0]]
+    category_scores = merge_category_scores([outputs[number][4] for number in agreeing])
+    ensemble = {
+        'models': list(models),
+        'votes': [{'model': models[number], 'prediction': votes[number]} for number in sorted(votes)],
+        'prediction': prediction,
+        'agreeing': len(agreeing),
+        'agreement': round(len(agreeing) / len(models), 2),
+        'early_stop': len(votes) < len(models)
+    }
+    print(f"Ensemble: {len(agreeing)}/{len(votes)} votes for {prediction} ({len(models)} samples configured)")
+    return True, llm_prediction, reasoning, missing, category_scores, kpis, ensemble
+
+
+def normalize_flag(flag: str) -> str:
+    """
+    Normalisiert den Text einer Red Flag für den Cache (Groß-/Kleinschreibung, Leerzeichen, Satzzeichen am Ende).
+
+    Args:
+        flag (str): Red Flag wie vom Nutzer eingegeben
+
+    Returns:
+        str: Normalisierter Text
+    """
+    return " ".join(flag.lower().split()).rstrip(".!;:,")
+
+
+def prepare_red_flags(stage_cache: dict, red_flags_list: list, pitch_deck_analysis: str, web_research_analysis: str,
+                      competitor_analysis: str, model: str = model, kpis: dict = None) -> tuple:
+    """
+    Wertet die lokalen KPI-Regeln aus und bestimmt, welche Red Flags noch von Claude geprüft werden müssen.
+
+    Returns:
+        tuple: (lokal getroffene Red Flags {flag: Begründung}, Red Flags für Claude, Cache-Schlüssel dieser Red Flags,
+            noch nicht geprüfte Red Flags {Schlüssel: flag}, Cache pro Red Flag)
+    """
+    rule_triggered, llm_flags, rule_count = apply_kpi_rules(red_flags_list, kpis)
+    if rule_count:
+        print(f"Red flags: {rule_count} decided by local KPI rules")
+
+    flag_cache = stage_cache.setdefault('red_flag_results', {})
+    analysis_fingerprint = stage_fingerprint('red_flags', {
+        'pitch_deck': pitch_deck_analysis,
+        'web_research': web_research_analysis,
+        'competitor_analysis': competitor_analysis,
+        'model': model
+    })
+    keys = [(analysis_fingerprint, normalize_flag(flag)) for flag in llm_flags]
+
+    # Noch nicht geprüfte Red Flags (gleiche normalisierte Texte nur einmal)
+    pending = {}
+    for flag, key in zip(llm_flags, keys):
+        if key not in flag_cache and key not in pending:
+            pending[key] = flag
+
+    return rule_triggered, llm_flags, keys, pending, flag_cache
+
+
+def collect_red_flags(red_flags_list: list, rule_triggered: dict, llm_flags: list, keys: list, flag_cache: dict) -> dict:
+    """
+    Setzt die getroffenen Red Flags aus lokalen Regeln und Cache in der Reihenfolge der Eingabe zusammen.
+
+    Returns:
+        dict: Getroffene Red Flag -> Begründung (gleiche normalisierte Red Flags nur einmal)
+    """
+    llm_results = {flag: flag_cache[key] for flag, key in zip(llm_flags, keys)}
+    triggered_flags = {}
+    seen = set()
+    for flag in red_flags_list:
+        normalized = normalize_flag(flag)
+        reasoning = rule_triggered.get(flag) or llm_results.get(flag)
+        if reasoning is not None and normalized not in seen:
+            triggered_flags[flag] = reasoning
+        seen.add(normalized)
+    return triggered_flags
+
+
+def evaluate_red_flags(stage_cache: dict, red_flags_list: list, pitch_deck_analysis: str, web_research_analysis: str,
+                       competitor_analysis: str, model: str = model, batch_size: int = RED_FLAG_BATCH_SIZE, kpis: dict = None):
+    """
+    Prüft Red Flags mit einem Cache pro Red Flag.
+
+    Quantitative Red Flags (z.B. "Runway < 12 Monate") werden zuerst lokal gegen den KPI-Datensatz
+    ausgewertet (siehe ai_config/rules.py); nur qualitative Red Flags und Regeln ohne passende
+    Kennzahl gehen an Claude.
+    Das Ergebnis jeder Red Flag wird unter (Fingerabdruck der Analyse, normalisierte Red Flag) gemerkt.
+    Nur neue oder geänderte Red Flags werden an Claude geschickt; lange Listen werden in Batches
+    aufgeteilt und parallel geprüft. Getroffene Red Flags und Begründung werden aus dem Cache
+    in der Reihenfolge der Eingabe zusammengesetzt.
+
+    Args:
+        stage_cache (dict): Stufen-Cache (z.B. aus dem Session State), Ergebnisse liegen unter 'red_flag_results'
+        red_flags_list (list): Liste der zu prüfenden Red Flags
+        pitch_deck_analysis (str): Begründung aus der Pitch Deck Analyse
+        web_research_analysis (str): Begründung aus der Web-Recherche
+        competitor_analysis (str): Wettbewerber-Analyse
+        model (str): Name des zu verwendenden Modells
+        batch_size (int): Maximale Anzahl Red Flags pro Anfrage
+        kpis (dict): KPI-Datensatz des Decks für die lokalen Regeln
+
+    Returns:
+        tuple: (Erfolg, Getroffene_Red_Flags, Begründung bzw. Fehlermeldung, Anzahl neu per LLM geprüfter Red Flags)
+    """
+    rule_triggered, llm_flags, keys, pending, flag_cache = prepare_red_flags(
+        stage_cache, red_flags_list, pitch_deck_analysis, web_research_analysis, competitor_analysis, model, kpis
+    )
+
+    pending_items = list(pending.items())
+    batches = [pending_items[i:i + batch_size] for i in range(0, len(pending_items), batch_size)]
+
+    def check(batch):
+        return check_red_flags(
+            client=client,
+            model=model,
+            pitch_deck_analysis=pitch_deck_analysis,
+            web_research_analysis=web_research_analysis,
+            competitor_analysis=competitor_analysis,
+            red_flags_list=[flag for _, flag in batch]
+        )
+
+    if len(batches) > 1:
+        outputs = list(executor.map(check, batches))
+    else:
+        outputs = [check(batch) for batch in batches]
+
+    for batch, (success, triggered, error) in zip(batches, outputs):
+        if not success:
+            return False, [], error, 0
+        # Nicht getroffene Red Flags werden als None gemerkt
+        for key, flag in batch:
+            flag_cache[key] = triggered.get(flag)
+
+    triggered_flags = collect_red_flags(red_flags_list, rule_triggered, llm_flags, keys, flag_cache)
+
+    print(f"Red flags: {len(pending_items)} checked in {len(batches)} batch(es), {len(llm_flags) - len(pending_items)} reused")
+    return True, list(triggered_flags), format_red_flag_reasoning(triggered_flags), len(pending_items)
+
+
+def summary_stage_inputs(pitch_deck_analysis: str, web_research_analysis: str, model: str = model) -> dict:
+    """
+    Eingaben der getrennten Zusammenfassung für den Stufen-Cache.
+
+    Der Zusammenfassungstext hängt nur von den Begründungen ab, die Ampel wird danach lokal bestimmt.
+    Die kombinierte Stufe ergänzt Prognosen und getroffene Red Flags (siehe review_and_summarize_stage).
+    """
+    return {
+        'pitch_deck': pitch_deck_analysis,
+        'web_research': web_research_analysis,
+        'model': model
+    }
+
+
+def review_and_summarize_stage(stage_cache: dict, red_flags_list: list, pitch_deck_analysis: str, web_research_analysis: str,
+                               competitor_analysis: str, prediction: bool, web_prediction: bool, model: str = model, kpis: dict = None):
+    """
+    Kombinierte Stufe: Red Flag Check und Zusammenfassung in einer einzigen Anfrage.
+
+    Nutzt denselben Cache pro Red Flag wie evaluate_red_flags, daher kann zwischen beiden Modi gewechselt
+    werden, ohne Red Flags neu prüfen zu lassen. Zusammenfassung und Ampel-Begründung liegen dagegen unter
+    'fused_summary', da der Prompt auch die Prognosen und die getroffenen Red Flags enthält (die getrennte
+    Zusammenfassung unter 'summary' hängt nur von den Begründungen ab). Sie werden wiederverwendet, solange
+    Begründungen, Prognosen und getroffene Red Flags gleich sind und keine Red Flag neu zu prüfen ist.
+
+    Args:
+        stage_cache (dict): Stufen-Cache (z.B. aus dem Session State)
+        red_flags_list (list): Liste der zu prüfenden Red Flags (kann leer sein)
+        pitch_deck_analysis (str): Begründung aus der Pitch Deck Analyse
+        web_research_analysis (str): Begründung aus der Web-Recherche
+        competitor_analysis (str): Wettbewerber-Analyse
+        prediction (bool): Prognose der Pitch Deck Analyse
+        web_prediction (bool): Prognose der Web-Recherche
+        model (str): Name des zu verwendenden Modells
+        kpis (dict): KPI-Datensatz des Decks für die lokalen Regeln
+
+    Returns:
+        tuple: (Erfolg, Getroffene_Red_Flags, Red-Flag-Begründung bzw. Fehlermeldung, Zusammenfassung,
+            Ampel-Begründung (leer, falls nicht verfügbar), Anzahl neu per LLM geprüfter Red Flags, Zusammenfassung wiederverwendet)
+    """
+    def fused_fingerprint(triggered_flags: list) -> str:
+        return stage_fingerprint('fused_summary', {
+            **summary_stage_inputs(pitch_deck_analysis, web_research_analysis, model),
+            'prediction': prediction,
+            'web_prediction': web_prediction,
+            'triggered': list(triggered_flags)
+        })
+
+    rule_triggered, llm_flags, keys, pending, flag_cache = prepare_red_flags(
+        stage_cache, red_flags_list, pitch_deck_analysis, web_research_analysis, competitor_analysis, model, kpis
+    )
+
+    if not pending:
+        # Alle Red Flags entschieden: Zusammenfassung wiederverwenden, falls sie zu denselben Treffern gehört
+        triggered_flags = collect_red_flags(red_flags_list, rule_triggered, llm_flags, keys, flag_cache)
+        cached = stage_cache.get('fused_summary')
+        if cached and cached['fingerprint'] == fused_fingerprint(triggered_flags):
+            return True, list(triggered_flags), format_red_flag_reasoning(triggered_flags), cached['summary'], cached['rationale'], 0, True
+
+    # Bereits bekannte Treffer (lokale Regeln oder letzter Lauf) fließen nur in die Ampel-Begründung ein
+    cached_results = {flag: flag_cache.get(key) for flag, key in zip(llm_flags, keys)}
+    known_triggered = [flag for flag in red_flags_list if rule_triggered.get(flag) or cached_results.get(flag)]
+
+    pending_items = list(pending.items())
+    success, triggered, summary_text, rationale, error = review_and_summarize(
+        client=client,
+        model=model,
+        pitch_deck_analysis=pitch_deck_analysis,
+        web_research_analysis=web_research_analysis,
+        competitor_analysis=competitor_analysis,
+        red_flags_list=[flag for _, flag in pending_items],
+        score_1=prediction,
+        score_2=web_prediction,
+        known_triggered_flags=known_triggered
+    )
+    if not success:
+        return False, [], error, "", "", 0, False
+
+    # Ergebnisse in den Cache pro Red Flag schreiben (nicht getroffene Red Flags als None)
+    for key, flag in pending_items:
+        flag_cache[key] = triggered.get(flag)
+
+    triggered_flags = collect_red_flags(red_flags_list, rule_triggered, llm_flags, keys, flag_cache)
+    stage_cache['fused_summary'] = {
+        'fingerprint': fused_fingerprint(triggered_flags),
+        'summary': summary_text,
+        'rationale': rationale
+    }
+
+    print(f"Review and summary: {len(pending_items)} red flag(s) checked together with the summary, {len(llm_flags) - len(pending_items)} reused")
+    return True, list(triggered_flags), format_red_flag_reasoning(triggered_flags), summary_text, rationale, len(pending_items), False
@@ -17,12 +17,25 @@ Technologien:
 
 import streamlit as st
 import os
+import time
 from pathlib import Path
-from ai_config.functions import get_prediction, do_websearch, summary, generate_email, do_competitor_analysis, check_red_flags
-from ai_config.config import client, model, instruction, EVALUATION_CRITERIA, build_instruction_with_weights
-from ai_config.pdf_export import generate_executive_summary_pdf
+from ai_config.functions import get_prediction, do_websearch, summary, generate_email, do_competitor_analysis
+from ai_config.config import client, model, instruction, EVALUATION_CRITERIA, WEIGHT_VALUES, KPI_FIELDS, CHAT_HISTORY_MESSAGES, STANDARD_QUESTIONS, COMPARABLE_DECKS_LIMIT, FUSED_REVIEW_STAGE, STAGE_MODELS, CASCADE_MODE, CASCADE_SCREENING_MODEL, CASCADE_ESCALATION_MODEL, CASCADE_MIN_CONFIDENCE, CASCADE_RED_FLAG_MARGIN, ENSEMBLE_MODE, ENSEMBLE_MODELS, CATEGORY_EVALUATION_MODE, SEARCH_DEPTH_PROFILES, SEARCH_DEPTH
+from ai_config.workflow import executor, answer_question, precompute_standard_answers, run_cached_stage, evaluate_custom_criteria, evaluate_red_flags, answer_portfolio_question, summary_stage_inputs, review_and_summarize_stage, evaluate_pitch_deck_ensemble, evaluate_pitch_deck_by_category
+from ai_config.retrieval import build_deck_index, compute_deck_hash
+from ai_config.answer_cache import AnswerCache
+from application.functionality import build_sources_html
+from ai_config.pdf_export import get_executive_summary_pdf, get_cached_summary_pdf, generate_portfolio_report_pdf, snapshot_pdf_results
+from ai_config.storage import AnalysisStore
+from ai_config.kpi_analytics import KpiTable, KPI_COLUMNS
+from ai_config.ranking import ScoreTable
+from ai_config.comparables import ComparableIndex, build_comparable_text, hashed_term_counts
+from ai_config.dedup import fingerprint_upload, find_similar_decks, lsh_band_keys, diff_decks
+from ai_config.scoring import aggregate_prediction, compute_traffic_light, apply_weights, weight_value
+from ai_config.rules import DERIVED_KPI_FIELDS, kpi_label, kpi_value, format_kpi_value, parse_rule, apply_kpi_rules
+from ai_config.cascade import ESCALATION_REASONS, escalation_reasons
 import urllib.parse
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Seiten-Konfiguration
 st.set_page_config(
@@ -33,7 +46,8 @@ st.set_page_config(
 )
 
 # Custom CSS Styling für Hintergrundanimation, Glassmorphismus-Effekte, interaktive Hover-States
-st.markdown("""
+# Statische Konstante: wird nur bei kompletten Reruns ausgegeben, nicht bei Fragment-Reruns (Chat, E-Mail, Export)
+APP_CSS = """
 <style>
     /* Animierter Gradient-Hintergrund */
     @keyframes gradientShift {
@@ -629,122 +643,685 @@ st.markdown("""
         align-items: center;
         gap: 8px;
     }
+
+    /* Eingeklappte weitere Quellen */
+    .sources-section details > summary {
+        cursor: pointer;
+        list-style: none;
+        margin-top: 12px;
+    }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # Initialisiere Session State Variablen
 # Session State ermöglicht das Speichern von Daten zwischen Seitenaufrufen, ohne Datenbank oder komplexe Client-Server Architektur
 if 'page' not in st.session_state:
-    st.session_state.page = 'config'  # Aktuelle Seite: 'config' (Konfiguration) oder 'results' (Ergebnisse)
+    st.session_state.page = 'config'  # Aktuelle Seite: 'config' (Konfiguration), 'results' (Ergebnisse) oder 'history' (Historie)
 if 'results' not in st.session_state:
     st.session_state.results = None  # Speichert alle Analyse-Ergebnisse
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []  # Speichert Chat-Verlauf
+if 'portfolio_chat_history' not in st.session_state:
+    st.session_state.portfolio_chat_history = []  # Chat-Verlauf des Portfolio-Chats (über alle gespeicherten Analysen)
 if 'workflow_completed' not in st.session_state:
     st.session_state.workflow_completed = False  # Flag ob Analyse abgeschlossen
 if 'uploaded_file' not in st.session_state:
     st.session_state.uploaded_file = None  # Hochgeladenes PDF (Pitchdeck)
 if 'allowed_sources' not in st.session_state:
-    st.session_state.allowed_sources = []  # Erlaubte Quellen für Web-Recherche
+    st.session_state.allowed_sources = []  # Quellen für die Web-Recherche (erlaubt oder ausgeschlossen, siehe source_mode)
+if 'source_mode' not in st.session_state:
+    st.session_state.source_mode = 'allowed'  # 'allowed' = nur diese Quellen, 'blocked' = diese Quellen ausschließen
+if 'search_depth' not in st.session_state:
+    st.session_state.search_depth = SEARCH_DEPTH  # Profil aus SEARCH_DEPTH_PROFILES
 if 'criteria_weights' not in st.session_state:
     st.session_state.criteria_weights = {key: "mittel" for key in EVALUATION_CRITERIA.keys()}  # Gewichtungen für Standard-Kriterien
 if 'additional_criteria' not in st.session_state:
     st.session_state.additional_criteria = []  # Zusätzliche Kriterien mit Gewichtung [{"weight": str, "description": str}]
 if 'red_flags' not in st.session_state:
     st.session_state.red_flags = ""  # Red Flags die automatisch zur roten Ampel führen
+if 'fused_review' not in st.session_state:
+    st.session_state.fused_review = FUSED_REVIEW_STAGE  # Red Flag Check und Zusammenfassung in einer Anfrage
+if 'cascade_mode' not in st.session_state:
+    st.session_state.cascade_mode = CASCADE_MODE  # Schnelles Modell zuerst, nur unklare Decks mit dem stärkeren Modell
+if 'ensemble_mode' not in st.session_state:
+    st.session_state.ensemble_mode = ENSEMBLE_MODE  # Mehrere parallele Pitch Deck Bewertungen mit Mehrheitsentscheid
+if 'category_mode' not in st.session_state:
+    st.session_state.category_mode = CATEGORY_EVALUATION_MODE  # Eine parallele Anfrage pro Bewertungskategorie
+if 'deck_index' not in st.session_state:
+    st.session_state.deck_index = None  # Lokaler Retrieval-Index über Deck-Seiten und Analyse-Ergebnisse für den Chat
+if 'standard_questions' not in st.session_state:
+    st.session_state.standard_questions = "\n".join(STANDARD_QUESTIONS)  # Standard-Fragen, die nach der Analyse vorab beantwortet werden
+if 'standard_answers_future' not in st.session_state:
+    st.session_state.standard_answers_future = None  # Hintergrund-Aufgabe für die Standard-Fragen
+if 'deck_fingerprint' not in st.session_state:
+    st.session_state.deck_fingerprint = None  # Deck-Hash, Seitentexte und MinHash-Signatur des aktuellen Uploads
+if 'stage_cache' not in st.session_state:
+    st.session_state.stage_cache = {}  # Ergebnisse und Eingabe-Fingerabdrücke der einzelnen Analyse-Stufen (für inkrementelle Neuanalyse)
+
+# Prozessweiter Antwort-Cache, damit alle Analysten von bereits beantworteten Fragen profitieren
+@st.cache_resource
+def get_answer_cache():
+    """
+    Liefert den gemeinsamen Antwort-Cache aller Sessions.
+
+    Returns:
+        AnswerCache: Antwort-Cache pro Pitch Deck
+    """
+    return AnswerCache()
+
+# Persistente Analyse-Historie (SQLite), gemeinsam für alle Sessions
+@st.cache_resource
+def get_analysis_store():
+    """
+    Liefert den gemeinsamen Speicher für die Analyse-Historie.
+
+    Returns:
+        AnalysisStore: SQLite-Speicher aller Analyse-Läufe
+    """
+    return AnalysisStore()
+
+# Spaltenorientierte KPI-Tabelle aller Decks, einmal geladen und danach inkrementell ergänzt
+@st.cache_resource
+def get_kpi_table():
+    """
+    Liefert die gemeinsame KPI-Tabelle für Portfolio-Vergleiche.
+
+    Returns:
+        KpiTable: KPI-Spalten aller gespeicherten Decks
+    """
+    return KpiTable.from_store(get_analysis_store())
+
+# Kategorie-Scores aller Decks für das Portfolio-Ranking, einmal geladen und danach inkrementell ergänzt
+@st.cache_resource
+def get_score_table():
+    """
+    Liefert die gemeinsame Score-Tabelle für das Portfolio-Ranking.
+
+    Returns:
+        ScoreTable: Kategorie-Scores, Prognosen und Red Flags aller gespeicherten Decks
+    """
+    return ScoreTable.from_store(get_analysis_store())
+
+# Vektor-Index aller Decks für die Suche nach vergleichbaren Decks, einmal geladen und danach inkrementell ergänzt
+@st.cache_resource
+def get_comparable_index():
+    """
+    Liefert den gemeinsamen Index für die Suche nach vergleichbaren Decks.
+
+    Returns:
+        ComparableIndex: Term-Vektoren aller gespeicherten Decks
+    """
+    return ComparableIndex.from_store(get_analysis_store())
 
 # Hilfsfunktion zum Rendern von Quellen als Cards (bessere Darstellung)
-def render_sources(sources: list):
+def render_sources(results: dict, section: str):
+    """
+    Rendert die Quellen eines Ergebnis-Abschnitts als Cards in einem einzigen Aufruf.
+
+    Das HTML (inkl. lokal gecachter Favicons) wird einmal pro Ergebnis berechnet und mit
+    den Ergebnissen gespeichert, sodass Reruns nur noch ein fertiges Fragment ausgeben.
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+        section (str): Ergebnis-Abschnitt mit Quellen ('web_research' oder 'competitor_analysis')
+    """
+    sources_html = results.setdefault('sources_html', {})
+    if section not in sources_html:
+        sources_html[section] = build_sources_html(results[section]['sources'])
+
+    if sources_html[section]:
+        st.markdown(sources_html[section], unsafe_allow_html=True)
+
+# Öffnet eine gespeicherte Analyse aus der Historie (ohne API-Aufrufe)
+def open_stored_analysis(analysis_id: int):
+    """
+    Lädt eine gespeicherte Analyse in den Session State und wechselt zur Ergebnisseite.
+
+    Args:
+        analysis_id (int): ID des gespeicherten Laufs
+    """
+    record = get_analysis_store().load_analysis(analysis_id)
+    st.session_state.results = record['results']
+    st.session_state.workflow_completed = True
+    st.session_state.chat_history = []
+    st.session_state.generated_email = record['results'].get('email')
+    st.session_state.deck_index = None
+    st.session_state.standard_answers_future = None
+    st.session_state.page = 'results'
+    st.rerun()
+
+# Startet die Erzeugung der Executive Summary PDF im Hintergrund
+def schedule_summary_pdf(results: dict):
+    """
+    Erzeugt die Executive Summary PDF in einem Hintergrund-Thread, falls sich die Ergebnisse geändert haben.
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+    """
+    if get_cached_summary_pdf(results) is None:
+        # Tiefe Kopie: die Gewichtungs-Regler ändern z.B. results['pitch_deck'] direkt, während der Build noch läuft
+        executor.submit(get_executive_summary_pdf, snapshot_pdf_results(results))
+
+# Bewertet das aktuelle Ergebnis mit den Reglern neu (Callback, läuft vor dem Rerun der Seite)
+def on_live_weights_changed(weight_keys: dict):
     """
-    Rendert Quellen als schöne Cards mit separater Darstellung von LinkedIn-Links.
+    Wendet die Gewichtungs-Regler lokal auf die Kategorie-Scores an (kein API-Aufruf).
+
+    Args:
+        weight_keys (dict): Kategorie -> Session-State-Key des Reglers
+    """
+    results = st.session_state.results
+    weights = {category: st.session_state[key] for category, key in weight_keys.items()}
+    if apply_weights(results, weights):
+        schedule_summary_pdf(results)
+    if results.get('analysis_id'):
+        get_analysis_store().update_results(results['analysis_id'], results)
+        get_comparable_index().set_final_prediction(results['analysis_id'], results['final_prediction'])
+
+
+def render_weighting_section(results: dict):
+    """
+    Regler zur Gewichtung der Kategorien; Score, Prognose und Ampel werden sofort lokal neu berechnet.
+
+    Kein Fragment: die Ampel oberhalb muss beim Verschieben eines Reglers mit aktualisiert werden.
 
     Args:
-        sources (list): Liste von Quellen (dict mit 'url' und 'title' oder string)
+        results (dict): Analyse-Ergebnisse
     """
-    if not sources:
+    if not results['pitch_deck'].get('category_scores'):
         return
 
-    # Kategorisiere Quellen
-    linkedin_sources = []
-    other_sources = []
+    current_weights = results.get('criteria_weights') or st.session_state.criteria_weights
+    # Keys pro Lauf, damit beim Öffnen eines anderen Laufs dessen Gewichtungen übernommen werden
+    weight_keys = {
+        category: f"live_weight_{results.get('analysis_id', 'current')}_{category}"
+        for category in EVALUATION_CRITERIA.keys()
+    }
 
-    for source in sources:
-        if isinstance(source, dict):
-            url = source.get('url', '')
-            title = source.get('title', url)
+    with st.expander("⚖️ Gewichtung live anpassen", expanded=False):
+        st.caption(
+            f"Gewichtung der Kategorie-Scores (Stufen: {', '.join(f'{label} = {value}' for label, value in WEIGHT_VALUES.items())}). "
+            "Score, Prognose und Ampel werden sofort neu berechnet, ohne erneute Analyse."
+        )
+        columns = st.columns(3)
+        for index, (category, key) in enumerate(weight_keys.items()):
+            with columns[index % 3]:
+                st.slider(
+                    category,
+                    min_value=0.0,
+                    max_value=3.0,
+                    step=0.25,
+                    value=weight_value(current_weights.get(category, "mittel")),
+                    key=key,
+                    on_change=on_live_weights_changed,
+                    args=(weight_keys,)
+                )
 
-            if 'linkedin.com' in url.lower():
-                linkedin_sources.append({'url': url, 'title': title})
-            else:
-                other_sources.append({'url': url, 'title': title})
-        elif isinstance(source, str):
-            if 'linkedin.com' in source.lower():
-                linkedin_sources.append({'url': source, 'title': source})
+        score = results['pitch_deck'].get('score')
+        if score is not None:
+            st.markdown(f"**Gewichteter Pitch-Deck-Score:** {score:.1f} / 10")
+
+# ===== ERGEBNIS-BEREICHE ALS FRAGMENTE =====
+# Jeder Bereich läuft bei Interaktionen (Button, Chat) eigenständig neu, statt die gesamte Seite neu zu rendern
+@st.fragment
+def render_export_section(results: dict):
+    """
+    Export-Bereich als eigenes Fragment (ein Klick rendert nur diesen Bereich neu).
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+    """
+    # PDF-Export-Button
+    st.markdown("---")
+    st.markdown("### 📄 Export")
+
+    col_pdf1, col_pdf2, col_pdf3 = st.columns([1, 2, 1])
+    with col_pdf2:
+        st.info("💡 Exportiere eine professionelle PDF-Zusammenfassung mit allen wichtigen Ergebnissen")
+
+        try:
+            # Erstelle Dateinamen
+            startup_name = results.get('filename', 'startup').replace('.pdf', '').replace(' ', '_')
+            date_str = datetime.now().strftime("%Y%m%d")
+            pdf_filename = f"Executive_Summary_{startup_name}_{date_str}.pdf"
+
+            # Das PDF wird nach dem Speichern der Ergebnisse im Hintergrund vorbereitet. Beim Klick wird
+            # es aus dem Cache ausgeliefert und nur neu erzeugt, falls sich die Ergebnisse inzwischen
+            # geändert haben (z.B. durch eine neu generierte E-Mail).
+            st.download_button(
+                label="📄 Executive Summary als PDF herunterladen",
+                data=lambda: get_executive_summary_pdf(snapshot_pdf_results(results)),
+                file_name=pdf_filename,
+                mime="application/pdf",
+                on_click="ignore",
+                type="secondary",
+                use_container_width=True
+            )
+
+        except Exception as e:
+            st.error(f"❌ Fehler beim Generieren der PDF: {str(e)}")
+            st.exception(e)
+
+    st.markdown("---")
+
+
+@st.fragment
+def render_detail_section(results: dict):
+    """
+    Detaillierte Begründungen in Akkordeon-Elementen als eigenes Fragment.
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+    """
+    # Detaillierte Begründungen in Akkordeon-Elementen
+    st.markdown("### 🔍 Detaillierte Analyse")
+
+    with st.expander("📄 Pitch Deck Analyse", expanded=False):
+        prediction_emoji = "✅" if results['pitch_deck']['prediction'] else "❌"
+        st.markdown(f"**Prognose:** {prediction_emoji} {'Erfolg' if results['pitch_deck']['prediction'] else 'Misserfolg'}")
+        if results['pitch_deck'].get('score') is not None:
+            st.markdown(f"**Gewichteter Score:** {results['pitch_deck']['score']:.1f} / 10")
+        if results['pitch_deck'].get('category_scores'):
+            st.dataframe(
+                [
+                    {
+                        'Kategorie': category,
+                        'Score': entry['score'],
+                        'Konfidenz': entry['confidence'],
+                        # Begründung pro Kategorie nur bei der parallelen Bewertung pro Kategorie
+                        **({'Begründung': entry['reasoning']} if entry.get('reasoning') else {})
+                    }
+                    for category, entry in results['pitch_deck']['category_scores'].items()
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+        if results['pitch_deck'].get('kpis'):
+            kpis = results['pitch_deck']['kpis']
+            st.markdown(f"**Kennzahlen laut Pitch Deck** (Branche: {kpis.get('sector') or '–'}):")
+            st.dataframe(
+                [
+                    {'Kennzahl': kpi_label(key), 'Wert': format_kpi_value(key, kpi_value(kpis, key))}
+                    for key in [*KPI_FIELDS, *DERIVED_KPI_FIELDS]
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+        if results['pitch_deck'].get('custom_criteria'):
+            st.markdown("**Eigene Kriterien:**")
+            for criterion in results['pitch_deck']['custom_criteria']:
+                st.markdown(
+                    f"- **{criterion['description']}** ({criterion['weight']}): {criterion['score']:.1f} / 10 "
+                    f"(Konfidenz {criterion['confidence']:.0%}) - {criterion['reasoning']}"
+                )
+        st.markdown("**Begründung:**")
+        st.markdown(results['pitch_deck']['reasoning'])
+
+    # Red Flags-Akkordeon (falls vorhanden)
+    if results.get('red_flags') and results['red_flags'].get('triggered'):
+        with st.expander("🚨 K.O.-Kriterien Check", expanded=True):
+            st.markdown(f"**Status:** ❌ {len(results['red_flags']['triggered'])} Red Flag(s) getroffen")
+            st.markdown("**Details:**")
+            st.markdown(results['red_flags']['reasoning'])
+
+    with st.expander("🔍 Wettbewerber-Screening", expanded=False):
+        st.markdown(results['competitor_analysis']['analysis'])
+
+        if results['competitor_analysis']['sources']:
+            render_sources(results, 'competitor_analysis')
+
+    with st.expander("🌐 Web-Recherche & Markt-Trends", expanded=False):
+        prediction_emoji = "✅" if results['web_research']['prediction'] else "❌"
+        st.markdown(f"**Prognose:** {prediction_emoji} {'Erfolg' if results['web_research']['prediction'] else 'Misserfolg'}")
+        st.markdown("**Analyse (inkl. aktueller Markt-Trends):**")
+        st.markdown(results['web_research']['reasoning'])
+
+        if results['web_research']['sources']:
+            render_sources(results, 'web_research')
+
+
+@st.fragment
+def render_kpi_comparison_section(results: dict):
+    """
+    Vergleich der Kennzahlen des Decks mit allen bisherigen Decks und der eigenen Branche (eigenes Fragment).
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+    """
+    kpis = results['pitch_deck'].get('kpis')
+    if not kpis or all(kpi_value(kpis, key) is None for key in KPI_COLUMNS):
+        return
+
+    kpi_table = get_kpi_table()
+    analysis_id = results.get('analysis_id')
+    comparison = kpi_table.compare(kpis, exclude_analysis_id=analysis_id)
+    if not any(row['overall_count'] for row in comparison):
+        return
+
+    def format_rank(rank, count):
+        return f"{rank:.0f}. Perzentil (n={count})" if rank is not None else "–"
+
+    with st.expander("📊 KPI-Vergleich mit bisherigen Decks", expanded=False):
+        sector = kpis.get('sector') or "unbekannt"
+        st.caption(f"Perzentil = Anteil der bisherigen Decks mit niedrigerem Wert. Branche: {sector}. Gezählt wird der neueste Lauf pro Deck.")
+        st.dataframe(
+            [
+                {
+                    'Kennzahl': kpi_label(row['kpi']),
+                    'Dieses Deck': format_kpi_value(row['kpi'], row['value']),
+                    'Alle Decks': format_rank(row['overall_rank'], row['overall_count']),
+                    'Median alle': format_kpi_value(row['kpi'], row['overall_median']),
+                    'Branche': format_rank(row['sector_rank'], row['sector_count']),
+                    'Median Branche': format_kpi_value(row['kpi'], row['sector_median'])
+                }
+                for row in comparison if row['value'] is not None
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+
+        # Verteilung einer Kennzahl pro Branche
+        available = [row['kpi'] for row in comparison if row['overall_count']]
+        selected_kpi = st.selectbox(
+            "Verteilung nach Branche",
+            available,
+            format_func=kpi_label,
+            key="kpi_cohort_select"
+        )
+        cohorts = kpi_table.cohort_summary(selected_kpi, exclude_analysis_id=analysis_id)
+        st.dataframe(
+            [
+                {
+                    'Branche': cohort['sector'],
+                    'Decks': cohort['count'],
+                    '25. Perzentil': format_kpi_value(selected_kpi, cohort['p25']),
+                    'Median': format_kpi_value(selected_kpi, cohort['median']),
+                    '75. Perzentil': format_kpi_value(selected_kpi, cohort['p75'])
+                }
+                for cohort in cohorts
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+        st.caption(f"Dieses Deck: {format_kpi_value(selected_kpi, kpi_value(kpis, selected_kpi))}")
+
+
+@st.fragment
+def render_comparable_decks_section(results: dict):
+    """
+    Vergleichbare, bereits analysierte Decks mit ihrer Ampel und ihren Wettbewerbern (eigenes Fragment).
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+    """
+    comparable_index = get_comparable_index()
+    search_start = time.perf_counter()
+    comparables = comparable_index.similar_to_deck(results.get('deck_hash', ''), limit=COMPARABLE_DECKS_LIMIT)
+    if comparables is None:
+        # Deck (noch) nicht im Index, z.B. ein nicht gespeicherter Lauf: Vektor direkt aus den Ergebnissen bilden
+        page_texts = get_analysis_store().load_deck_pages(results.get('deck_hash', ''))
+        indices, counts = hashed_term_counts(build_comparable_text(results, page_texts))
+        comparables = comparable_index.query(indices, counts, exclude_deck_hash=results.get('deck_hash'), limit=COMPARABLE_DECKS_LIMIT)
+    search_ms = (time.perf_counter() - search_start) * 1000
+    if not comparables:
+        return
+
+    light_labels = {'green': '🟢', 'yellow': '🟡', 'red': '🔴'}
+    with st.expander("🔍 Vergleichbare Decks", expanded=False):
+        st.caption(
+            f"Ähnlichste bisher analysierte Decks nach Seitentexten und Begründungen "
+            f"({len(comparable_index)} Decks durchsucht in {search_ms:.1f} ms)"
+        )
+        for comparable in comparables:
+            col_info, col_open = st.columns([5, 1])
+            with col_info:
+                date = datetime.fromisoformat(comparable['created_at']).strftime("%d.%m.%Y")
+                st.markdown(
+                    f"{light_labels.get(comparable['final_prediction'], '🟡')} **{comparable['filename']}** "
+                    f"· {date} · Ähnlichkeit {comparable['similarity']:.0%}"
+                )
+                competitors = comparable['competitors'].get('direct', []) + comparable['competitors'].get('indirect', [])
+                if competitors:
+                    st.caption("Wettbewerber: " + ", ".join(competitors))
+            with col_open:
+                if st.button("Öffnen", key=f"open_comparable_{comparable['analysis_id']}", use_container_width=True):
+                    open_stored_analysis(comparable['analysis_id'])
+
+
+@st.fragment
+def render_email_section(results: dict):
+    """
+    E-Mail-Generierung als eigenes Fragment (Generieren rendert nur diesen Bereich neu).
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+    """
+    # E-Mail-Generierungsbereich
+    st.markdown("---")
+    st.markdown('<div class="sub-header">E-Mail-Antwort generieren</div>', unsafe_allow_html=True)
+
+    # Initialisiere E-Mail-Status, falls nicht vorhanden
+    if 'generated_email' not in st.session_state:
+        st.session_state.generated_email = None
+
+    col_email1, col_email2, col_email3 = st.columns([1, 2, 1])
+    with col_email2:
+        # Bestimme E-Mail-Typ (Einladung oder Absage)
+        email_type = "invitation" if results['final_prediction'] == 'green' else "rejection"
+        email_icon = "✅" if email_type == "invitation" else "📧"
+        email_type_de = "Einladung" if email_type == "invitation" else "Absage"
+
+        st.info(f"{email_icon} E-Mail-Typ: **{email_type_de}** - Basierend auf {'positiven' if email_type == 'invitation' else 'gemischten oder negativen'} Analyse-Ergebnissen")
+
+        if st.button("📝 E-Mail generieren", type="primary", use_container_width=True):
+            with st.spinner("Personalisierte E-Mail wird generiert..."):
+                # Extrahiere Startup-Namen aus Dateinamen (entferne .pdf-Endung)
+                startup_name = results['filename'].replace('.pdf', '').replace('_', ' ').replace('-', ' ').title()
+
+                success, subject, body = generate_email(
+                    model=model,
+                    final_prediction=results['final_prediction'],
+                    pitch_deck_reasoning=results['pitch_deck']['reasoning'],
+                    web_research_reasoning=results['web_research']['reasoning'],
+                    summary_text=results['summary'],
+                    startup_name=startup_name
+                )
+
+                if success:
+                    st.session_state.generated_email = {
+                        'subject': subject,
+                        'body': body,
+                        'type': email_type
+                    }
+                    # E-Mail ist Teil der Executive Summary -> PDF im Hintergrund aktualisieren
+                    results['email'] = st.session_state.generated_email
+                    schedule_summary_pdf(results)
+                    # E-Mail auch in der Historie speichern
+                    if results.get('analysis_id'):
+                        get_analysis_store().update_results(results['analysis_id'], results)
+                    st.success("✅ E-Mail erfolgreich generiert!")
+
+    # Zeige generierte E-Mail an, falls verfügbar
+    if st.session_state.generated_email:
+        st.markdown("### 📧 Generierte E-Mail")
+        email_data = st.session_state.generated_email
+
+        with st.container():
+            st.markdown(f"**Betreff:** {email_data['subject']}")
+            st.markdown("**Nachricht:**")
+            st.markdown(email_data['body'])
+            st.markdown('</div>', unsafe_allow_html=True)
+
+        # Erstelle mailto-Link
+        col_mail1, col_mail2, col_mail3 = st.columns([1, 2, 1])
+        with col_mail2:
+            # URL-kodiere Betreff und Text
+            encoded_subject = urllib.parse.quote(email_data['subject'])
+            encoded_body = urllib.parse.quote(email_data['body'])
+            mailto_link = f"mailto:?subject={encoded_subject}&body={encoded_body}"
+
+            st.markdown(f"""
+                <a href="{mailto_link}" target="_blank">
+                    <button style="
+                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                        color: white;
+                        border: none;
+                        border-radius: 12px;
+                        padding: 12px 24px;
+                        font-weight: 600;
+                        font-size: 1.1rem;
+                        cursor: pointer;
+                        width: 100%;
+                        box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);
+                        transition: all 0.3s ease;
+                    ">
+                        📬 In E-Mail-Programm öffnen
+                    </button>
+                </a>
+            """, unsafe_allow_html=True)
+
+            st.caption("Klicken, um diese E-Mail in deinem Standard-E-Mail-Programm zu öffnen")
+
+
+def render_chat_section(results: dict):
+    """
+    Chat-Interface mit den Analyse-Ergebnissen.
+
+    Wird auf der Ergebnisseite als Fragment ausgeführt; solange die Standard-Fragen im
+    Hintergrund laufen, mit regelmäßiger Aktualisierung.
+
+    Args:
+        results (dict): Analyse-Ergebnisse
+    """
+    # ===== CHAT-INTERFACE =====
+    # Ermöglicht interaktive Fragen zu den Analyse-Ergebnissen mit Zugriff auf das PDF und Web-Suche
+    st.markdown("---")
+    st.markdown('<div class="sub-header">💬 Chat mit deinen Daten</div>', unsafe_allow_html=True)
+    st.markdown("Stelle Fragen zu den Analyse-Ergebnissen")
+
+    # Retrieval-Index wird einmal pro Deck gebaut (z.B. nach einem Neuladen der Seite erneut)
+    if st.session_state.deck_index is None:
+        st.session_state.deck_index = build_deck_index(results['filename'], results)
+
+    if 'deck_hash' not in results:
+        results['deck_hash'] = compute_deck_hash(results['filename'])
+
+    # Vorab beantwortete Standard-Fragen übernehmen, sobald die Hintergrund-Aufgabe fertig ist
+    standard_future = st.session_state.standard_answers_future
+    if 'standard_answers' not in results and standard_future is not None and standard_future.done():
+        results['standard_answers'] = standard_future.result()
+        if results.get('analysis_id'):
+            get_analysis_store().update_results(results['analysis_id'], results)
+        # Einmaliger kompletter Rerun, damit das Fragment nicht weiter regelmäßig aktualisiert wird
+        st.rerun()
+
+    if results.get('standard_answers'):
+        st.markdown("**📌 Standard-Fragen** (sofort verfügbar)")
+        question_cols = st.columns(2)
+        for idx, (question, answer) in enumerate(results['standard_answers'].items()):
+            with question_cols[idx % 2]:
+                if st.button(question, key=f"standard_question_{idx}", use_container_width=True):
+                    st.session_state.chat_history.append({"role": "user", "content": question})
+                    st.session_state.chat_history.append({"role": "assistant", "content": answer, "cached": True})
+    elif standard_future is not None and not standard_future.done():
+        st.caption("⏳ Standard-Fragen werden im Hintergrund vorbereitet...")
+
+    # Zeige bisherigen Chat-Verlauf
+    for message in st.session_state.chat_history:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if message.get("cached"):
+                st.caption("⚡ Antwort aus dem Cache")
+
+    # Chat-Eingabefeld
+    if prompt := st.chat_input("Stelle eine Frage zur Analyse..."):
+        # Letzte Nachrichten als Verlauf (ohne die aktuelle Frage)
+        recent_history = st.session_state.chat_history[-CHAT_HISTORY_MESSAGES:]
+
+        # Füge Nutzer-Nachricht zum Chat-Verlauf hinzu
+        st.session_state.chat_history.append({"role": "user", "content": prompt})
+
+        # Zeige Nutzer-Nachricht sofort an
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        # Generiere Antwort mit Claude (oder aus dem Antwort-Cache)
+        with st.chat_message("assistant"):
+            cached_answer = get_answer_cache().lookup(results['deck_hash'], prompt)
+
+            if cached_answer:
+                assistant_message, similarity = cached_answer
+                st.markdown(assistant_message)
+                st.caption(f"⚡ Antwort aus dem Cache (Ähnlichkeit {similarity:.0%})")
             else:
-                other_sources.append({'url': source, 'title': source})
-
-    # Rendere LinkedIn-Quellen (Founders)
-    if linkedin_sources:
-        st.markdown('<div class="sources-section">', unsafe_allow_html=True)
-        st.markdown('<div class="sources-subtitle">👥 Team & Founder Profile</div>', unsafe_allow_html=True)
-
-        for source in linkedin_sources:
-            url = source['url']
-            title = source['title']
-
-            # Extrahiere Domain für Favicon
-            domain = url.split('/')[2] if len(url.split('/')) > 2 else url
-
-            card_html = f"""
-            <a href="{url}" target="_blank" class="source-card linkedin-card">
-                <div class="source-icon">
-                    <img src="https://www.google.com/s2/favicons?domain={domain}&sz=32"
-                         onerror="this.style.display='none'; this.nextElementSibling.style.display='block';"
-                         style="width: 32px; height: 32px;"/>
-                    <span style="display: none;">💼</span>
-                </div>
-                <div class="source-content">
-                    <div class="source-title">{title}</div>
-                    <div class="source-url">{domain}</div>
-                </div>
-            </a>
-            """
-            st.markdown(card_html, unsafe_allow_html=True)
+                with st.spinner("Denke nach..."):
+                    # Nur die relevantesten Abschnitte mit Seitenangabe mitschicken
+                    success, assistant_message = answer_question(
+                        results,
+                        st.session_state.deck_index,
+                        prompt,
+                        chat_history=recent_history
+                    )
 
-        st.markdown('</div>', unsafe_allow_html=True)
+                # Nur erfolgreiche Antworten cachen
+                if success:
+                    get_answer_cache().store(results['deck_hash'], prompt, assistant_message)
 
-    # Rendere übrige Quellen
-    if other_sources:
-        st.markdown('<div class="sources-section">', unsafe_allow_html=True)
-        st.markdown('<div class="sources-subtitle">🔗 Weitere Quellen</div>', unsafe_allow_html=True)
-
-        for source in other_sources:
-            url = source['url']
-            title = source['title']
-
-            # Extrahiere Domain für Favicon
-            domain = url.split('/')[2] if len(url.split('/')) > 2 else url
-
-            # Icon basierend auf Domain
-            icon = "📰"
-
-            card_html = f"""
-            <a href="{url}" target="_blank" class="source-card">
-                <div class="source-icon">
-                    <img src="https://www.google.com/s2/favicons?domain={domain}&sz=32"
-                         onerror="this.style.display='none'; this.nextElementSibling.style.display='block';"
-                         style="width: 32px; height: 32px;"/>
-                    <span style="display: none;">{icon}</span>
-                </div>
-                <div class="source-content">
-                    <div class="source-title">{title}</div>
-                    <div class="source-url">{domain}</div>
-                </div>
-            </a>
-            """
-            st.markdown(card_html, unsafe_allow_html=True)
+                # Zeige Assistenten-Nachricht an
+                st.markdown(assistant_message)
 
-        st.markdown('</div>', unsafe_allow_html=True)
+            # Füge Assistenten-Nachricht zum Chat-Verlauf hinzu
+            st.session_state.chat_history.append({
+                "role": "assistant",
+                "content": assistant_message,
+                "cached": bool(cached_answer)
+            })
+
+@st.fragment
+def render_portfolio_chat_section():
+    """
+    Portfolio-Chat über alle gespeicherten Analysen (eigenes Fragment auf der Historienseite).
+
+    Claude fragt die benötigten Daten über lokale Tools ab (Suche, einzelner Lauf, KPI-Auswertung,
+    Decks mit Red Flags), statt das Portfolio im Prompt zu erhalten.
+    """
+    st.markdown("---")
+    st.markdown("### 💬 Portfolio-Chat")
+    st.markdown("Stelle Fragen über alle gespeicherten Analysen, z.B. *Welche SaaS-Decks dieses Quartal hatten Runway unter 12 Monaten?*")
+
+    for message in st.session_state.portfolio_chat_history:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if message.get("tool_calls"):
+                st.caption("🔧 Abgefragt: " + ", ".join(call["name"] for call in message["tool_calls"]))
+
+    if prompt := st.chat_input("Frage zum Portfolio...", key="portfolio_chat_input"):
+        recent_history = [
+            {"role": message["role"], "content": message["content"]}
+            for message in st.session_state.portfolio_chat_history[-CHAT_HISTORY_MESSAGES:]
+        ]
+        st.session_state.portfolio_chat_history.append({"role": "user", "content": prompt})
+
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        with st.chat_message("assistant"):
+            with st.spinner("Durchsuche das Portfolio..."):
+                success, assistant_message, tool_calls = answer_portfolio_question(
+                    get_analysis_store(),
+                    prompt,
+                    chat_history=recent_history
+                )
+            st.markdown(assistant_message)
+            if tool_calls:
+                st.caption("🔧 Abgefragt: " + ", ".join(call["name"] for call in tool_calls))
+
+        st.session_state.portfolio_chat_history.append({
+            "role": "assistant",
+            "content": assistant_message,
+            "tool_calls": tool_calls
+        })
 
 # Haupt-Header der Anwendung
 st.markdown('<div class="main-header">🚀 F Technologies Pitch Deck Analysator</div>', unsafe_allow_html=True)
@@ -758,6 +1335,17 @@ if st.session_state.page == 'config':
     col1, col2, col3 = st.columns([1, 2, 1])
 
     with col2:
+        # Zugriff auf frühere Analysen (ohne erneute API-Aufrufe)
+        col_history, col_ranking = st.columns(2)
+        with col_history:
+            if st.button("📚 Analyse-Historie öffnen", use_container_width=True):
+                st.session_state.page = 'history'
+                st.rerun()
+        with col_ranking:
+            if st.button("🏆 Portfolio-Ranking öffnen", use_container_width=True):
+                st.session_state.page = 'ranking'
+                st.rerun()
+
         # Datei-Upload Bereich
         st.markdown("### 📄 Pitch Deck hochladen")
         uploaded_file = st.file_uploader(
@@ -771,19 +1359,78 @@ if st.session_state.page == 'config':
             st.session_state.uploaded_file = uploaded_file
             st.success(f"✅ Datei hochgeladen: {uploaded_file.name}")
 
+            # Signatur einmal pro Upload berechnen und nach ähnlichen, bereits analysierten Decks suchen
+            fingerprint = st.session_state.deck_fingerprint
+            if fingerprint is None or fingerprint['file_id'] != uploaded_file.file_id:
+                fingerprint = fingerprint_upload(bytes(uploaded_file.getbuffer()))
+                fingerprint['file_id'] = uploaded_file.file_id
+                fingerprint['similar'] = find_similar_decks(get_analysis_store(), fingerprint['signature'])
+                st.session_state.deck_fingerprint = fingerprint
+
+            for similar_deck in fingerprint['similar'][:3]:
+                previous_runs = get_analysis_store().list_analyses(deck_hash=similar_deck['deck_hash'], limit=1)
+                if not previous_runs:
+                    continue
+                previous_run = previous_runs[0]
+                previous_date = datetime.fromisoformat(previous_run['created_at']).strftime("%d.%m.%Y")
+                identical = similar_deck['deck_hash'] == fingerprint['deck_hash']
+
+                if identical:
+                    st.warning(f"♻️ Dieses Deck wurde bereits am {previous_date} analysiert ({previous_run['filename']})")
+                else:
+                    st.warning(
+                        f"🔁 Ähnlich zu **{similar_deck['filename']}** ({similar_deck['similarity']:.0%} Übereinstimmung), "
+                        f"analysiert am {previous_date} - wahrscheinlich eine überarbeitete Version"
+                    )
+
+                col_reuse, col_diff = st.columns(2)
+                with col_reuse:
+                    if st.button("♻️ Frühere Analyse öffnen", key=f"reuse_{previous_run['id']}", use_container_width=True):
+                        open_stored_analysis(previous_run['id'])
+                with col_diff:
+                    show_diff = not identical and st.toggle("🔍 Unterschiede anzeigen", key=f"diff_{similar_deck['deck_hash']}")
+
+                if show_diff:
+                    deck_diff = diff_decks(get_analysis_store().load_deck_pages(similar_deck['deck_hash']), fingerprint['page_texts'])
+                    if deck_diff:
+                        st.code(deck_diff, language="diff")
+                    else:
+                        st.info("Der Text beider Versionen ist identisch (Unterschiede nur in Layout oder Bildern)")
+
         st.markdown("---")
 
         # Konfiguration der Web-Suchquellen
         st.markdown("### 🔍 Web-Suchquellen")
         default_sources = []
+        source_modes = {'allowed': "Nur diese Quellen durchsuchen", 'blocked': "Diese Quellen ausschließen"}
+        st.session_state.source_mode = st.radio(
+            "Quellen-Filter",
+            list(source_modes.keys()),
+            index=list(source_modes.keys()).index(st.session_state.source_mode),
+            format_func=lambda mode: source_modes[mode],
+            horizontal=True
+        )
         sources_text = st.text_area(
-            "Erlaubte Quellen (eine pro Zeile)",
+            "Quellen (eine Domain pro Zeile)",
             value="\n".join(st.session_state.allowed_sources),
             height=120,
-            help="Gib Webseiten an, auf die sich die Web-Recherche konzentrieren soll"
+            help="Domains wie crunchbase.com oder techcrunch.com/tag/fintech; Subdomains sind eingeschlossen. "
+                 "Die Liste wird direkt als Filter an die Web-Suche übergeben (leer = gesamtes Web)."
         )
         st.session_state.allowed_sources = [source.strip() for source in sources_text.split('\n') if source.strip()]
 
+        depth_keys = list(SEARCH_DEPTH_PROFILES.keys())
+        st.session_state.search_depth = st.radio(
+            "Recherche-Tiefe",
+            depth_keys,
+            index=depth_keys.index(st.session_state.search_depth),
+            format_func=lambda depth: f"{SEARCH_DEPTH_PROFILES[depth]['label']} "
+                                      f"({SEARCH_DEPTH_PROFILES[depth]['competitor_analysis']} + {SEARCH_DEPTH_PROFILES[depth]['web_research']} Suchen)",
+            horizontal=True,
+            help="Maximale Anzahl Web-Suchen für Wettbewerber-Screening und Web-Recherche. Weniger Suchen verkürzen die Laufzeit, "
+                 "mehr Suchen liefern eine gründlichere Recherche."
+        )
+
         st.markdown("---")
 
         # Kriterien-Gewichtung
@@ -871,10 +1518,61 @@ if st.session_state.page == 'config':
             "K.O.-Kriterien (eine pro Zeile)",
             value=st.session_state.red_flags,
             height=120,
-            help="Definiere Red Flags, die automatisch zu einer roten Ampel führen (z.B. 'Keine zahlenden Kunden', 'Founder hat bereits gekündigt', 'Regulatorische Probleme')"
+            help="Definiere Red Flags, die automatisch zu einer roten Ampel führen (z.B. 'Keine zahlenden Kunden', 'Founder hat bereits gekündigt', 'Regulatorische Probleme'). "
+                 "Quantitative Red Flags mit genau einer Kennzahl und einem Schwellwert (z.B. 'Runway < 12 Monate', 'weniger als 10 zahlende Kunden') werden lokal gegen die extrahierten KPIs geprüft."
         )
         st.session_state.red_flags = red_flags_text
 
+        # Vorschau: welche Red Flags als lokale KPI-Regel erkannt werden
+        rules = [rule for rule in (parse_rule(flag.strip()) for flag in red_flags_text.split('\n') if flag.strip()) if rule]
+        if rules:
+            st.caption("⚡ Lokale KPI-Regeln: " + " · ".join(
+                f"{kpi_label(rule['kpi'])} {rule['operator']} {format_kpi_value(rule['kpi'], rule['threshold'])}" for rule in rules
+            ))
+
+        st.session_state.fused_review = st.toggle(
+            "⚡ Red Flag Check und Zusammenfassung in einer Anfrage",
+            value=st.session_state.fused_review,
+            help="Prüft die Red Flags und erstellt die Zusammenfassung inkl. Begründung der Ampel in einem einzigen Aufruf "
+                 "(spart eine Anfrage pro Deck). Ausgeschaltet laufen beide Schritte getrennt; die Laufzeiten beider Modi werden in der Historie gespeichert."
+        )
+
+        st.session_state.cascade_mode = st.toggle(
+            "🪜 Modell-Kaskade",
+            value=st.session_state.cascade_mode,
+            help=f"Pitch Deck Analyse und Web-Recherche laufen zuerst mit {CASCADE_SCREENING_MODEL}. Nur bei gelber Ampel, "
+                 f"mittlerer Konfidenz unter {CASCADE_MIN_CONFIDENCE:.0%} oder einer Red-Flag-Kennzahl innerhalb von "
+                 f"{CASCADE_RED_FLAG_MARGIN:.0%} der Schwelle wird das Deck mit {CASCADE_ESCALATION_MODEL} neu bewertet. "
+                 "Eskalationsrate und Laufzeit pro Stufe stehen in der Analyse-Historie."
+        )
+
+        st.session_state.category_mode = st.toggle(
+            "🧩 Parallel pro Kategorie bewerten",
+            value=st.session_state.category_mode,
+            help=f"Bewertet die {len(EVALUATION_CRITERIA)} Kategorien gleichzeitig mit je einer kurzen Anfrage gegen das im Prompt-Cache "
+                 "liegende Deck (plus ein Überblick mit KPIs) und führt die Ergebnisse lokal zusammen. Wird bei eingeschalteter "
+                 "Ensemble-Bewertung nicht verwendet."
+        )
+
+        st.session_state.ensemble_mode = st.toggle(
+            "🎲 Ensemble-Bewertung",
+            value=st.session_state.ensemble_mode,
+            help=f"Bewertet das Pitch Deck {len(ENSEMBLE_MODELS)}-mal parallel ({', '.join(ENSEMBLE_MODELS)}) und entscheidet per Mehrheit. "
+                 "Sobald die Mehrheit feststeht, geht es ohne die restlichen Bewertungen weiter; die Übereinstimmung wird neben der Ampel angezeigt."
+        )
+
+        st.markdown("---")
+
+        # Standard-Fragen, die nach der Analyse im Hintergrund beantwortet werden
+        st.markdown("### 📌 Standard-Fragen")
+        standard_questions_text = st.text_area(
+            "Fragen, die nach der Analyse automatisch vorab beantwortet werden (eine pro Zeile)",
+            value=st.session_state.standard_questions,
+            height=140,
+            help="Diese Fragen werden direkt nach der Analyse im Hintergrund beantwortet und stehen im Chat sofort zur Verfügung"
+        )
+        st.session_state.standard_questions = standard_questions_text
+
         st.markdown("---")
 
         # Analyse-Start-Button
@@ -887,6 +1585,8 @@ if st.session_state.page == 'config':
                     st.session_state.results = None
                     st.session_state.chat_history = []
                     st.session_state.generated_email = None
+                    st.session_state.deck_index = None
+                    st.session_state.standard_answers_future = None
                     st.rerun()
             else:
                 st.button("🚀 Analyse starten", type="primary", use_container_width=True, disabled=True)
@@ -914,48 +1614,139 @@ elif st.session_state.page == 'results':
         with open(file_path, "wb") as f:
             f.write(st.session_state.uploaded_file.getbuffer())
 
+        # Neue Analyse macht gecachte Chat-Antworten zu diesem Deck ungültig
+        deck_hash = compute_deck_hash(st.session_state.uploaded_file.name)
+        get_answer_cache().invalidate(deck_hash)
+
         # Container für Fortschrittsanzeige
         progress_container = st.container()
 
         with progress_container:
             st.markdown('<div class="sub-header">Analyse-Fortschritt</div>', unsafe_allow_html=True)
 
+            # Laufzeit pro Schritt in Sekunden (wird mit den Ergebnissen in der Historie gespeichert)
+            timings = {}
+
+            # Stufen, deren Eingaben sich seit dem letzten Lauf nicht geändert haben, werden übernommen
+            stage_cache = st.session_state.stage_cache
+            reused_note = "♻️ Eingaben unverändert - Ergebnis aus dem letzten Lauf übernommen"
+
+            # Modell pro Stufe; in der Kaskade laufen Pitch Deck Analyse und Web-Recherche zuerst mit dem schnellen Modell
+            pitch_deck_model = CASCADE_SCREENING_MODEL if st.session_state.cascade_mode else STAGE_MODELS['pitch_deck']
+            web_research_model = CASCADE_SCREENING_MODEL if st.session_state.cascade_mode else STAGE_MODELS['web_research']
+
+            # Quellen als native Domain-Filter der Web-Suche (erlaubt oder ausgeschlossen) und Suchbudget pro Stufe
+            search_sources = {
+                'allowed_sources': st.session_state.allowed_sources if st.session_state.source_mode == 'allowed' else [],
+                'blocked_sources': st.session_state.allowed_sources if st.session_state.source_mode == 'blocked' else []
+            }
+            search_depth = SEARCH_DEPTH_PROFILES[st.session_state.search_depth]
+
             # Schritt 1: Pitch Deck Analyse
             with st.status("📊 Pitch Deck wird analysiert...", expanded=True) as status:
                 st.write("PDF wird gelesen und ausgewertet...")
 
-                # Erstelle Instruktion mit System Instructions und gewichteten Kriterien
-                combined_instruction = build_instruction_with_weights(
-                    criteria_weights=st.session_state.criteria_weights,
-                    additional_criteria=st.session_state.additional_criteria
-                )
-
-                success, prediction, reasoning, missing = get_prediction(
-                    client=client,
-                    model=model,
-                    instruction=combined_instruction,
-                    pdf_filename=st.session_state.uploaded_file.name
-                )
-
-                if success:
-                    st.write("✅ Pitch Deck Analyse abgeschlossen")
-                    status.update(label="✅ Pitch Deck Analyse abgeschlossen", state="complete")
+                # Die Instruktion ist unabhängig von Gewichtungen und eigenen Kriterien, beide ändern
+                # daher nicht den Fingerabdruck dieser Stufe
+                stage_start = time.perf_counter()
+                ensemble = None
+                if st.session_state.ensemble_mode:
+                    # Mehrere Bewertungen parallel; jede stimmt mit ihrer lokal gewichteten Prognose ab
+                    def sample_vote(output):
+                        _, sample_prediction = aggregate_prediction(output[4], st.session_state.criteria_weights)
+                        return output[1] if sample_prediction is None else sample_prediction
+
+                    success, llm_prediction, reasoning, missing, category_scores, kpis, ensemble = evaluate_pitch_deck_ensemble(
+                        stage_cache,
+                        deck_hash,
+                        st.session_state.uploaded_file.name,
+                        ENSEMBLE_MODELS,
+                        sample_vote
+                    )
+                    reused = False
+                    if success:
+                        st.write(
+                            f"🎲 {ensemble['agreeing']} von {len(ensemble['models'])} Bewertungen einig"
+                            + (f" (Mehrheit vorzeitig erreicht, {len(ensemble['votes'])} Stimmen abgegeben)" if ensemble['early_stop'] else "")
+                        )
+                elif st.session_state.category_mode:
+                    # Eine fokussierte Anfrage pro Kategorie, Teilergebnisse einzeln gecacht
+                    st.write(f"Bewerte {len(EVALUATION_CRITERIA)} Kategorien parallel...")
+                    success, llm_prediction, reasoning, missing, category_scores, kpis = evaluate_pitch_deck_by_category(
+                        stage_cache,
+                        deck_hash,
+                        st.session_state.uploaded_file.name,
+                        model=pitch_deck_model
+                    )
+                    reused = False
                 else:
+                    (success, llm_prediction, reasoning, missing, category_scores, kpis), reused = run_cached_stage(
+                        stage_cache,
+                        'pitch_deck',
+                        {'deck_hash': deck_hash, 'instruction': instruction, 'model': pitch_deck_model},
+                        lambda: get_prediction(
+                            client=client,
+                            model=pitch_deck_model,
+                            instruction=instruction,
+                            pdf_filename=st.session_state.uploaded_file.name
+                        )
+                    )
+                timings['pitch_deck'] = round(time.perf_counter() - stage_start, 2)
+
+                if reused:
+                    st.write(reused_note)
+                if not success:
                     st.error("❌ Fehler bei der Pitch Deck Analyse")
                     status.update(label="❌ Fehler bei der Pitch Deck Analyse", state="error")
                     st.stop()
 
+                # Eigene Kriterien: je Kriterium eine kleine, gecachte Anfrage (parallel)
+                custom_criteria = []
+                if any(criterion.get("description", "").strip() for criterion in st.session_state.additional_criteria):
+                    st.write("Eigene Kriterien werden bewertet...")
+                    stage_start = time.perf_counter()
+                    criteria_success, custom_criteria, criteria_info = evaluate_custom_criteria(
+                        stage_cache,
+                        deck_hash,
+                        st.session_state.uploaded_file.name,
+                        st.session_state.additional_criteria,
+                        model=STAGE_MODELS['custom_criteria']
+                    )
+                    timings['custom_criteria'] = round(time.perf_counter() - stage_start, 2)
+                    if not criteria_success:
+                        st.error(f"❌ Fehler bei der Bewertung der eigenen Kriterien: {criteria_info}")
+                        status.update(label="❌ Fehler bei der Bewertung der eigenen Kriterien", state="error")
+                        st.stop()
+                    st.write(f"✅ {len(custom_criteria)} eigene(s) Kriterium/Kriterien bewertet ({criteria_info} neu, {len(custom_criteria) - criteria_info} aus dem Cache)")
+
+                # Gewichtete Gesamtbewertung lokal aus den Kategorie-Scores, Claudes Einschätzung nur als Fallback
+                pitch_score, prediction = aggregate_prediction(category_scores, st.session_state.criteria_weights, custom_criteria)
+                if prediction is None:
+                    prediction = llm_prediction
+                st.write("✅ Pitch Deck Analyse abgeschlossen")
+                status.update(label="✅ Pitch Deck Analyse abgeschlossen", state="complete")
+
             # Schritt 2: Wettbewerber-Screening
             with st.status("🔍 Wettbewerber-Screening wird durchgeführt...", expanded=True) as status:
                 st.write("Identifiziere und analysiere Wettbewerber...")
 
-                competitor_success, competitor_analysis, competitor_sources = do_competitor_analysis(
-                    client=client,
-                    model=model,
-                    startup_info=missing,
-                    allowed_sources=st.session_state.allowed_sources
+                stage_start = time.perf_counter()
+                (competitor_success, competitor_analysis, competitor_sources), reused = run_cached_stage(
+                    stage_cache,
+                    'competitor_analysis',
+                    {'missing': missing, **search_sources, 'max_uses': search_depth['competitor_analysis'], 'model': STAGE_MODELS['competitor_analysis']},
+                    lambda: do_competitor_analysis(
+                        client=client,
+                        model=STAGE_MODELS['competitor_analysis'],
+                        startup_info=missing,
+                        max_uses=search_depth['competitor_analysis'],
+                        **search_sources
+                    )
                 )
+                timings['competitor_analysis'] = round(time.perf_counter() - stage_start, 2)
 
+                if reused:
+                    st.write(reused_note)
                 if competitor_success:
                     st.write("✅ Wettbewerber-Screening abgeschlossen")
                     status.update(label="✅ Wettbewerber-Screening abgeschlossen", state="complete")
@@ -969,13 +1760,23 @@ elif st.session_state.page == 'results':
                 st.write(f"Suche nach zusätzlichen Informationen...")
                 st.write(f"📊 Analysiere aktuelle Markt-Trends und Branchenentwicklungen...")
 
-                web_success, web_prediction, web_reasoning, web_sources = do_websearch(
-                    client=client,
-                    model=model,
-                    missing=missing,
-                    allowed_sources=st.session_state.allowed_sources
+                stage_start = time.perf_counter()
+                (web_success, web_prediction, web_reasoning, web_sources), reused = run_cached_stage(
+                    stage_cache,
+                    'web_research',
+                    {'missing': missing, **search_sources, 'max_uses': search_depth['web_research'], 'model': web_research_model},
+                    lambda: do_websearch(
+                        client=client,
+                        model=web_research_model,
+                        missing=missing,
+                        max_uses=search_depth['web_research'],
+                        **search_sources
+                    )
                 )
+                timings['web_research'] = round(time.perf_counter() - stage_start, 2)
 
+                if reused:
+                    st.write(reused_note)
                 if web_success:
                     st.write("✅ Web-Recherche und Markt-Trends-Analyse abgeschlossen")
                     status.update(label="✅ Web-Recherche und Markt-Trends abgeschlossen", state="complete")
@@ -984,68 +1785,209 @@ elif st.session_state.page == 'results':
                     status.update(label="❌ Fehler bei der Web-Recherche", state="error")
                     st.stop()
 
-            # Schritt 4: Red Flag Check
+            # Modell-Kaskade: unklare Decks mit dem stärkeren Modell neu bewerten (Pitch Deck Analyse und Web-Recherche)
+            cascade = None
+            if st.session_state.cascade_mode:
+                red_flags_list = [flag.strip() for flag in st.session_state.red_flags.split('\n') if flag.strip()]
+                # Vorläufige Ampel nur mit lokal entschiedenen Red Flags (der LLM-Check läuft erst mit dem finalen Ergebnis)
+                rule_triggered, _, _ = apply_kpi_rules(red_flags_list, kpis)
+                screening_traffic_light = compute_traffic_light(prediction, web_prediction, list(rule_triggered))
+                reasons = escalation_reasons(screening_traffic_light, category_scores, red_flags_list, kpis)
+                cascade = {
+                    'screening_model': CASCADE_SCREENING_MODEL,
+                    'escalation_model': CASCADE_ESCALATION_MODEL,
+                    'screening_traffic_light': screening_traffic_light,
+                    'escalated': bool(reasons),
+                    'reasons': reasons,
+                    'screening_seconds': round(timings['pitch_deck'] + timings['web_research'], 2),
+                    'escalation_seconds': 0.0
+                }
+
+                if not reasons:
+                    st.status(f"🪜 Screening mit {CASCADE_SCREENING_MODEL} eindeutig - keine Eskalation", state="complete")
+                else:
+                    with st.status(f"🪜 Eskalation auf {CASCADE_ESCALATION_MODEL}...", expanded=True) as status:
+                        for reason, detail in reasons.items():
+                            st.write(f"{ESCALATION_REASONS[reason]}: {detail}")
+
+                        stage_start = time.perf_counter()
+                        (success, llm_prediction, reasoning, missing, category_scores, kpis), reused = run_cached_stage(
+                            stage_cache,
+                            'pitch_deck_escalation',
+                            {'deck_hash': deck_hash, 'instruction': instruction, 'model': CASCADE_ESCALATION_MODEL},
+                            lambda: get_prediction(
+                                client=client,
+                                model=CASCADE_ESCALATION_MODEL,
+                                instruction=instruction,
+                                pdf_filename=st.session_state.uploaded_file.name
+                            )
+                        )
+                        timings['pitch_deck_escalation'] = round(time.perf_counter() - stage_start, 2)
+
+                        if reused:
+                            st.write(reused_note)
+                        if not success:
+                            st.error("❌ Fehler bei der Pitch Deck Analyse mit dem stärkeren Modell")
+                            status.update(label="❌ Fehler bei der Eskalation", state="error")
+                            st.stop()
+
+                        pitch_score, prediction = aggregate_prediction(category_scores, st.session_state.criteria_weights, custom_criteria)
+                        if prediction is None:
+                            prediction = llm_prediction
+                        # Das Ensemble bezog sich auf das Screening, das Ergebnis stammt jetzt vom stärkeren Modell
+                        ensemble = None
+
+                        stage_start = time.perf_counter()
+                        (web_success, web_prediction, web_reasoning, web_sources), reused = run_cached_stage(
+                            stage_cache,
+                            'web_research_escalation',
+                            {'missing': missing, **search_sources, 'max_uses': search_depth['web_research'], 'model': CASCADE_ESCALATION_MODEL},
+                            lambda: do_websearch(
+                                client=client,
+                                model=CASCADE_ESCALATION_MODEL,
+                                missing=missing,
+                                max_uses=search_depth['web_research'],
+                                **search_sources
+                            )
+                        )
+                        timings['web_research_escalation'] = round(time.perf_counter() - stage_start, 2)
+
+                        if reused:
+                            st.write(reused_note)
+                        if not web_success:
+                            st.error("❌ Fehler bei der Web-Recherche mit dem stärkeren Modell")
+                            status.update(label="❌ Fehler bei der Eskalation", state="error")
+                            st.stop()
+
+                        cascade['escalation_seconds'] = round(timings['pitch_deck_escalation'] + timings['web_research_escalation'], 2)
+                        st.write(f"✅ Pitch Deck und Web-Recherche mit {CASCADE_ESCALATION_MODEL} neu bewertet")
+                        status.update(label=f"✅ Eskaliert auf {CASCADE_ESCALATION_MODEL}", state="complete")
+
+            # Schritt 4 und 5: Red Flag Check und Zusammenfassung (kombiniert in einer Anfrage oder getrennt)
             triggered_red_flags = []
             red_flag_reasoning = ""
+            traffic_light_rationale = ""
 
-            if st.session_state.red_flags.strip():
-                with st.status("🚨 Red Flags werden überprüft...", expanded=True) as status:
-                    st.write("Prüfe K.O.-Kriterien...")
+            if st.session_state.fused_review:
+                with st.status("🚨 Red Flags und Zusammenfassung...", expanded=True) as status:
+                    st.write("Prüfe K.O.-Kriterien und führe die Ergebnisse in einer Anfrage zusammen...")
 
-                    # Parse Red Flags Liste
                     red_flags_list = [flag.strip() for flag in st.session_state.red_flags.split('\n') if flag.strip()]
 
-                    red_flag_success, triggered_red_flags, red_flag_reasoning = check_red_flags(
-                        client=client,
-                        model=model,
+                    stage_start = time.perf_counter()
+                    review_success, triggered_red_flags, red_flag_info, summary_text, traffic_light_rationale, checked_count, reused = review_and_summarize_stage(
+                        stage_cache,
+                        red_flags_list,
                         pitch_deck_analysis=reasoning,
                         web_research_analysis=web_reasoning,
                         competitor_analysis=competitor_analysis,
-                        red_flags_list=red_flags_list
+                        prediction=prediction,
+                        web_prediction=web_prediction,
+                        model=STAGE_MODELS['summary'],
+                        kpis=kpis
                     )
+                    timings['red_flags_summary'] = round(time.perf_counter() - stage_start, 2)
 
-                    if red_flag_success:
-                        if triggered_red_flags:
-                            st.write(f"⚠️ {len(triggered_red_flags)} Red Flag(s) getroffen!")
-                            status.update(label=f"⚠️ {len(triggered_red_flags)} Red Flag(s) getroffen!", state="complete")
-                        else:
-                            st.write("✅ Keine Red Flags getroffen")
-                            status.update(label="✅ Keine Red Flags getroffen", state="complete")
-                    else:
-                        st.error("❌ Fehler beim Red Flag Check")
-                        status.update(label="❌ Fehler beim Red Flag Check", state="error")
+                    if not review_success:
+                        st.error("❌ Fehler beim Red Flag Check und der Zusammenfassung")
+                        status.update(label="❌ Fehler beim Red Flag Check und der Zusammenfassung", state="error")
                         st.stop()
 
-            # Schritt 5: Zusammenfassung erstellen
-            with st.status("📝 Zusammenfassung wird erstellt...", expanded=True) as status:
-                st.write("Ergebnisse werden zusammengeführt...")
-
-                summary_success, summary_text, final_prediction = summary(
-                    model=model,
-                    text_1=reasoning,
-                    text_2=web_reasoning,
-                    score_1=prediction,
-                    score_2=web_prediction
-                )
+                    red_flag_reasoning = red_flag_info
+                    if reused:
+                        st.write(reused_note)
+                    if red_flags_list and checked_count < len(red_flags_list):
+                        st.write(f"♻️ {len(red_flags_list) - checked_count} von {len(red_flags_list)} Red Flag(s) ohne neue Prüfung entschieden (lokale KPI-Regeln oder letzter Lauf)")
+                    if triggered_red_flags:
+                        st.write(f"⚠️ {len(triggered_red_flags)} Red Flag(s) getroffen!")
+                    st.write("✅ Zusammenfassung erstellt")
+                    status.update(
+                        label=f"⚠️ {len(triggered_red_flags)} Red Flag(s) getroffen, Zusammenfassung erstellt" if triggered_red_flags
+                        else "✅ Red Flags geprüft und Zusammenfassung erstellt",
+                        state="complete"
+                    )
+            else:
+                # Schritt 4: Red Flag Check
+                if st.session_state.red_flags.strip():
+                    with st.status("🚨 Red Flags werden überprüft...", expanded=True) as status:
+                        st.write("Prüfe K.O.-Kriterien...")
+
+                        # Parse Red Flags Liste
+                        red_flags_list = [flag.strip() for flag in st.session_state.red_flags.split('\n') if flag.strip()]
+
+                        # Cache pro Red Flag: nur neue oder geänderte Red Flags werden geprüft
+                        stage_start = time.perf_counter()
+                        red_flag_success, triggered_red_flags, red_flag_reasoning, checked_count = evaluate_red_flags(
+                            stage_cache,
+                            red_flags_list,
+                            pitch_deck_analysis=reasoning,
+                            web_research_analysis=web_reasoning,
+                            competitor_analysis=competitor_analysis,
+                            model=STAGE_MODELS['red_flags'],
+                            kpis=kpis
+                        )
+                        timings['red_flags'] = round(time.perf_counter() - stage_start, 2)
+
+                        if red_flag_success and checked_count < len(red_flags_list):
+                            st.write(f"♻️ {len(red_flags_list) - checked_count} von {len(red_flags_list)} Red Flag(s) ohne neue Prüfung entschieden (lokale KPI-Regeln oder letzter Lauf)")
+                        if red_flag_success:
+                            if triggered_red_flags:
+                                st.write(f"⚠️ {len(triggered_red_flags)} Red Flag(s) getroffen!")
+                                status.update(label=f"⚠️ {len(triggered_red_flags)} Red Flag(s) getroffen!", state="complete")
+                            else:
+                                st.write("✅ Keine Red Flags getroffen")
+                                status.update(label="✅ Keine Red Flags getroffen", state="complete")
+                        else:
+                            st.error("❌ Fehler beim Red Flag Check")
+                            status.update(label="❌ Fehler beim Red Flag Check", state="error")
+                            st.stop()
+
+                # Schritt 5: Zusammenfassung erstellen
+                with st.status("📝 Zusammenfassung wird erstellt...", expanded=True) as status:
+                    st.write("Ergebnisse werden zusammengeführt...")
+
+                    stage_start = time.perf_counter()
+                    # Der Zusammenfassungstext hängt nur von den Begründungen ab, die Ampel wird danach lokal bestimmt
+                    (summary_success, summary_text, _), reused = run_cached_stage(
+                        stage_cache,
+                        'summary',
+                        summary_stage_inputs(reasoning, web_reasoning, STAGE_MODELS['summary']),
+                        lambda: summary(
+                            model=STAGE_MODELS['summary'],
+                            text_1=reasoning,
+                            text_2=web_reasoning,
+                            score_1=prediction,
+                            score_2=web_prediction
+                        )
+                    )
+                    timings['summary'] = round(time.perf_counter() - stage_start, 2)
 
-                if summary_success:
-                    st.write("✅ Zusammenfassung erstellt") #Updates für Benutzer
-                    status.update(label="✅ Zusammenfassung erstellt", state="complete")
-                else:
-                    st.error("❌ Fehler beim Erstellen der Zusammenfassung")
-                    status.update(label="❌ Fehler beim Erstellen der Zusammenfassung", state="error")
-                    st.stop()
+                    if reused:
+                        st.write(reused_note)
+                    if summary_success:
+                        st.write("✅ Zusammenfassung erstellt") #Updates für Benutzer
+                        status.update(label="✅ Zusammenfassung erstellt", state="complete")
+                    else:
+                        st.error("❌ Fehler beim Erstellen der Zusammenfassung")
+                        status.update(label="❌ Fehler beim Erstellen der Zusammenfassung", state="error")
+                        st.stop()
 
             # Ampel-Logik: Wenn Red Flags getroffen wurden, ist die Ampel immer rot
+            final_prediction = compute_traffic_light(prediction, web_prediction, triggered_red_flags)
             if triggered_red_flags:
-                final_prediction = "red"
                 st.warning(f"⚠️ Finale Bewertung auf ROT gesetzt wegen {len(triggered_red_flags)} getroffener Red Flag(s)!")
 
             # Speichere Ergebnisse im Session State
             st.session_state.results = {
                 'pitch_deck': {
                     'prediction': prediction,
-                    'reasoning': reasoning
+                    'llm_prediction': llm_prediction,
+                    'score': pitch_score,
+                    'category_scores': category_scores,
+                    'custom_criteria': custom_criteria,
+                    'kpis': kpis,
+                    'reasoning': reasoning,
+                    'ensemble': ensemble
                 },
                 'competitor_analysis': {
                     'analysis': competitor_analysis,
@@ -1062,10 +2004,68 @@ elif st.session_state.page == 'results':
                 },
                 'summary': summary_text,
                 'final_prediction': final_prediction,
-                'filename': st.session_state.uploaded_file.name
+                'traffic_light_rationale': {'light': final_prediction, 'text': traffic_light_rationale} if traffic_light_rationale else None,
+                'cascade': cascade,
+                'criteria_weights': {key: weight_value(value) for key, value in st.session_state.criteria_weights.items()},
+                'filename': st.session_state.uploaded_file.name,
+                'deck_hash': deck_hash
             }
             st.session_state.workflow_completed = True
 
+            # Signatur des Decks für die Erkennung späterer Versionen speichern (vor dem Lauf, die Seitentexte fließen in dessen Vergleichsvektor ein)
+            fingerprint = st.session_state.deck_fingerprint
+            if fingerprint is None or fingerprint['deck_hash'] != deck_hash:
+                fingerprint = fingerprint_upload(bytes(st.session_state.uploaded_file.getbuffer()))
+            if fingerprint['signature'] is not None:
+                get_analysis_store().save_deck_signature(
+                    deck_hash,
+                    st.session_state.uploaded_file.name,
+                    fingerprint['page_texts'],
+                    fingerprint['signature'].tobytes(),
+                    lsh_band_keys(fingerprint['signature'])
+                )
+
+            # Lauf inkl. Konfiguration, Modell und Laufzeiten in der Historie speichern
+            st.session_state.results['analysis_id'] = get_analysis_store().save_analysis(
+                st.session_state.results,
+                config={
+                    'criteria_weights': st.session_state.criteria_weights,
+                    'additional_criteria': st.session_state.additional_criteria,
+                    'allowed_sources': st.session_state.allowed_sources,
+                    'source_mode': st.session_state.source_mode,
+                    'search_depth': st.session_state.search_depth,
+                    'red_flags': st.session_state.red_flags
+                },
+                model=CASCADE_ESCALATION_MODEL if cascade and cascade['escalated'] else pitch_deck_model,
+                timings=timings
+            )
+            get_kpi_table().append(st.session_state.results['analysis_id'], deck_hash, kpis)
+            get_score_table().upsert(get_analysis_store().load_score_row(st.session_state.results['analysis_id']))
+            for vector_row in get_analysis_store().load_vector_rows(st.session_state.results['analysis_id']):
+                get_comparable_index().upsert(vector_row)
+
+            # Executive Summary PDF im Hintergrund vorbereiten
+            schedule_summary_pdf(st.session_state.results)
+
+            # Quellen-HTML einmalig vorberechnen und mit den Ergebnissen speichern
+            st.session_state.results['sources_html'] = {
+                section: build_sources_html(st.session_state.results[section]['sources'])
+                for section in ('competitor_analysis', 'web_research')
+            }
+
+            # Retrieval-Index bauen und Standard-Fragen im Hintergrund beantworten, während der Analyst liest
+            # (mit der aktuellen Cache-Generation, damit ein Neustart der Analyse veraltete Antworten verwirft)
+            st.session_state.deck_index = build_deck_index(st.session_state.uploaded_file.name, st.session_state.results)
+            standard_questions = [q.strip() for q in st.session_state.standard_questions.split('\n') if q.strip()]
+            st.session_state.standard_answers_future = executor.submit(
+                precompute_standard_answers,
+                st.session_state.results,
+                st.session_state.deck_index,
+                standard_questions,
+                get_answer_cache(),
+                get_answer_cache().generation(st.session_state.results['deck_hash'])
+            )
+
             st.success("🎉 Analyse abgeschlossen!")
             st.rerun()
 
@@ -1098,6 +2098,34 @@ elif st.session_state.page == 'results':
             else:
                 st.warning("Gemischte Prognosen - weitere Untersuchung empfohlen")
 
+            # Begründung aus der kombinierten Stufe (nur solange die Ampel unverändert ist, z.B. nach neuer Gewichtung)
+            rationale = results.get('traffic_light_rationale')
+            if rationale and rationale['light'] == color_class:
+                st.caption(rationale['text'])
+
+            # Ensemble: Übereinstimmung der Bewertungen als Konfidenz der Pitch-Deck-Prognose
+            ensemble = results['pitch_deck'].get('ensemble')
+            if ensemble:
+                st.caption(
+                    f"🎲 Ensemble-Konfidenz {ensemble['agreement']:.0%}: "
+                    f"{ensemble['agreeing']} von {len(ensemble['models'])} Bewertungen "
+                    f"{'positiv' if ensemble['prediction'] else 'negativ'}"
+                    + (f" (Mehrheit vorzeitig erreicht, {len(ensemble['votes'])} Stimmen abgegeben)" if ensemble['early_stop'] else "")
+                )
+
+            # Modell-Kaskade: mit welchem Modell das Ergebnis entstanden ist
+            cascade = results.get('cascade')
+            if cascade and cascade['escalated']:
+                st.caption(
+                    f"🪜 Screening mit {cascade['screening_model']} ergab {color_emoji[cascade['screening_traffic_light']]}, "
+                    f"neu bewertet mit {cascade['escalation_model']} "
+                    f"({', '.join(ESCALATION_REASONS[reason] for reason in cascade['reasons'])})"
+                )
+            elif cascade:
+                st.caption(f"🪜 Bewertet mit {cascade['screening_model']} (Screening eindeutig, keine Eskalation)")
+
+        render_weighting_section(results)
+
         # Red Flag Warnung (falls vorhanden)
         if results.get('red_flags') and results['red_flags'].get('triggered'):
             st.markdown("---")
@@ -1128,273 +2156,225 @@ elif st.session_state.page == 'results':
         st.markdown("### 📝 Zusammenfassung")
         st.markdown(f'<div class="result-card">{results["summary"]}</div>', unsafe_allow_html=True)
 
-        # PDF-Export-Button
-        st.markdown("---")
-        st.markdown("### 📄 Export")
-
-        col_pdf1, col_pdf2, col_pdf3 = st.columns([1, 2, 1])
-        with col_pdf2:
-            st.info("💡 Exportiere eine professionelle PDF-Zusammenfassung mit allen wichtigen Ergebnissen")
-
-            if st.button("📄 Executive Summary als PDF exportieren", type="secondary", use_container_width=True):
-                try:
-                    # Generiere PDF
-                    with st.spinner("PDF wird generiert..."):
-                        pdf_bytes = generate_executive_summary_pdf(results)
-
-                    # Erstelle Dateinamen
-                    startup_name = results.get('filename', 'startup').replace('.pdf', '').replace(' ', '_')
-                    date_str = datetime.now().strftime("%Y%m%d")
-                    pdf_filename = f"Executive_Summary_{startup_name}_{date_str}.pdf"
-
-                    # Download Button
-                    st.download_button(
-                        label="⬇️ PDF herunterladen",
-                        data=pdf_bytes,
-                        file_name=pdf_filename,
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                    st.success("✅ PDF erfolgreich generiert!")
-
-                except Exception as e:
-                    st.error(f"❌ Fehler beim Generieren der PDF: {str(e)}")
-                    st.exception(e)
-
-        st.markdown("---")
+        render_export_section(results)
 
-        # Detaillierte Begründungen in Akkordeon-Elementen
-        st.markdown("### 🔍 Detaillierte Analyse")
+        render_detail_section(results)
 
-        with st.expander("📄 Pitch Deck Analyse", expanded=False):
-            prediction_emoji = "✅" if results['pitch_deck']['prediction'] else "❌"
-            st.markdown(f"**Prognose:** {prediction_emoji} {'Erfolg' if results['pitch_deck']['prediction'] else 'Misserfolg'}")
-            st.markdown("**Begründung:**")
-            st.markdown(results['pitch_deck']['reasoning'])
+        render_kpi_comparison_section(results)
 
-        # Red Flags-Akkordeon (falls vorhanden)
-        if results.get('red_flags') and results['red_flags'].get('triggered'):
-            with st.expander("🚨 K.O.-Kriterien Check", expanded=True):
-                st.markdown(f"**Status:** ❌ {len(results['red_flags']['triggered'])} Red Flag(s) getroffen")
-                st.markdown("**Details:**")
-                st.markdown(results['red_flags']['reasoning'])
-
-        with st.expander("🔍 Wettbewerber-Screening", expanded=False):
-            st.markdown(results['competitor_analysis']['analysis'])
+        render_comparable_decks_section(results)
 
-            if results['competitor_analysis']['sources']:
-                render_sources(results['competitor_analysis']['sources'])
+        render_email_section(results)
 
-        with st.expander("🌐 Web-Recherche & Markt-Trends", expanded=False):
-            prediction_emoji = "✅" if results['web_research']['prediction'] else "❌"
-            st.markdown(f"**Prognose:** {prediction_emoji} {'Erfolg' if results['web_research']['prediction'] else 'Misserfolg'}")
-            st.markdown("**Analyse (inkl. aktueller Markt-Trends):**")
-            st.markdown(results['web_research']['reasoning'])
+        # Solange die Standard-Fragen im Hintergrund laufen, prüft das Chat-Fragment regelmäßig den Status
+        standard_future = st.session_state.standard_answers_future
+        chat_refresh = 2 if standard_future is not None and not standard_future.done() else None
+        st.fragment(render_chat_section, run_every=chat_refresh)(results)
 
-            if results['web_research']['sources']:
-                render_sources(results['web_research']['sources'])
-
-        # E-Mail-Generierungsbereich
-        st.markdown("---")
-        st.markdown('<div class="sub-header">E-Mail-Antwort generieren</div>', unsafe_allow_html=True)
-
-        # Initialisiere E-Mail-Status, falls nicht vorhanden
-        if 'generated_email' not in st.session_state:
-            st.session_state.generated_email = None
-
-        col_email1, col_email2, col_email3 = st.columns([1, 2, 1])
-        with col_email2:
-            # Bestimme E-Mail-Typ (Einladung oder Absage)
-            email_type = "invitation" if results['final_prediction'] == 'green' else "rejection"
-            email_icon = "✅" if email_type == "invitation" else "📧"
-            email_type_de = "Einladung" if email_type == "invitation" else "Absage"
-
-            st.info(f"{email_icon} E-Mail-Typ: **{email_type_de}** - Basierend auf {'positiven' if email_type == 'invitation' else 'gemischten oder negativen'} Analyse-Ergebnissen")
-
-            if st.button("📝 E-Mail generieren", type="primary", use_container_width=True):
-                with st.spinner("Personalisierte E-Mail wird generiert..."):
-                    # Extrahiere Startup-Namen aus Dateinamen (entferne .pdf-Endung)
-                    startup_name = results['filename'].replace('.pdf', '').replace('_', ' ').replace('-', ' ').title()
-
-                    success, subject, body = generate_email(
-                        model=model,
-                        final_prediction=results['final_prediction'],
-                        pitch_deck_reasoning=results['pitch_deck']['reasoning'],
-                        web_research_reasoning=results['web_research']['reasoning'],
-                        summary_text=results['summary'],
-                        startup_name=startup_name
-                    )
+# ===== HISTORIENSEITE =====
+# Zeigt alle gespeicherten Analysen und öffnet sie sofort aus der Datenbank (ohne API-Aufrufe)
+elif st.session_state.page == 'history':
+    if st.button("← Zurück zur Konfiguration"):
+        st.session_state.page = 'config'
+        st.rerun()
 
-                    if success:
-                        st.session_state.generated_email = {
-                            'subject': subject,
-                            'body': body,
-                            'type': email_type
-                        }
-                        st.success("✅ E-Mail erfolgreich generiert!")
-                        st.rerun()
-
-        # Zeige generierte E-Mail an, falls verfügbar
-        if st.session_state.generated_email:
-            st.markdown("### 📧 Generierte E-Mail")
-            email_data = st.session_state.generated_email
-
-            with st.container():
-                st.markdown(f"**Betreff:** {email_data['subject']}")
-                st.markdown("**Nachricht:**")
-                st.markdown(email_data['body'])
-                st.markdown('</div>', unsafe_allow_html=True)
-
-            # Erstelle mailto-Link
-            col_mail1, col_mail2, col_mail3 = st.columns([1, 2, 1])
-            with col_mail2:
-                # URL-kodiere Betreff und Text
-                encoded_subject = urllib.parse.quote(email_data['subject'])
-                encoded_body = urllib.parse.quote(email_data['body'])
-                mailto_link = f"mailto:?subject={encoded_subject}&body={encoded_body}"
-
-                st.markdown(f"""
-                    <a href="{mailto_link}" target="_blank">
-                        <button style="
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            color: white;
-                            border: none;
-                            border-radius: 12px;
-                            padding: 12px 24px;
-                            font-weight: 600;
-                            font-size: 1.1rem;
-                            cursor: pointer;
-                            width: 100%;
-                            box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);
-                            transition: all 0.3s ease;
-                        ">
-                            📬 In E-Mail-Programm öffnen
-                        </button>
-                    </a>
-                """, unsafe_allow_html=True)
-
-                st.caption("Klicken, um diese E-Mail in deinem Standard-E-Mail-Programm zu öffnen")
-
-        # ===== CHAT-INTERFACE =====
-        # Ermöglicht interaktive Fragen zu den Analyse-Ergebnissen mit Zugriff auf das PDF und Web-Suche
+    st.markdown("---")
+    st.markdown('<div class="sub-header">📚 Analyse-Historie</div>', unsafe_allow_html=True)
+
+    light_labels = {'green': '🟢 Grün', 'yellow': '🟡 Gelb', 'red': '🔴 Rot'}
+
+    search_fields = {
+        '': 'Alle Texte',
+        'summary': 'Zusammenfassung',
+        'pitch_deck': 'Pitch Deck Analyse',
+        'web_research': 'Web-Recherche',
+        'competitor_analysis': 'Wettbewerber-Analyse',
+        'red_flags': 'Getroffene Red Flags',
+        'sources': 'Quellentitel'
+    }
+
+    # Volltextsuche über alle gespeicherten Analysen (FTS5-Index, gerankt nach Relevanz)
+    col_search, col_field = st.columns([2, 1])
+    with col_search:
+        search_query = st.text_input("🔎 Volltextsuche", placeholder='z.B. "embedded finance" oder Keine zahlenden Kunden')
+    with col_field:
+        search_field = st.selectbox("Suchen in", list(search_fields.keys()), format_func=lambda field: search_fields[field])
+
+    # Filter (laufen direkt als indizierte Abfrage in SQLite)
+    col_filter1, col_filter2 = st.columns([2, 1])
+    with col_filter1:
+        filename_filter = st.text_input("Dateiname", placeholder="z.B. 'acme'")
+    with col_filter2:
+        light_filter = st.multiselect("Ampel", list(light_labels.keys()), format_func=lambda light: light_labels[light])
+
+    if search_query.strip():
+        analyses = get_analysis_store().search(
+            search_query,
+            column=search_field,
+            filename=filename_filter.strip(),
+            final_predictions=light_filter
+        )
+    else:
+        analyses = get_analysis_store().list_analyses(filename=filename_filter.strip(), final_predictions=light_filter)
+
+    if not analyses:
+        st.info("Keine gespeicherten Analysen gefunden")
+
+    for analysis in analyses:
+        col_info, col_open = st.columns([5, 1])
+        with col_info:
+            created_at = datetime.fromisoformat(analysis['created_at']).strftime("%d.%m.%Y %H:%M")
+            red_flag_info = f" · 🚨 {analysis['red_flag_count']} Red Flag(s)" if analysis['red_flag_count'] else ""
+            st.markdown(
+                f"{light_labels.get(analysis['final_prediction'], '🟡 Gelb')} **{analysis['filename']}** · {created_at} · "
+                f"{analysis['model']} · {analysis['total_seconds'] or 0:.0f}s{red_flag_info}"
+            )
+            # Fundstelle der Volltextsuche mit hervorgehobenen Suchbegriffen
+            if analysis.get('snippet'):
+                st.caption(analysis['snippet'])
+        with col_open:
+            if st.button("Öffnen", key=f"open_analysis_{analysis['id']}", use_container_width=True):
+                open_stored_analysis(analysis['id'])
+
+    # Portfolio-Report über alle aktuell gefilterten Analysen
+    if analyses:
         st.markdown("---")
-        st.markdown('<div class="sub-header">💬 Chat mit deinen Daten</div>', unsafe_allow_html=True)
-        st.markdown("Stelle Fragen zu den Analyse-Ergebnissen")
-
-        # Erstelle Kontext-Informationen aus den Analyse-Ergebnissen für den Chat
-        red_flags_context = ""
-        if results.get('red_flags') and results['red_flags'].get('triggered'):
-            red_flags_context = f"""
-        Red Flags: {len(results['red_flags']['triggered'])} K.O.-Kriterien getroffen
-        Red Flag Details: {results['red_flags']['reasoning']}
-        WICHTIG: Die Bewertung wurde wegen Red Flags auf ROT gesetzt!
-        """
-
-        context = f"""
-        Pitch Deck Analyse-Ergebnisse für {results['filename']}:
-
-        Gesamtbewertung: {results['final_prediction']}
-        {red_flags_context}
-        Pitch Deck Prognose: {'Erfolg' if results['pitch_deck']['prediction'] else 'Misserfolg'}
-        Pitch Deck Begründung: {results['pitch_deck']['reasoning']}
-
-        Web-Recherche Prognose: {'Erfolg' if results['web_research']['prediction'] else 'Misserfolg'}
-        Web-Recherche Begründung: {results['web_research']['reasoning']}
-
-        Zusammenfassung: {results['summary']}
-        """
-
-        # Zeige bisherigen Chat-Verlauf
-        for message in st.session_state.chat_history:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-        # Chat-Eingabefeld
-        if prompt := st.chat_input("Stelle eine Frage zur Analyse..."):
-            # Füge Nutzer-Nachricht zum Chat-Verlauf hinzu
-            st.session_state.chat_history.append({"role": "user", "content": prompt})
-
-            # Zeige Nutzer-Nachricht sofort an
-            with st.chat_message("user"):
-                st.markdown(prompt)
-
-            # Generiere Antwort mit Claude
-            with st.chat_message("assistant"):
-                with st.spinner("Denke nach..."):
-                    # Lade und kodiere das PDF
-                    import base64
-                    tmp_path = Path("tmp") / results['filename']
-                    with open(tmp_path, 'rb') as f:
-                        pdf_data = base64.standard_b64encode(f.read()).decode("utf-8")
-
-                    # Erstelle Nachrichten mit PDF in der ersten Nachricht
-                    chat_messages = []
-                    for i, msg in enumerate(st.session_state.chat_history):
-                        if i == 0:
-                            # Erste Nachricht enthält das PDF
-                            chat_messages.append({
-                                "role": msg["role"],
-                                "content": [
-                                    {
-                                        "type": "document",
-                                        "source": {
-                                            "type": "base64",
-                                            "media_type": "application/pdf",
-                                            "data": pdf_data
-                                        }
-                                    },
-                                    {
-                                        "type": "text",
-                                        "text": msg["content"]
-                                    }
-                                ]
-                            })
-                        else:
-                            chat_messages.append({
-                                "role": msg["role"],
-                                "content": msg["content"]
-                            })
-
-                    response = client.messages.create(
-                        model=model,
-                        max_tokens=8192,
-                        system=f"Du bist ein hilfreicher VC-Analyst-Assistent. Du hast Zugriff auf das ursprüngliche Pitch Deck PDF und die Analyse-Ergebnisse. Beantworte Fragen basierend auf dem PDF und dem folgenden Analyse-Kontext:\n\n{context}\n\nDu hast auch Zugriff auf eine Web-Suche, um bei Bedarf zusätzliche Informationen zu finden. Antworte immer auf Deutsch.",
-                        messages=chat_messages,
-                        tools=[
-                            {
-                                "type": "web_search_20250305",
-                                "name": "web_search"
-                            }
-                        ]
-                    )
+        st.markdown("### 📄 Portfolio-Report")
+        st.info(f"💡 Erstellt einen Report mit Ranking und Einzelbewertungen für die {len(analyses)} angezeigten Analysen")
+
+        if st.button("📄 Portfolio-Report erstellen", type="primary"):
+            report_path = Path("tmp") / f"Portfolio_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
+            report_path.parent.mkdir(exist_ok=True)
+            with st.spinner("Portfolio-Report wird erstellt..."):
+                generate_portfolio_report_pdf(
+                    get_analysis_store().iter_results([analysis['id'] for analysis in analyses]),
+                    str(report_path)
+                )
+            st.session_state.portfolio_report = str(report_path)
+
+        if st.session_state.get('portfolio_report') and Path(st.session_state.portfolio_report).exists():
+            report_path = Path(st.session_state.portfolio_report)
+            st.download_button(
+                label="📥 Portfolio-Report herunterladen",
+                data=lambda: report_path.read_bytes(),
+                file_name=report_path.name,
+                mime="application/pdf",
+                on_click="ignore"
+            )
+
+    # Auswertung der Modell-Kaskade (Eskalationsrate und Laufzeit pro Stufe, um die Schwellwerte anzupassen)
+    cascade_stats = get_analysis_store().cascade_statistics()
+    if cascade_stats['runs']:
+        with st.expander("🪜 Modell-Kaskade", expanded=False):
+            col_runs, col_rate, col_changed = st.columns(3)
+            col_runs.metric("Läufe mit Kaskade", cascade_stats['runs'])
+            col_rate.metric("Eskalationsrate", f"{cascade_stats['escalation_rate']:.0%}")
+            col_changed.metric("Ampel durch Eskalation geändert", f"{cascade_stats['changed_traffic_light']}/{cascade_stats['escalated']}")
+
+            tier_labels = {'screening': 'Screening', 'escalation': 'Eskalation'}
+            st.dataframe(
+                [
+                    {
+                        'Stufe': tier_labels[name],
+                        'Modell(e)': ", ".join(tier['models']),
+                        'Läufe': tier['runs'],
+                        'Ø Sekunden': tier.get('mean_seconds'),
+                        'Median': tier.get('p50_seconds'),
+                        'P90': tier.get('p90_seconds')
+                    }
+                    for name, tier in cascade_stats['tiers'].items()
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+            if cascade_stats['reasons']:
+                st.caption("Eskalationsgründe: " + " · ".join(
+                    f"{ESCALATION_REASONS.get(reason, reason)}: {count}" for reason, count in cascade_stats['reasons'].items()
+                ))
+
+    render_portfolio_chat_section()
+
+# Portfolio-Ranking
+elif st.session_state.page == 'ranking':
+    if st.button("← Zurück zur Konfiguration"):
+        st.session_state.page = 'config'
+        st.rerun()
 
-                    # Extrahiere Text aus Antwort und Quellen
-                    assistant_message = ""
-                    chat_sources = []
-
-                    for content in response.content:
-                        if content.type == "text":
-                            assistant_message += content.text
-                            # Extrahiere Zitate, falls verfügbar
-                            if hasattr(content, 'citations') and content.citations:
-                                for citation in content.citations:
-                                    if hasattr(citation, 'url'):
-                                        chat_sources.append({
-                                            'url': citation.url,
-                                            'title': getattr(citation, 'title', citation.url)
-                                        })
-
-                    # Füge Quellen zur Nachricht hinzu, falls vorhanden
-                    if chat_sources:
-                        assistant_message += "\n\n**Quellen:**\n"
-                        for i, source in enumerate(chat_sources, 1):
-                            assistant_message += f"{i}. [{source['title']}]({source['url']})\n"
+    st.markdown("---")
+    st.markdown('<div class="sub-header">🏆 Portfolio-Ranking</div>', unsafe_allow_html=True)
+    st.info("💡 Alle gespeicherten Decks (neuester Lauf pro Deck), sortiert nach dem gewichteten Score der Kategorie-Bewertungen. "
+            "Eine geänderte Gewichtung bewertet alle Decks sofort lokal neu, inkl. Ampel.")
+
+    light_labels = {'green': '🟢 Grün', 'yellow': '🟡 Gelb', 'red': '🔴 Rot'}
+    periods = {'Letzte 7 Tage': 7, 'Letzte 30 Tage': 30, 'Alle': None}
+    red_flag_options = {'all': 'Alle', 'none': 'Nur ohne Red Flags', 'any': 'Nur mit Red Flags'}
+
+    # Filter
+    col_period, col_light, col_flags = st.columns(3)
+    with col_period:
+        period = st.selectbox("Zeitraum", list(periods.keys()), index=2)
+    with col_light:
+        light_filter = st.multiselect("Ampel", list(light_labels.keys()), format_func=lambda light: light_labels[light])
+    with col_flags:
+        red_flag_filter = st.selectbox("Red Flags", list(red_flag_options.keys()), format_func=lambda option: red_flag_options[option])
+
+    # Gewichtung (Standard: Gewichtung aus der Konfiguration)
+    with st.expander("⚖️ Gewichtung", expanded=True):
+        columns = st.columns(3)
+        ranking_weights = {}
+        for index, category in enumerate(EVALUATION_CRITERIA.keys()):
+            with columns[index % 3]:
+                ranking_weights[category] = st.slider(
+                    category,
+                    min_value=0.0,
+                    max_value=3.0,
+                    step=0.25,
+                    value=weight_value(st.session_state.criteria_weights.get(category, "mittel")),
+                    key=f"ranking_weight_{category}"
+                )
 
-                # Zeige Assistenten-Nachricht an
-                st.markdown(assistant_message)
+    since = datetime.now() - timedelta(days=periods[period]) if periods[period] else None
+    ranking_start = time.perf_counter()
+    ranking, match_count = get_score_table().rank(
+        ranking_weights,
+        lights=light_filter,
+        red_flags=red_flag_filter,
+        since=since,
+        limit=200
+    )
+    ranking_ms = (time.perf_counter() - ranking_start) * 1000
+
+    st.caption(f"{match_count} Deck(s) · {len(get_score_table())} insgesamt · Ranking in {ranking_ms:.1f} ms berechnet")
+
+    if not ranking:
+        st.info("Keine gespeicherten Analysen für diese Filter gefunden")
+    else:
+        st.dataframe(
+            [
+                {
+                    'Rang': row['rank'],
+                    'Ampel': light_labels.get(row['final_prediction'], '🟡 Gelb'),
+                    'Deck': row['filename'],
+                    'Datum': datetime.fromisoformat(row['created_at']).strftime("%d.%m.%Y"),
+                    'Score': row['score'],
+                    **{category: value for category, value in row['category_scores'].items()},
+                    'Red Flags': row['red_flag_count']
+                }
+                for row in ranking
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
 
-                # Füge Assistenten-Nachricht zum Chat-Verlauf hinzu
-                st.session_state.chat_history.append({
-                    "role": "assistant",
-                    "content": assistant_message
-                })
+        # Deck aus dem Ranking öffnen (ohne API-Aufrufe)
+        col_select, col_open = st.columns([4, 1])
+        with col_select:
+            selected = st.selectbox(
+                "Deck öffnen",
+                ranking,
+                format_func=lambda row: f"{row['rank']}. {row['filename']} ({row['score'] if row['score'] is not None else '–'})",
+                label_visibility="collapsed"
+            )
+        with col_open:
+            if st.button("Öffnen", use_container_width=True):
+                open_stored_analysis(selected['analysis_id'])
@@ -0,0 +1,179 @@
+"""
+Hilfsfunktionen für die Streamlit-Oberfläche.
+
+Dieses Modul enthält Funktionen für:
+- Vorberechnetes HTML der Quellen-Karten (ein einziger Render-Aufruf pro Quellenliste)
+- Lokalen Favicon-Cache mit Auslieferung als Inline-Data-URI
+"""
+
+#import von packages
+import base64
+import html
+import httpx
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Lokales Verzeichnis für heruntergeladene Favicons
+FAVICON_DIR = Path("tmp") / "favicons"
+# Wartezeit nach einem vorübergehenden Fehler (Timeout, Netzwerk, 429/5xx), bevor erneut geladen wird
+FAVICON_RETRY_SECONDS = 300
+
+# Domain -> Zeitpunkt (time.monotonic) des letzten vorübergehenden Fehlers
+_favicon_failures = {}
+
+# Anzahl der Quellen, die pro Abschnitt direkt sichtbar sind (Rest ist eingeklappt)
+SOURCES_PAGE_SIZE = 8
+
+
+def get_domain(url: str) -> str:
+    """
+    Extrahiert die Domain aus einer URL.
+
+    Args:
+        url (str): Vollständige URL
+
+    Returns:
+        str: Domain (z.B. "techcrunch.com") oder die URL selbst, falls keine Domain erkennbar ist
+    """
+    return urlparse(url).netloc or url
+
+
+def get_favicon_data_uri(domain: str) -> str:
+    """
+    Liefert das Favicon einer Domain als Data-URI aus dem lokalen Cache.
+
+    Fehlt das Favicon im Cache, wird es heruntergeladen und gespeichert. Nur eine eindeutige Antwort ohne
+    Favicon (z.B. 404) wird als leere Datei dauerhaft gemerkt. Nach vorübergehenden Fehlern (Timeout,
+    Netzwerk, 429/5xx) wird erst nach FAVICON_RETRY_SECONDS erneut geladen.
+
+    Args:
+        domain (str): Domain der Quelle
+
+    Returns:
+        str: Data-URI des Favicons oder leerer String, falls keines verfügbar ist
+    """
+    FAVICON_DIR.mkdir(parents=True, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() or c in ".-" else "_" for c in domain)
+    path = FAVICON_DIR / f"{safe_name}.png"
+
+    if not path.exists():
+        last_failure = _favicon_failures.get(domain)
+        if last_failure is not None and time.monotonic() - last_failure < FAVICON_RETRY_SECONDS:
+            return ""
+        try:
+            response = httpx.get(f"https://www.google.com/s2/favicons?domain={domain}&sz=32", timeout=2.0, follow_redirects=True)
+        except Exception as e:
+            print(f"Favicon download failed for {domain}: {e}")
+            _favicon_failures[domain] = time.monotonic()
+            return ""
+        if response.status_code == 429 or response.status_code >= 500:
+            print(f"Favicon download failed for {domain}: HTTP {response.status_code}")
+            _favicon_failures[domain] = time.monotonic()
+            return ""
+        path.write_bytes(response.content if response.status_code == 200 else b"")
+        _favicon_failures.pop(domain, None)
+
+    return _read_favicon(str(path))
+
+
+@lru_cache(maxsize=1024)
+def _read_favicon(path: str) -> str:
+    """
+    Liest ein gespeichertes Favicon als Data-URI (Dateien werden nur einmal geschrieben, daher gecacht).
+    """
+    data = Path(path).read_bytes()
+    if not data:
+        return ""
+    return "data:image/png;base64," + base64.b64encode(data).decode("ascii")
+
+
+def normalize_sources(sources: list) -> list:
+    """
+    Vereinheitlicht Quellen (dict oder string) zu Dicts mit URL, Titel und Domain.
+
+    Args:
+        sources (list): Liste von Quellen (dict mit 'url' und 'title' oder string)
+
+    Returns:
+        list: Liste von Dicts mit {"url", "title", "domain"}
+    """
+    normalized = []
+    for source in sources or []:
+        if isinstance(source, dict):
+            url = source.get('url', '')
+            title = source.get('title', url) or url
+        elif isinstance(source, str):
+            url = title = source
+        else:
+            continue
+        normalized.append({'url': url, 'title': title, 'domain': get_domain(url)})
+    return normalized
+
+
+def _source_card_html(source: dict, favicon: str, icon: str, extra_class: str = "") -> str:
+    """
+    Erstellt das HTML einer einzelnen Quellen-Karte (ohne Einrückung, damit Markdown es nicht als Code interpretiert).
+    """
+    url = html.escape(source['url'], quote=True)
+    title = html.escape(source['title'])
+    domain = html.escape(source['domain'])
+    icon_html = f'<img src="{favicon}" style="width: 32px; height: 32px;"/>' if favicon else f'<span>{icon}</span>'
+    return (
+        f'<a href="{url}" target="_blank" class="source-card {extra_class}">'
+        f'<div class="source-icon">{icon_html}</div>'
+        f'<div class="source-content"><div class="source-title">{title}</div><div class="source-url">{domain}</div></div>'
+        f'</a>'
+    )
+
+
+def _source_section_html(subtitle: str, sources: list, favicons: dict, icon: str, extra_class: str = "", page_size: int = SOURCES_PAGE_SIZE) -> str:
+    """
+    Erstellt einen Quellen-Abschnitt; bei langen Listen wird der Rest in einem aufklappbaren Block versteckt.
+    """
+    cards = [_source_card_html(source, favicons.get(source['domain'], ""), icon, extra_class) for source in sources]
+
+    parts = [f'<div class="sources-section"><div class="sources-subtitle">{subtitle}</div>']
+    parts.extend(cards[:page_size])
+    if len(cards) > page_size:
+        parts.append(f'<details><summary class="sources-subtitle">Weitere {len(cards) - page_size} Quellen anzeigen</summary>')
+        parts.extend(cards[page_size:])
+        parts.append('</details>')
+    parts.append('</div>')
+    return "".join(parts)
+
+
+def build_sources_html(sources: list) -> str:
+    """
+    Erstellt das komplette HTML aller Quellen-Karten als ein einziges Fragment.
+
+    LinkedIn-Profile (Founder) werden separat dargestellt. Favicons werden parallel aus dem
+    lokalen Cache geladen und als Data-URI eingebettet, sodass der Browser keine externen
+    Anfragen mehr stellt. Das Ergebnis wird mit den Analyse-Ergebnissen gespeichert.
+
+    Args:
+        sources (list): Liste von Quellen (dict mit 'url' und 'title' oder string)
+
+    Returns:
+        str: HTML-Fragment für einen einzigen st.markdown Aufruf
+    """
+    normalized = normalize_sources(sources)
+    if not normalized:
+        return ""
+
+    # Favicons pro Domain nur einmal und parallel laden
+    domains = sorted({source['domain'] for source in normalized})
+    with ThreadPoolExecutor(max_workers=min(8, len(domains))) as pool:
+        favicons = dict(zip(domains, pool.map(get_favicon_data_uri, domains)))
+
+    linkedin_sources = [s for s in normalized if 'linkedin.com' in s['url'].lower()]
+    other_sources = [s for s in normalized if 'linkedin.com' not in s['url'].lower()]
+
+    parts = []
+    if linkedin_sources:
+        parts.append(_source_section_html("👥 Team & Founder Profile", linkedin_sources, favicons, "💼", "linkedin-card"))
+    if other_sources:
+        parts.append(_source_section_html("🔗 Weitere Quellen", other_sources, favicons, "📰"))
+    return "".join(parts)
@@ -0,0 +1,140 @@
+"""
+Benchmark: Pitch Deck Analyse in einer Anfrage (get_prediction) gegen die parallele Bewertung
+pro Kategorie (evaluate_pitch_deck_by_category).
+
+Misst pro Lauf die Wartezeit, die Anzahl Anfragen, die Output-Tokens und die aus dem Prompt-Cache
+gelesenen Input-Tokens und vergleicht anschließend die Kategorie-Scores und die lokal gewichtete
+Prognose beider Varianten. Die Reihenfolge der Varianten wechselt pro Lauf. Jeder Lauf startet mit
+leerem Stufen-Cache, der Prompt-Cache der API bleibt zwischen den Läufen aber bestehen (wie bei
+wiederholten Analysen im Betrieb). Benötigt gültige API-Zugangsdaten in der .env.
+
+Aufruf (im Projektverzeichnis):
+    python benchmarks/bench_category_evaluation.py pitch_decks/beispiel.pdf --runs 3
+"""
+
+#import von packages
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_config.config import client, model, instruction, EVALUATION_CRITERIA
+from ai_config.functions import get_prediction
+from ai_config.workflow import evaluate_pitch_deck_by_category
+from ai_config.scoring import aggregate_prediction
+
+
+class UsageRecorder:
+    """
+    Zählt Anfragen und Tokens aller Aufrufe von client.messages.create (thread-sicher, auch für parallele Anfragen).
+    """
+
+    def __init__(self, messages):
+        self._create = messages.create
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+
+    def create(self, **kwargs):
+        message = self._create(**kwargs)
+        usage = getattr(message, "usage", None)
+        with self._lock:
+            self.requests += 1
+            if usage is not None:
+                self.output_tokens += usage.output_tokens
+                self.cache_read_tokens += getattr(usage, "cache_read_input_tokens", 0) or 0
+        return message
+
+
+def run_single(pdf_filename: str, model_name: str) -> tuple:
+    """Bisheriger Weg: eine Anfrage mit allen Kategorien."""
+    return get_prediction(client=client, model=model_name, instruction=instruction, pdf_filename=pdf_filename)
+
+
+def run_categories(pdf_filename: str, model_name: str) -> tuple:
+    """Neuer Weg: Überblick und eine Anfrage pro Kategorie, lokal zusammengeführt (ohne Stufen-Cache)."""
+    return evaluate_pitch_deck_by_category({}, f"benchmark-{time.time()}", pdf_filename, model=model_name)
+
+
+def measure(recorder: UsageRecorder, variant, pdf_filename: str, model_name: str) -> dict:
+    """Führt eine Variante einmal aus und misst Wartezeit und Verbrauch."""
+    recorder.reset()
+    start = time.perf_counter()
+    output = variant(pdf_filename, model_name)
+    seconds = time.perf_counter() - start
+    if not output[0]:
+        raise RuntimeError(f"{variant.__name__} fehlgeschlagen: {output[2]}")
+    return {
+        'seconds': seconds,
+        'requests': recorder.requests,
+        'output_tokens': recorder.output_tokens,
+        'cache_read_tokens': recorder.cache_read_tokens,
+        'category_scores': output[4]
+    }
+
+
+def print_summary(name: str, measurements: list):
+    """Gibt Median und Spannweite der Wartezeit sowie den mittleren Verbrauch einer Variante aus."""
+    seconds = [entry['seconds'] for entry in measurements]
+    print(
+        f"{name:<14} Median {statistics.median(seconds):6.2f}s (min {min(seconds):6.2f}s, max {max(seconds):6.2f}s) | "
+        f"{statistics.mean(entry['requests'] for entry in measurements):4.1f} Anfragen | "
+        f"{statistics.mean(entry['output_tokens'] for entry in measurements):7.0f} Output-Tokens | "
+        f"{statistics.mean(entry['cache_read_tokens'] for entry in measurements):7.0f} Tokens aus dem Cache"
+    )
+
+
+def compare_scores(single: list, categories: list):
+    """Vergleicht Kategorie-Scores und Prognose beider Varianten (Mittel über alle Läufe)."""
+    print("\nKategorie      Ø Score (eine Anfrage)  Ø Score (pro Kategorie)  Ø |Differenz|")
+    for category in EVALUATION_CRITERIA:
+        single_scores = [entry['category_scores'][category]['score'] for entry in single if category in entry['category_scores']]
+        category_scores = [entry['category_scores'][category]['score'] for entry in categories if category in entry['category_scores']]
+        if not single_scores or not category_scores:
+            continue
+        differences = [abs(first - second) for first, second in zip(single_scores, category_scores)]
+        print(f"{category:<14} {statistics.mean(single_scores):22.2f}  {statistics.mean(category_scores):23.2f}  {statistics.mean(differences):13.2f}")
+
+    single_predictions = [aggregate_prediction(entry['category_scores'])[1] for entry in single]
+    category_predictions = [aggregate_prediction(entry['category_scores'])[1] for entry in categories]
+    agreeing = sum(first == second for first, second in zip(single_predictions, category_predictions))
+    print(f"\nGleiche Prognose (Standard-Gewichtung) in {agreeing} von {len(single_predictions)} Läufen")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pitch Deck Analyse: eine Anfrage vs. parallel pro Kategorie")
+    parser.add_argument("deck", help="Pfad zum Pitch Deck (PDF)")
+    parser.add_argument("--runs", type=int, default=3, help="Anzahl Läufe pro Variante")
+    parser.add_argument("--model", default=model, help="Modell für beide Varianten")
+    args = parser.parse_args()
+
+    # Die Analyse-Funktionen lesen das Deck aus dem tmp/ Ordner
+    os.makedirs("tmp", exist_ok=True)
+    pdf_filename = os.path.basename(args.deck)
+    if os.path.abspath(args.deck) != os.path.abspath(os.path.join("tmp", pdf_filename)):
+        shutil.copy(args.deck, os.path.join("tmp", pdf_filename))
+
+    recorder = UsageRecorder(client.messages)
+    client.messages.create = recorder.create
+
+    results = {run_single: [], run_categories: []}
+    for run in range(args.runs):
+        # Reihenfolge wechseln, damit keine Variante systematisch vom Prompt-Cache der anderen profitiert
+        order = [run_single, run_categories] if run % 2 == 0 else [run_categories, run_single]
+        for variant in order:
+            results[variant].append(measure(recorder, variant, pdf_filename, args.model))
+            print(f"Lauf {run + 1}: {variant.__name__:<15} {results[variant][-1]['seconds']:6.2f}s")
+
+    print(f"\n{args.runs} Läufe mit {args.model} für {pdf_filename}:")
+    print_summary("Eine Anfrage", results[run_single])
+    print_summary("Pro Kategorie", results[run_categories])
+    compare_scores(results[run_single], results[run_categories])
@@ -0,0 +1,29 @@
+"""
+Microbenchmark für ai_config.pdf_export.clean_and_simplify_text.
+
+Vergleicht die Laufzeit der aktuellen Implementierung mit der bisherigen Version (viele einzelne
+re.sub-Durchläufe) auf langen LLM-Ausgaben. Die Gleichheit der Ausgaben prüft
+tests/test_pdf_export.py (python -m pytest).
+
+Aufruf (im Projektverzeichnis):
+    python benchmarks/bench_clean_text.py
+"""
+
+#import von packages
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_config.pdf_export import clean_and_simplify_text
+from tests.test_pdf_export import legacy_clean_and_simplify_text, build_long_llm_output
+
+
+if __name__ == "__main__":
+    for paragraphs in (10, 200):
+        text = build_long_llm_output(paragraphs)
+        runs = 20
+        legacy_time = timeit.timeit(lambda: legacy_clean_and_simplify_text(text), number=runs) / runs
+        new_time = timeit.timeit(lambda: clean_and_simplify_text(text), number=runs) / runs
+        print(f"{len(text):>8} Zeichen: legacy {legacy_time * 1000:8.2f} ms | neu {new_time * 1000:8.2f} ms | Speedup {legacy_time / new_time:4.1f}x")
@@ -0,0 +1,74 @@
+"""
+Tests für den Antwort-Cache (ai_config/answer_cache.py).
+"""
+
+#import von packages
+import pytest
+
+from ai_config.answer_cache import AnswerCache
+from ai_config.config import STANDARD_QUESTIONS
+
+
+@pytest.fixture
+def standard_cache():
+    """Antwort-Cache mit allen Standard-Fragen (wie nach der Vorberechnung)."""
+    cache = AnswerCache()
+    for question in STANDARD_QUESTIONS:
+        cache.store("deck", question, f"Antwort: {question}")
+    return cache
+
+
+def test_lookup_same_normalized_question():
+    cache = AnswerCache()
+    cache.store("deck", "Wie hoch ist die Burn Rate?", "80.000 € pro Monat")
+
+    assert cache.lookup("deck", "wie hoch ist die burn rate") == ("80.000 € pro Monat", 1.0)
+    assert cache.lookup("other", "Wie hoch ist die Burn Rate?") is None
+
+
+@pytest.mark.parametrize("cached, question", [
+    ("Wer ist im Gründerteam und welchen Hintergrund haben die Gründer?", "Wer ist im Gründerteam und was ist der Hintergrund der Gründer?"),
+    ("Wie sieht der Cap Table bzw. die Beteiligungsstruktur aus?", "Wie sieht der Cap Table aus bzw. die Beteiligungsstruktur?"),
+    ("Wie hoch ist die Burn Rate und wie lange reicht der Runway?", "wie hoch ist die burn rate, und wie lange reicht der runway noch"),
+    ("Wie groß sind TAM, SAM und SOM?", "Wie groß sind TAM SAM SOM?"),
+    ("Was sind die wichtigsten Risiken dieses Investments?", "Welches sind die wichtigsten Risiken des Investments?")
+])
+def test_lookup_paraphrase_hits(standard_cache, cached, question):
+    hit = standard_cache.lookup("deck", question)
+
+    assert hit is not None
+    assert hit[0] == f"Antwort: {cached}"
+
+
+@pytest.mark.parametrize("question", [
+    "Was sind die wichtigsten Chancen dieses Investments?",
+    "Wie hoch ist der Umsatz und wie lange reicht der Runway?",
+    "Wer ist im Beirat und welchen Hintergrund haben die Beiräte?",
+    "Wie sieht der Cap Table nach der Runde aus?",
+    "Wie groß ist der TAM?"
+])
+def test_lookup_similar_sounding_question_misses(standard_cache, question):
+    assert standard_cache.lookup("deck", question) is None
+
+
+def test_lookup_requires_same_numbers():
+    cache = AnswerCache()
+    cache.store("deck", "Wie hoch ist die Burn Rate 2023?", "80.000 € pro Monat")
+    cache.store("deck", "Wie hoch ist der Umsatz in Q1?", "1,2 Mio €")
+
+    assert cache.lookup("deck", "Wie hoch ist die Burn Rate 2024?") is None
+    assert cache.lookup("deck", "Wie hoch ist der Umsatz in Q2?") is None
+    assert cache.lookup("deck", "Wie hoch war die Burn Rate 2023?")[0] == "80.000 € pro Monat"
+
+
+def test_store_from_invalidated_generation_is_dropped():
+    cache = AnswerCache()
+    generation = cache.generation("deck")
+
+    # Neustart der Analyse, während die Vorberechnung der alten Analyse noch läuft
+    cache.invalidate("deck")
+    assert not cache.store("deck", "Wer ist im Team?", "veraltete Antwort", generation)
+    assert cache.lookup("deck", "Wer ist im Team?") is None
+
+    assert cache.store("deck", "Wer ist im Team?", "neue Antwort", cache.generation("deck"))
+    assert cache.lookup("deck", "Wer ist im Team?") == ("neue Antwort", 1.0)
@@ -0,0 +1,30 @@
+"""
+Tests für die Eskalationsregeln der Modell-Kaskade (ai_config/cascade.py).
+"""
+
+#import von packages
+from ai_config.cascade import borderline_red_flags, escalation_reasons
+
+KPIS = {"runway_months": 13.0, "monthly_burn": 3.2, "cac": 23.0, "paying_customers": 5.2}
+
+
+def test_borderline_red_flags_counts_unambiguous_rules():
+    borderline = borderline_red_flags(["Runway unter 1 Jahr", "Runway < 24 Monate"], KPIS, margin=0.15)
+
+    assert len(borderline) == 1
+    assert borderline[0].startswith("Runway unter 1 Jahr")
+
+
+def test_borderline_red_flags_ignores_ambiguous_rules():
+    # Ohne strikte Erkennung läge jede Kennzahl knapp an der (falsch zugeordneten) Schwelle
+    flags = ["Burn Multiple über 3", "CAC Payback > 24 Monate", "Churn der Kunden über 5%"]
+
+    assert borderline_red_flags(flags, KPIS, margin=0.15) == []
+
+
+def test_escalation_reasons_without_borderline_flag():
+    category_scores = {"Team": {"score": 8, "confidence": 0.9}}
+
+    reasons = escalation_reasons('green', category_scores, ["Burn Multiple über 3"], KPIS, min_confidence=0.6, red_flag_margin=0.15)
+
+    assert reasons == {}
@@ -0,0 +1,194 @@
+"""
+Golden-Output-Tests für ai_config.pdf_export.clean_and_simplify_text.
+
+Die aktuelle Implementierung muss für den Golden-Korpus, eine lange LLM-Ausgabe und zufällige
+Markdown-Fragmente exakt dieselbe Ausgabe liefern wie die bisherige Version (eingefroren als
+legacy_clean_and_simplify_text). Laufzeitvergleich: benchmarks/bench_clean_text.py
+"""
+
+#import von packages
+import random
+import re
+
+import pytest
+
+from ai_config.pdf_export import clean_and_simplify_text
+
+
+def legacy_clean_and_simplify_text(text: str) -> str:
+    """
+    Bisherige Implementierung (ca. 20 einzelne re.sub-Durchläufe), dient als Referenz für die Ausgabe.
+    """
+    if not text:
+        return ""
+
+    # Entferne führende/trailing Whitespace
+    text = text.strip()
+
+    # Entferne Code-Blöcke und Inline-Code
+    text = re.sub(r'```[\s\S]*?```', '', text)
+    text = re.sub(r'`[^`]+`', '', text)
+
+    # Entferne Markdown-Tabellen (| col1 | col2 |)
+    # Tabellen werden zu einfachen Listen konvertiert
+    lines = text.split('\n')
+    cleaned_lines = []
+    in_table = False
+
+    for line in lines:
+        # Erkenne Tabellenzeilen (beginnen und enden mit |)
+        if re.match(r'^\s*\|.*\|\s*$', line):
+            # Ist das eine Trennzeile? (|---|---| oder |:---|:---|)
+            if re.match(r'^\s*\|[\s\-:]+\|\s*$', line):
+                in_table = True
+                continue  # Überspringe Trennzeilen komplett
+
+            # Konvertiere Tabellen-Zeile zu Bullet-Point
+            # Extrahiere Zellen und entferne leere
+            cells = [cell.strip() for cell in line.split('|') if cell.strip()]
+
+            # Filtere Zellen die nur aus Bindestrichen bestehen
+            cells = [cell for cell in cells if not re.match(r'^[\-:]+$', cell)]
+
+            if cells:
+                # Erste Zelle fett, Rest normal
+                if len(cells) > 1:
+                    cleaned_lines.append(f"• {cells[0]}: {', '.join(cells[1:])}")
+                else:
+                    cleaned_lines.append(f"• {cells[0]}")
+            continue
+        else:
+            in_table = False
+            cleaned_lines.append(line)
+
+    text = '\n'.join(cleaned_lines)
+
+    # Entferne verbleibende Pipe-Zeichen
+    text = text.replace('|', '')
+
+    # Entferne geschweifte Klammern {} (oft aus JSON oder Template-Syntax)
+    text = text.replace('{', '')
+    text = text.replace('}', '')
+
+    # Entferne eckige Klammern [] (oft aus Markdown-Links)
+    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)  # [text](url) -> text
+    text = text.replace('[', '')
+    text = text.replace(']', '')
+
+    # Escape XML-Zeichen
+    text = text.replace('&', '&amp;')
+    text = text.replace('<', '&lt;')
+    text = text.replace('>', '&gt;')
+
+    # Entferne Header-Markierungen (###, ##, #)
+    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+
+    # Verarbeite Text zeilenweise für Formatierung
+    lines = text.split('\n')
+    converted_lines = []
+
+    for line in lines:
+        # Überspringe leere Zeilen (werden später wieder hinzugefügt)
+        original_line = line
+
+        # Entferne alle führenden Leerzeichen/Tabs (Einrückungen)
+        line = line.lstrip()
+
+        # Konvertiere Bullet-Points BEVOR wir * entfernen
+        if re.match(r'^[-*+•]\s+', line):
+            line = re.sub(r'^[-*+•]\s+', '• ', line)
+
+        # Markdown-Formatierung auf der Zeile
+        # Konvertiere Bold-Text (**text** und __text__)
+        line = re.sub(r'\*\*([^\*]+)\*\*', r'<b>\1</b>', line)
+        line = re.sub(r'__([^_]+)__', r'<b>\1</b>', line)
+
+        # Entferne restliche * und _ für Italic (machen wir einfach weg)
+        line = re.sub(r'\*([^\*]+)\*', r'\1', line)
+        line = re.sub(r'_([^_]+)_', r'\1', line)
+
+        # Entferne übrig gebliebene einzelne * und _
+        line = line.replace('*', '')
+        line = line.replace('_', '')
+
+        # Nur nicht-leere Zeilen hinzufügen
+        if line.strip():
+            converted_lines.append(line)
+
+    text = '\n'.join(converted_lines)
+
+    # Ersetze mehrfache Leerzeilen
+    text = re.sub(r'\n{3,}', '\n\n', text)
+
+    # Konvertiere Zeilenumbrüche zu HTML
+    text = text.replace('\n\n', '<br/><br/>')
+    text = text.replace('\n', '<br/>')
+
+    # Bereinige mehrfache <br/> Tags
+    text = re.sub(r'(<br/>){3,}', '<br/><br/>', text)
+
+    # Entferne führende/trailing <br/> Tags
+    text = re.sub(r'^(<br/>)+', '', text)
+    text = re.sub(r'(<br/>)+$', '', text)
+
+    return text.strip()
+
+
+# Golden-Korpus: typische und problematische Ausgaben der Modelle
+GOLDEN_CORPUS = [
+    "",
+    "   ",
+    "Einfacher Satz ohne Formatierung.",
+    "## Executive Summary\n\nDas Startup **Acme Pay** adressiert den Markt für *Embedded Finance*.",
+    "# Titel\n### Unterpunkt\n#### Noch tiefer\n#KeinHeader",
+    "- Punkt eins\n* Punkt zwei\n+ Punkt drei\n• Punkt vier\n    - eingerückt\n-KeinBullet",
+    "**Stärken:** starkes __Team__ und _klare_ Vision\n**Risiken:** hohe *Burn Rate*",
+    "| Kennzahl | Wert |\n|---|---|\n| Umsatz | 1,2 Mio EUR |\n| Kunden | 14 |\n|:--|--:|\n| Nur eine Zelle |",
+    "||\n| - | : |\n|  |\n| a | --- | b |",
+    "Siehe [Crunchbase](https://crunchbase.com/acme) und [LinkedIn](https://linkedin.com/in/anna).",
+    "Mehrzeiliger [Link\nText](https://example.com) und [ohne Ziel] sowie [leer]()",
+    "Code: `pip install acme` und\n```python\nprint('x')\n```\nDanach Text.",
+    "Offener `Backtick und ```unvollständiger Block",
+    "JSON {\"key\": \"value\"} und <html> & Entities",
+    "snake_case_variable und __init__ sowie ***dreifach*** und **unvollständig",
+    "Zeile 1\n\n\n\nZeile 2\r\nZeile 3\t\n\t\n",
+    "##\n\nText direkt nach leerem Header",
+    "🚨 **Keine zahlenden Kunden**\n   Das Deck nennt keine Umsätze.\n\n🚨 **Founder gekündigt**\n   Laut LinkedIn.",
+    "**Direkte Wettbewerber:**\n- Stripe\n- Adyen\n\n**Indirekte Wettbewerber:**\n- Hausbanken",
+]
+
+
+def build_long_llm_output(paragraphs: int = 200) -> str:
+    """
+    Erzeugt eine lange, realistische LLM-Ausgabe mit Überschriften, Listen, Tabellen und Links.
+    """
+    block = """## Marktanalyse
+
+Der **Markt** für *Embedded Finance* wächst laut [McKinsey](https://mckinsey.com/report) um 25% p.a.
+Die Gründer (`Anna`, `Jonas`) haben __relevante__ Erfahrung bei {Top-Banken}.
+
+| Kennzahl | 2023 | 2024 |
+|---|---|---|
+| Umsatz | 0,4 Mio | 1,2 Mio |
+| Kunden | 5 | 14 |
+
+- **Stärke:** klare Positionierung gegenüber Stripe & Adyen
+- **Risiko:** Burn Rate > 80k EUR/Monat bei < 12 Monaten Runway
+    * Unterpunkt mit _Betonung_
+"""
+    return "\n".join(block for _ in range(paragraphs))
+
+
+@pytest.mark.parametrize("text", GOLDEN_CORPUS + [build_long_llm_output(3)])
+def test_clean_text_matches_legacy_on_golden_corpus(text):
+    assert clean_and_simplify_text(text) == legacy_clean_and_simplify_text(text)
+
+
+def test_clean_text_matches_legacy_on_random_fragments():
+    alphabet = list("ab ü\n\n\t|-:*_#`[](){}<>&•+") + ["**", "__", "```", "| a | b |", "|---|---|", "## ", "- ", "[x](http://y)", "\r", "  "]
+    rnd = random.Random(0)
+    fragments = ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 40))) for _ in range(20000)]
+
+    mismatches = [text for text in fragments if clean_and_simplify_text(text) != legacy_clean_and_simplify_text(text)]
+
+    assert mismatches == []
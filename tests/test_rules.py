@@ -0,0 +1,58 @@
+"""
+Tests für die lokale Regel-Engine (ai_config/rules.py).
+"""
+
+#import von packages
+import pytest
+
+from ai_config.rules import parse_rule, apply_kpi_rules
+
+
+@pytest.mark.parametrize("flag, kpi, operator, threshold", [
+    ("Runway < 12 Monate", "runway_months", "<", 12),
+    ("Runway unter 1 Jahr", "runway_months", "<", 12),
+    ("Runway liegt bei unter 18 Monaten.", "runway_months", "<", 18),
+    ("weniger als 10 zahlende Kunden", "paying_customers", "<", 10),
+    ("LTV/CAC unter 3", "ltv_cac_ratio", "<", 3),
+    ("Umsatzwachstum unter 50%", "revenue_growth", "<", 50),
+    ("Burn über 100 Tsd.", "monthly_burn", ">", 100_000),
+    ("Burn Rate über 150.000 € pro Monat", "monthly_burn", ">", 150_000),
+    ("Umsatz < €500k", "revenue", "<", 500_000),
+    ("Bewertung über 1,5 Mio. €", "valuation", ">", 1_500_000),
+    ("CAC mindestens 800 EUR", "cac", ">=", 800)
+])
+def test_parse_rule_quantitative(flag, kpi, operator, threshold):
+    rule = parse_rule(flag)
+    assert rule is not None
+    assert (rule["kpi"], rule["operator"]) == (kpi, operator)
+    assert rule["threshold"] == pytest.approx(threshold)
+
+
+@pytest.mark.parametrize("flag", [
+    # Kennzahl ist nicht das Subjekt der Red Flag
+    "Burn Multiple über 3",
+    "CAC Payback > 24 Monate",
+    "Churn der Kunden über 5%",
+    "Kunden-Churn über 5%",
+    # Einheit passt nicht zur Kennzahl
+    "Runway unter 5%",
+    "Umsatz unter 12 Monate",
+    "Wachstum unter 1 Mio",
+    "Runway < 12m",
+    # Qualitativ
+    "Gründerteam ohne technischen Mitgründer",
+    "Runway und Burn über 12"
+])
+def test_parse_rule_ambiguous(flag):
+    assert parse_rule(flag) is None
+
+
+def test_apply_kpi_rules_sends_ambiguous_flags_to_llm():
+    kpis = {"runway_months": 10.0, "monthly_burn": 50_000.0, "cac": 400.0, "paying_customers": 200.0}
+    flags = ["Runway unter 1 Jahr", "Burn Multiple über 3", "CAC Payback > 24 Monate", "Churn der Kunden über 5%"]
+
+    triggered, remaining, decided = apply_kpi_rules(flags, kpis)
+
+    assert list(triggered) == ["Runway unter 1 Jahr"]
+    assert remaining == flags[1:]
+    assert decided == 1
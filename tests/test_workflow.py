@@ -0,0 +1,96 @@
+"""
+Tests für den Stufen-Cache der Pitch Deck Analyse pro Kategorie und der kombinierten Red-Flag- und Zusammenfassungs-Stufe (ai_config/workflow.py).
+"""
+
+#import von packages
+import pytest
+
+from ai_config import workflow
+
+
+@pytest.fixture
+def fused_calls(monkeypatch):
+    """Ersetzt review_and_summarize durch eine Attrappe und zählt die Anfragen."""
+    calls = []
+
+    def fake_review_and_summarize(client, model, pitch_deck_analysis, web_research_analysis, competitor_analysis,
+                                  red_flags_list, score_1, score_2, known_triggered_flags):
+        calls.append({'flags': list(red_flags_list), 'score_1': score_1, 'score_2': score_2, 'known': list(known_triggered_flags)})
+        return True, {}, f"Zusammenfassung {len(calls)}", f"Begründung {score_1}/{score_2}", ""
+
+    monkeypatch.setattr(workflow, 'review_and_summarize', fake_review_and_summarize)
+    return calls
+
+
+def run_stage(stage_cache, prediction, red_flags_list=None, kpis=None):
+    return workflow.review_and_summarize_stage(
+        stage_cache, red_flags_list or [], "Deck-Begründung", "Web-Begründung", "Wettbewerber",
+        prediction=prediction, web_prediction=True, model="test-model", kpis=kpis
+    )
+
+
+def test_fused_summary_reused_for_same_inputs(fused_calls):
+    stage_cache = {}
+    run_stage(stage_cache, True)
+    success, _, _, summary_text, rationale, checked, reused = run_stage(stage_cache, True)
+
+    assert success and reused
+    assert (summary_text, rationale, checked) == ("Zusammenfassung 1", "Begründung True/True", 0)
+    assert len(fused_calls) == 1
+
+
+def test_fused_summary_rerun_when_prediction_flips(fused_calls):
+    stage_cache = {}
+    run_stage(stage_cache, True)
+    _, _, _, summary_text, rationale, _, reused = run_stage(stage_cache, False)
+
+    assert not reused
+    assert rationale == "Begründung False/True"
+    assert len(fused_calls) == 2
+
+
+def test_fused_summary_rerun_when_triggered_flags_change(fused_calls):
+    stage_cache = {}
+    red_flags_list = ["Runway < 12 Monate"]
+    run_stage(stage_cache, True, red_flags_list, kpis={"runway_months": 18.0})
+    _, triggered, _, _, _, _, reused = run_stage(stage_cache, True, red_flags_list, kpis={"runway_months": 6.0})
+
+    assert triggered == red_flags_list and not reused
+    assert fused_calls[-1]['known'] == red_flags_list
+
+
+def test_fused_summary_does_not_touch_separate_summary_cache(fused_calls):
+    stage_cache = {'summary': {'fingerprint': "separat", 'output': (True, "Getrennte Zusammenfassung", 'green')}}
+    run_stage(stage_cache, True)
+
+    assert stage_cache['summary']['output'][1] == "Getrennte Zusammenfassung"
+
+
+def test_category_evaluation_keeps_finished_parts_after_failure(monkeypatch):
+    calls = []
+    failing = {"TEAM"}
+
+    def fake_overview(client, model, pdf_filename):
+        calls.append("overview")
+        return True, True, "Überblick", "Pitch", {}
+
+    def fake_category(client, model, pdf_filename, category):
+        calls.append(category)
+        if category in failing:
+            return False, 0.0, 0.0, "Error: timeout", ""
+        return True, 7.0, 0.8, f"Begründung {category}", ""
+
+    monkeypatch.setattr(workflow, 'get_deck_overview', fake_overview)
+    monkeypatch.setattr(workflow, 'evaluate_category', fake_category)
+    stage_cache = {}
+
+    output = workflow.evaluate_pitch_deck_by_category(stage_cache, "deck", "deck.pdf", model="test-model")
+    assert output[:3] == (False, False, "Error: timeout")
+    assert len(stage_cache['pitch_deck_categories']) == len(workflow.EVALUATION_CRITERIA)
+
+    # Nächster Lauf wiederholt nur die fehlgeschlagene Kategorie
+    calls.clear()
+    failing.clear()
+    output = workflow.evaluate_pitch_deck_by_category(stage_cache, "deck", "deck.pdf", model="test-model")
+    assert output[0] and set(output[4]) == set(workflow.EVALUATION_CRITERIA)
+    assert calls == ["TEAM"]